@@ -0,0 +1,37 @@
+""" Benchmark the latency of GridWorld.cells_in_range across grid sizes
+
+run from the repository root with:
+    python -m benchmarks.bench_cells_in_range
+"""
+import timeit
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+
+GRID_SIZES = [20, 50, 100, 200, 500]
+CALLS = 2000
+
+
+def full_scan_cells_in_range(env, agent_i):
+    # the original implementation, checking the distance to every cell of the world
+    agent_loc = env.agent_locations[agent_i]
+    visible_range = env.rescuer_visible_range if agent_i in env.rescuers else env.scout_visible_range
+    return [loc for loc in range(len(env.world)) if env.manhatten_distance(loc, agent_loc) <= visible_range]
+
+
+def main():
+    print(f"{'grid':>6} {'stencil (us/call)':>18} {'full scan (us/call)':>20}")
+    for grid_size in GRID_SIZES:
+        options = default_options.copy()
+        options['grid_size'] = grid_size
+        env = SARGridWorld(options)
+        agent = env.scouts[0]
+        stencil = timeit.timeit(lambda: env.cells_in_range(agent), number=CALLS) / CALLS
+        # the full scan is too slow to repeat many times on the large grids
+        scan_calls = max(1, 20000 // (grid_size * grid_size))
+        scan = timeit.timeit(lambda: full_scan_cells_in_range(env, agent), number=scan_calls) / scan_calls
+        print(f"{grid_size:>6} {stencil*1e6:>18.2f} {scan*1e6:>20.1f}")
+
+
+if __name__ == '__main__':
+    main()
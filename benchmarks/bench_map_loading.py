@@ -0,0 +1,49 @@
+""" Benchmark map loading and environment construction from a large map file with a cold and warm map cache
+
+run from the repository root with:
+    python -m benchmarks.bench_map_loading
+"""
+import os
+import tempfile
+import time
+
+from src import map_factory
+from src.map_factory import ImageGridFactory
+from src.environments import SARGridWorld, default_options
+
+MAP_FILE = './assets/maps/unreal_maps/3_rooms/clean_dialated_resized.png'
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def clear_caches(cache_dir):
+    map_factory._loaded_maps.clear()
+    for file in os.listdir(cache_dir):
+        os.remove(os.path.join(cache_dir, file))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        map_factory.MAP_CACHE_DIR = cache_dir
+        options = default_options.copy()
+        options['map_file'] = MAP_FILE
+        options['grid_size'] = ImageGridFactory.load_grid(MAP_FILE, options['scout_visible_range']).shape[0]
+        print(f"grid size: {options['grid_size']}")
+        for cache in ['uncached', 'disk cached', 'memory cached']:
+            if cache == 'uncached':
+                clear_caches(cache_dir)
+            elif cache == 'disk cached':
+                # a fresh worker process only has the disk cache
+                map_factory._loaded_maps.clear()
+            load_time = timed(ImageGridFactory.load_map, MAP_FILE, options['scout_visible_range'])
+            if cache == 'uncached':
+                clear_caches(cache_dir)
+            print(f"{cache}: map load {load_time*1000:.1f}ms, construction {timed(SARGridWorld, options):.3f}s")
+
+
+if __name__ == '__main__':
+    main()
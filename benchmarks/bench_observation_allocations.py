@@ -0,0 +1,58 @@
+""" Measure the memory allocated while building observations with tracemalloc, with and without
+preallocated observation buffers
+
+run from the repository root with:
+    python -m benchmarks.bench_observation_allocations
+"""
+import time
+import tracemalloc
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+
+STEPS = 2000
+
+
+def measure(env, function):
+    # returns the most memory allocated at once within a call, the memory still held after all
+    # the calls (by the returned observations) and the time per call
+    agents = env.agents
+    function(agents[0])
+    tracemalloc.start()
+    peaks = list()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    observations = list()
+    for i in range(STEPS):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        observations.append(function(agents[i % len(agents)]))
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    retained = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for i in range(STEPS):
+        function(agents[i % len(agents)])
+    elapsed = time.perf_counter() - start
+    return np.mean(peaks), retained / STEPS, elapsed / STEPS
+
+
+def main():
+    print(f"{'observations':>14} {'function':>26} {'peak (bytes/call)':>18} {'kept (bytes/call)':>18} {'time (us)':>10}")
+    for preallocate in (False, True):
+        options = default_options.copy()
+        options['grid_size'] = 100
+        options['num_agents'] = 50
+        options['num_rescuers'] = 10
+        options['seed'] = 0
+        options['preallocate_observations'] = preallocate
+        env = SARGridWorld(options)
+        name = 'preallocated' if preallocate else 'new arrays'
+        # the observation alone and a whole step (which also moves the agent and checks its range)
+        for label, function in [('get_observation_for_agent', env.get_observation_for_agent),
+                                ('step_agent', lambda agent: env.step_agent(agent, SARGridWorld.Actions.RIGHT))]:
+            peak, retained, elapsed = measure(env, function)
+            print(f"{name:>14} {label:>26} {peak:>18.0f} {retained:>18.0f} {elapsed * 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
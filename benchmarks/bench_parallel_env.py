@@ -0,0 +1,43 @@
+""" Benchmark the sample throughput of SARParallelEnv with random (masked) actions
+
+run from the repository root with:
+    python -m benchmarks.bench_parallel_env
+"""
+import time
+import numpy as np
+
+from src.environments import default_options
+from src.parallel_env import SARParallelEnv
+
+ENV_COUNTS = [1, 16, 256]
+STEPS = 200
+
+
+def main():
+    options = default_options.copy()
+    options['seed'] = 0
+    rng = np.random.default_rng(0)
+
+    # the dict api steps one world
+    env = SARParallelEnv(options, max_cycles=STEPS + 1)
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        env.step({agent: int(rng.choice(np.nonzero(env.action_masks[i])[0])) for agent, i in env.agent_ids.items()})
+    print(f"dict api, 1 world: {STEPS * env.engine.num_agents / (time.perf_counter() - start):.0f} agent steps/s")
+
+    print(f"{'worlds':>7} {'array api (agent steps/s)':>26}")
+    for num_envs in ENV_COUNTS:
+        env = SARParallelEnv(options, num_envs, max_cycles=100, auto_reset=True)
+        env.reset_arrays()
+        # draw allowed actions for every step up front
+        allowed = [np.nonzero(mask)[0] for mask in env.action_masks]
+        actions = np.stack([rng.choice(allowed[i], (STEPS, num_envs)) for i in range(env.engine.num_agents)], axis=2)
+        start = time.perf_counter()
+        for step in range(STEPS):
+            env.step_arrays(actions[step])
+        print(f"{num_envs:>7} {STEPS * num_envs * env.engine.num_agents / (time.perf_counter() - start):>26.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+""" Show where step time goes with the profile option, and what profiling costs
+
+run from the repository root with:
+    python -m benchmarks.bench_profiling
+"""
+import time
+
+from src.environments import SARGridWorld, default_options
+from src.simulation import Simulation
+
+ROUNDS = 200
+
+
+def run(profile):
+    options = default_options.copy()
+    options['grid_size'] = 50
+    options['num_agents'] = 20
+    options['num_rescuers'] = 5
+    options['num_victums'] = 5
+    options['seed'] = 0
+    options['profile'] = profile
+    simulation = Simulation(SARGridWorld(options))
+    start = time.perf_counter()
+    stats = simulation.run_simulation(ROUNDS)
+    return time.perf_counter() - start, stats
+
+
+def main():
+    plain, _ = run(False)
+    profiled, stats = run(True)
+    print(f"{ROUNDS} rounds: {plain:.2f}s without profiling, {profiled:.2f}s profiled")
+    profile = stats['profile']
+    print(f"{'phase':>16} {'calls/step':>11} {'total (ms)':>11} {'p50 (us)':>9} {'p99 (us)':>9}")
+    for phase, phase_stats in sorted(profile['phases'].items(), key=lambda item: -item[1]['total_ms']):
+        print(f"{phase:>16} {phase_stats['calls_per_step']:>11.2f} {phase_stats['total_ms']:>11.1f} {phase_stats['p50_us']:>9.1f} {phase_stats['p99_us']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
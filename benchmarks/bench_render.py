@@ -0,0 +1,59 @@
+""" Benchmark rendering frames per second, and step throughput headless and while recording
+
+run from the repository root with:
+    python -m benchmarks.bench_render
+(the pygame window uses SDL's dummy video driver unless SDL_VIDEODRIVER is set)
+"""
+import os
+import tempfile
+import time
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from src.environments import SARGridWorld, default_options
+
+MAP_FILE = './assets/maps/old_maps/strong0_new.npy'
+FRAMES = 50
+STEPS = 5000
+RECORD_INTERVAL = 10
+
+
+def options_for(render_mode, **overrides):
+    options = {**default_options, **overrides}
+    options['screen_size'] = 500
+    options['grid_size'] = 100
+    options['map_file'] = MAP_FILE
+    options['render_mode'] = render_mode
+    return options
+
+
+def main():
+    env = SARGridWorld(options_for('human'))
+    moves = list(SARGridWorld.action_deltas)
+    # walk the agents around for a while so the visit map isn't empty
+    for _ in range(200):
+        for agent in env.agents:
+            env.update_agent_state(agent, *SARGridWorld.action_deltas[moves[np.random.randint(0, 4)]])
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        env.display.visit(env)
+    print(f"human render: {FRAMES / (time.perf_counter() - start):.1f} frames/s")
+    env.stop_simulation()
+
+    actions = [moves[i] for i in np.random.randint(0, 4, STEPS)]
+    agents = np.random.choice(default_options['num_agents'], STEPS)
+    with tempfile.TemporaryDirectory() as video_dir:
+        # recording keeps every k-th step at half resolution
+        recording = options_for('rgb_array', video_file=os.path.join(video_dir, 'episode.avi'), render_interval=RECORD_INTERVAL, frame_size=(50, 50))
+        for name, options in [('headless', options_for(None)), (f'recording every {RECORD_INTERVAL}th step', recording)]:
+            env = SARGridWorld(options)
+            start = time.perf_counter()
+            for agent, action in zip(agents, actions):
+                env.step_agent(agent, action)
+            print(f"{name} step_agent: {STEPS / (time.perf_counter() - start):.0f} steps/s")
+            env.stop_simulation()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+""" Benchmark choosing the rescuers' actions with BatchRescuePolicy against calling RescueAgent.policy per rescuer
+
+run from the repository root with:
+    python -m benchmarks.bench_rescue_policy
+"""
+import time
+import numpy as np
+
+from src.agents import BatchRescuePolicy, RescueAgent
+from src.environments import SARGridWorld, default_options
+
+RESCUER_COUNTS = [10, 100, 1000]
+ROUNDS = 10
+
+
+def main():
+    print(f"{'rescuers':>8} {'RescueAgent.policy (decisions/s)':>33} {'BatchRescuePolicy (decisions/s)':>32}")
+    for num_rescuers in RESCUER_COUNTS:
+        options = default_options.copy()
+        options['grid_size'] = 100
+        options['num_agents'] = num_rescuers
+        options['num_rescuers'] = num_rescuers
+        options['num_victums'] = 10
+        options['seed'] = 0
+        env = SARGridWorld(options)
+        rescuers = env.rescuers
+        # each rescuer knows where half of the victums are and a fifth of them are carrying one
+        known = np.where(env.rng.random((num_rescuers, env.num_victums)) < 0.5, env.victum_locations, -1)
+        env.known_victum_locations[rescuers] = known
+        env.agents_carrying_victum[rescuers[:num_rescuers // 5]] = 0
+        agent = RescueAgent(env=env, rng=0)
+        policy = BatchRescuePolicy(env, 0)
+
+        observations = [env.get_observation_for_agent(i) for i in rescuers]
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            for obs in observations:
+                agent.policy(obs)
+        sequential = num_rescuers * ROUNDS / (time.perf_counter() - start)
+
+        locs, carrying = env.agent_locations[rescuers], env.agents_carrying_victum[rescuers] >= 0
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            policy.policy(locs, known, carrying, env.location_visits)
+        batched = num_rescuers * ROUNDS / (time.perf_counter() - start)
+        print(f"{num_rescuers:>8} {sequential:>33.0f} {batched:>32.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+""" Benchmark rescuer episodes on the obstructed room maps with manhatten and shortest path navigation
+
+Every agent is told where the victums are at the start, so the episode length measures how long the
+rescuers take to reach them and carry them to a goal.
+
+run from the repository root with:
+    python -m benchmarks.bench_rescuer_navigation [map names]
+(3_rooms_obstructed is 5120x5120 and needs a few GB of memory so it isn't run by default)
+"""
+import sys
+import time
+import numpy as np
+
+from src.agents import RescueAgent, ScoutAgent
+from src.environments import SARGridWorld, default_options
+from src.map_factory import ImageGridFactory
+
+MAPS = ['5_rooms_obstructed', '6_rooms_obstructed']
+MAX_ROUNDS = 20000
+SEEDS = range(5)
+
+
+class ManhattenRescueAgent(RescueAgent):
+    # the navigation used before distance fields (walls are only avoided one move ahead)
+    def get_victum_distances(self, loc, victum_locations):
+        return np.array([self.env.manhatten_distance(vic_loc, loc) for vic_loc in victum_locations], dtype=float)
+
+    def get_action_distances_to_target(self, loc, target):
+        loc = int(loc)
+        next_locs = self.env.transitions[loc]
+        act_distances = np.array([self.env.manhatten_distance(next_loc, target) for next_loc in next_locs], dtype=float)
+        return np.where(next_locs == loc, np.inf, act_distances)
+
+
+def run_episode(map_name, rescue_agent_class, seed):
+    map_file = f'./assets/maps/unreal_maps/{map_name}/clean_dialated_resized.png'
+    options = default_options.copy()
+    options['map_file'] = map_file
+    options['grid_size'] = ImageGridFactory.load_grid(map_file, options['scout_visible_range']).shape[0]
+    options['visit_dtype'] = 'uint8'
+    options['seed'] = seed
+    env = SARGridWorld(options)
+    policies = {i: ScoutAgent(env.get_scout_actions(), env, env.agent_rng(i)) for i in env.scouts}
+    policies.update({i: rescue_agent_class(env.get_rescuer_actions(), env, env.agent_rng(i)) for i in env.rescuers})
+    start = time.perf_counter()
+    env.known_victum_locations[:] = env.victum_locations
+    observations = [env.get_observation_for_agent(i) for i in env.agents]
+    rounds, done = 0, False
+    while not done and rounds < MAX_ROUNDS:
+        rounds += 1
+        for i in env.agents:
+            observations[i], _, done = env.step_agent(i, policies[i].policy(observations[i]))
+            if done: break
+    return rounds, done, time.perf_counter() - start
+
+
+def main():
+    maps = sys.argv[1:] or MAPS
+    print(f"{'map':>20} {'navigation':>14} {'mean rounds':>12} {'rescued':>8} {'seconds':>8}")
+    for map_name in maps:
+        for name, rescue_agent_class in [('manhatten', ManhattenRescueAgent), ('shortest path', RescueAgent)]:
+            episodes = np.array([run_episode(map_name, rescue_agent_class, seed) for seed in SEEDS])
+            rounds, rescued, seconds = episodes.mean(axis=0)[0], int(episodes[:, 1].sum()), episodes[:, 2].sum()
+            print(f"{map_name:>20} {name:>14} {rounds:>12.0f} {rescued:>4}/{len(SEEDS):<3} {seconds:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
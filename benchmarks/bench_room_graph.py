@@ -0,0 +1,68 @@
+""" Benchmark hierarchical (room graph) navigation against flat breadth first search distance fields
+
+Agents walk greedily from random starts to random targets on the room maps, planning with either a
+full distance field for every target or the room graph's local searches (which are shared by every
+target in the same regions).
+
+run from the repository root with:
+    python -m benchmarks.bench_room_graph [map names]
+(the shipped maps with the rooms open are only 256x256, so each takes a few seconds)
+"""
+import sys
+import time
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+from src.map_factory import ImageGridFactory
+
+MAPS = ['5_rooms_obstructed', '6_rooms_obstructed']
+TRIPS = 30
+MAX_MOVES = 20000
+SEED = 0
+
+
+def flat_action_distances(env, loc, target):
+    next_locs = env.transitions[loc]
+    return np.where(next_locs == loc, np.inf, env.distance_field(target)[next_locs])
+
+
+def walk(env, action_distances, start, target):
+    # follow the planner until the target is reached, returning the number of moves
+    loc, moves = int(start), 0
+    while loc != target and moves < MAX_MOVES:
+        loc = int(env.transitions[loc, np.argmin(action_distances(loc, target))])
+        moves += 1
+    return moves
+
+
+def main():
+    maps = sys.argv[1:] or MAPS
+    print(f"{'map':>20} {'planner':>10} {'setup (s)':>10} {'trips (s)':>10} {'moves/shortest':>15}")
+    for map_name in maps:
+        map_dir = f'./assets/maps/unreal_maps/{map_name}/'
+        options = default_options.copy()
+        # the room graphs match the maps which load with the rooms as movable cells
+        options['map_file'] = map_dir + 'clean_inverted.png'
+        options['grid_size'] = ImageGridFactory.load_grid(options['map_file'], options['scout_visible_range']).shape[0]
+        options['visit_dtype'] = 'uint8'
+        options['max_distance_fields'] = 1
+        env = SARGridWorld(options)
+        trips = np.random.default_rng(SEED).choice(env.movable_locations, (TRIPS, 2))
+        # shortest path lengths (not timed)
+        shortest = np.array([env.distance_field(target)[start] for start, target in trips])
+        start_time = time.perf_counter()
+        room_graph_options = {**options, 'room_graph_file': map_dir + 'Map0.gexf'}
+        room_graph = SARGridWorld(room_graph_options).room_graph
+        setup = time.perf_counter() - start_time
+        for name, planner_env, action_distances, setup_time in [
+            ('flat bfs', env, lambda loc, target: flat_action_distances(env, loc, target), 0),
+            ('room graph', room_graph.env, room_graph.action_distances, setup)]:
+            planner_env.distance_fields.clear()
+            start_time = time.perf_counter()
+            moves = np.array([walk(planner_env, action_distances, start, int(target)) for start, target in trips])
+            seconds = time.perf_counter() - start_time
+            print(f"{map_name:>20} {name:>10} {setup_time:>10.2f} {seconds:>10.2f} {moves.sum() / shortest.sum():>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+""" Benchmark drawing scenarios (victum and agent placements) from the accident files of the room maps
+
+run from the repository root with:
+    python -m benchmarks.bench_scenarios
+"""
+import time
+import numpy as np
+
+from src import scenarios
+from src.environments import SARGridWorld, default_options
+from src.map_factory import ImageGridFactory
+
+MAP_DIR = './assets/maps/unreal_maps/6_rooms_obstructed/'
+SCENARIOS = 1000000
+
+
+def main():
+    options = default_options.copy()
+    # the accidents are in the rooms, which are the movable cells of the clean_inverted maps
+    options['map_file'] = MAP_DIR + 'clean_inverted.png'
+    options['grid_size'] = ImageGridFactory.load_grid(options['map_file'], options['scout_visible_range']).shape[0]
+    options['accident_file'] = MAP_DIR + 'gau_locs.mat'
+    options['visit_dtype'] = 'uint8'
+    env = SARGridWorld(options)
+    scenarios._accident_cdfs.clear()
+    start = time.perf_counter()
+    sampler = scenarios.ScenarioSampler(env)
+    print(f"accident mass over {len(env.movable_locations)} cells: {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    sampler.sample(SCENARIOS)
+    print(f"{SCENARIOS} scenarios: {time.perf_counter() - start:.2f}s")
+    # the old placement drew each location with its own np.random.choice call
+    start = time.perf_counter()
+    for _ in range(1000):
+        accident_locations = np.array([np.random.choice(env.movable_locations) for _ in range(4)])
+        np.array([np.random.choice(accident_locations) for _ in range(env.num_victums)])
+        np.array([np.random.choice(env.starts) for _ in range(env.num_agents)])
+    print(f"{SCENARIOS} scenarios with per location choice calls (estimated): {(time.perf_counter() - start) * SCENARIOS / 1000:.0f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+""" Benchmark choosing the scouts' moves with BatchScoutPolicy against calling ScoutAgent.policy per scout
+
+run from the repository root with:
+    python -m benchmarks.bench_scout_policy
+"""
+import time
+import numpy as np
+
+from src.agents import BatchScoutPolicy, ScoutAgent
+from src.environments import SARGridWorld, default_options
+
+SCOUT_COUNTS = [10, 100, 1000, 5000]
+ROUNDS = 20
+
+
+def main():
+    print(f"{'scouts':>7} {'ScoutAgent.policy (decisions/s)':>32} {'BatchScoutPolicy (decisions/s)':>31}")
+    for num_scouts in SCOUT_COUNTS:
+        options = default_options.copy()
+        options['grid_size'] = 100
+        options['num_agents'] = num_scouts
+        options['num_rescuers'] = 0
+        options['seed'] = 0
+        env = SARGridWorld(options)
+        env.location_visits[env.movable_locations] = env.rng.integers(0, 5, len(env.movable_locations))
+        agent = ScoutAgent(env=env, rng=0)
+        policy = BatchScoutPolicy(env, 0)
+        locs = env.agent_locations[env.scouts]
+
+        # the per scout policy needs each scout's observation
+        observations = [env.get_observation_for_agent(i) for i in env.scouts]
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            for obs in observations:
+                agent.policy(obs)
+        sequential = num_scouts * ROUNDS / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            policy.policy(env.location_visits, locs)
+        batched = num_scouts * ROUNDS / (time.perf_counter() - start)
+        print(f"{num_scouts:>7} {sequential:>32.0f} {batched:>31.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+""" Benchmark the throughput of SARGridWorld.step_all against stepping each agent in turn
+
+run from the repository root with:
+    python -m benchmarks.bench_step_all
+"""
+import copy
+import time
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+
+AGENT_COUNTS = [10, 100, 500]
+ROUNDS = 50
+
+
+def random_actions(env, rounds):
+    moves = [SARGridWorld.Actions.LEFT, SARGridWorld.Actions.DOWN, SARGridWorld.Actions.UP, SARGridWorld.Actions.RIGHT]
+    return [[moves[i] for i in np.random.randint(0, len(moves), env.num_agents)] for _ in range(rounds)]
+
+
+def main():
+    print(f"{'agents':>7} {'step_agent (steps/s)':>21} {'step_all (steps/s)':>19}")
+    for num_agents in AGENT_COUNTS:
+        options = default_options.copy()
+        options['num_agents'] = num_agents
+        options['num_rescuers'] = num_agents // 5
+        env = SARGridWorld(options)
+        sequential_env = copy.deepcopy(env)
+        rounds = random_actions(env, ROUNDS)
+
+        start = time.perf_counter()
+        for actions in rounds:
+            for agent in sequential_env.agents:
+                sequential_env.step_agent(agent, actions[agent])
+        sequential = num_agents * ROUNDS / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for actions in rounds:
+            env.step_all(actions)
+        batched = num_agents * ROUNDS / (time.perf_counter() - start)
+        print(f"{num_agents:>7} {sequential:>21.0f} {batched:>19.0f}")
+
+
+if __name__ == '__main__':
+    main()
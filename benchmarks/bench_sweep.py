@@ -0,0 +1,29 @@
+""" Benchmark how the parallel sweep runner scales with the number of worker processes
+
+run from the repository root with:
+    python -m benchmarks.bench_sweep
+"""
+import os
+import time
+
+from src.sweep import build_sweep_configs, run_sweep
+
+EPISODES = 16
+MAX_ROUNDS = 200
+
+
+def main():
+    configs = build_sweep_configs(seeds=range(EPISODES), map_files=['./assets/maps/old_maps/strong0_new.npy'])
+    worker_counts = sorted({1, 2, 4, os.cpu_count()})
+    print(f"{'workers':>8} {'episodes/s':>11} {'speedup':>8}")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        results = list(run_sweep(configs, max_workers=workers, max_rounds=MAX_ROUNDS))
+        rate = len(results) / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>11.2f} {rate / baseline:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
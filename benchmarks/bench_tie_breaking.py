@@ -0,0 +1,38 @@
+""" Benchmark picking an action with random tie breaking (once per agent per step in the policies)
+
+run from the repository root with:
+    python -m benchmarks.bench_tie_breaking
+"""
+import time
+import numpy as np
+
+from src import agents
+
+DECISIONS = 100000
+BATCH = 1000
+
+
+def old_random_argmin(array, rng):
+    # the list comprehension recomputes the minimum for every entry
+    return rng.choice([i for i, v in enumerate(array) if v == np.min(array)])
+
+
+def main():
+    rng = np.random.default_rng(0)
+    # visit counts of the four moves, ties are common
+    arrays = rng.integers(0, 3, (DECISIONS, 4))
+    for name, function in [('list comprehension', old_random_argmin), ('vectorized', agents.random_argmin)]:
+        start = time.perf_counter()
+        for array in arrays[:DECISIONS // 10]:
+            function(array, rng)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed / (DECISIONS // 10) * 1e6:.2f}us per decision")
+    start = time.perf_counter()
+    for i in range(0, DECISIONS, BATCH):
+        agents.random_argmin(arrays[i:i + BATCH], rng)
+    elapsed = time.perf_counter() - start
+    print(f"vectorized, {BATCH} rows at once: {elapsed / DECISIONS * 1e6:.3f}us per decision")
+
+
+if __name__ == '__main__':
+    main()
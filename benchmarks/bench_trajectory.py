@@ -0,0 +1,46 @@
+""" Benchmark the cost of recording episodes with TrajectoryRecorder and of replaying them
+
+run from the repository root with:
+    python -m benchmarks.bench_trajectory
+"""
+import os
+import tempfile
+import time
+
+from src.environments import SARGridWorld, default_options
+from src.simulation import Simulation
+from src.trajectory import TrajectoryRecorder, TrajectoryReader, replay_trajectory
+
+ROUNDS = 500
+
+
+def run(options, path=None):
+    env = SARGridWorld(options)
+    recorder = TrajectoryRecorder(path, env) if path is not None else None
+    start = time.perf_counter()
+    Simulation(env).run_simulation(ROUNDS, recorder=recorder)
+    return time.perf_counter() - start
+
+
+def main():
+    options = default_options.copy()
+    options['grid_size'] = 50
+    options['num_agents'] = 50
+    options['num_rescuers'] = 10
+    options['num_victums'] = 10
+    options['seed'] = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'episode')
+        plain = run(options)
+        recorded = run(options, path)
+        size = sum(os.path.getsize(os.path.join(path, file)) for file in os.listdir(path))
+        rounds = TrajectoryReader(path).num_rounds
+        print(f"{ROUNDS} rounds of {options['num_agents']} agents: {plain:.2f}s, {recorded:.2f}s recorded ({(recorded / plain - 1) * 100:.1f}% overhead)")
+        print(f"{rounds} recorded rounds: {size / 1000:.0f}kB on disk ({size / rounds:.0f} bytes per round)")
+        start = time.perf_counter()
+        replay_trajectory(path, {'render_mode': 'rgb_array'})
+        print(f"replay to rgb frames: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+""" Benchmark the sample throughput of VectorSARGridWorld against separate SARGridWorld instances
+
+run from the repository root with:
+    python -m benchmarks.bench_vector_env
+"""
+import time
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+from src.vector_environments import VectorSARGridWorld
+
+BATCH_SIZES = [1, 16, 128, 512]
+STEPS = 50
+GRID_SIZE = 30
+
+
+def random_moves(shape):
+    moves = [SARGridWorld.Actions.LEFT, SARGridWorld.Actions.DOWN, SARGridWorld.Actions.UP, SARGridWorld.Actions.RIGHT]
+    return np.random.choice([action.value for action in moves], shape)
+
+
+def main():
+    options = default_options.copy()
+    options['grid_size'] = GRID_SIZE
+    options['visit_dtype'] = 'uint8'
+    # a single world stepped with step_all is the baseline
+    env = SARGridWorld(options)
+    moves = list(SARGridWorld.action_deltas)
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        env.step_all([moves[i] for i in np.random.randint(0, 4, env.num_agents)])
+    baseline = env.num_agents * STEPS / (time.perf_counter() - start)
+    print(f"single SARGridWorld.step_all: {baseline:.0f} agent-steps/s")
+    print(f"{'worlds':>7} {'agent-steps/s':>14} {'speedup':>8}")
+    for num_envs in BATCH_SIZES:
+        vector_env = VectorSARGridWorld(options, num_envs)
+        actions = [random_moves((num_envs, vector_env.num_agents)) for _ in range(STEPS)]
+        start = time.perf_counter()
+        for step_actions in actions:
+            vector_env.step(step_actions)
+        throughput = num_envs * vector_env.num_agents * STEPS / (time.perf_counter() - start)
+        print(f"{num_envs:>7} {throughput:>14.0f} {throughput / baseline:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+""" Benchmark the memory and time cost of the visit maps across grid sizes and agent counts
+
+run from the repository root with:
+    python -m benchmarks.bench_visit_map
+"""
+import timeit
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+
+GRID_SIZES = [50, 100, 200]
+AGENT_COUNTS = [5, 50, 200]
+DTYPES = ['float64', 'uint16', 'uint8']
+CALLS = 2000
+
+
+def main():
+    print(f"{'grid':>6} {'agents':>7} {'dtype':>8} {'memory (MB)':>12} {'update (us)':>12} {'full sum (us)':>14}")
+    for grid_size in GRID_SIZES:
+        for num_agents in AGENT_COUNTS:
+            for visit_dtype in DTYPES:
+                options = default_options.copy()
+                options['grid_size'] = grid_size
+                options['num_agents'] = num_agents
+                options['visit_dtype'] = visit_dtype
+                env = SARGridWorld(options)
+                memory = env.agent_location_visits.nbytes / 1e6
+                locs = np.random.choice(env.movable_locations, CALLS)
+                agents = np.random.choice(env.agents, CALLS)
+                calls = iter(zip(agents, locs))
+                update = timeit.timeit(lambda: env.update_map_with_visit(*next(calls)), number=CALLS) / CALLS
+                # the cost of re-summing the whole map after every visit (the previous behaviour)
+                sum_calls = 20
+                full_sum = timeit.timeit(lambda: np.sum(env.agent_location_visits, axis=0), number=sum_calls) / sum_calls
+                print(f"{grid_size:>6} {num_agents:>7} {visit_dtype:>8} {memory:>12.2f} {update*1e6:>12.2f} {full_sum*1e6:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+""" Benchmark how the memory of the dense and sparse per-agent visit maps scales with the map
+size and number of agents, along with the time of a round of steps and of clearing an agent
+(rounds are timed while tracing, so only compare their times with each other)
+
+run from the repository root with:
+    python -m benchmarks.bench_visit_memory
+"""
+import time
+import tracemalloc
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+
+GRID_SIZES = [100, 250, 500]
+AGENT_COUNTS = [20, 200]
+# (visit_memory, visit_dtype)
+BACKENDS = [('dense', 'float64'), ('dense', 'uint8'), ('sparse', 'float64')]
+ROUNDS = 200
+
+
+def main():
+    print(f"{'grid':>6} {'agents':>7} {'backend':>15} {'visited (%)':>12} {'traced (MB)':>12} {'nbytes (MB)':>12} {'round (us)':>11} {'reset (us)':>11}")
+    moves = [SARGridWorld.Actions.LEFT, SARGridWorld.Actions.DOWN, SARGridWorld.Actions.UP, SARGridWorld.Actions.RIGHT]
+    for grid_size in GRID_SIZES:
+        for num_agents in AGENT_COUNTS:
+            for visit_memory, visit_dtype in BACKENDS:
+                options = default_options.copy()
+                options['grid_size'] = grid_size
+                options['num_agents'] = num_agents
+                options['num_rescuers'] = num_agents // 5
+                options['seed'] = 0
+                options['visit_memory'] = visit_memory
+                options['visit_dtype'] = visit_dtype
+                env = SARGridWorld(options)
+                rng = np.random.default_rng(0)
+                # rebuild the visit maps while tracing so only their memory (and the episode's garbage) is counted
+                tracemalloc.start()
+                env.agent_location_visits = env.build_agent_location_visits()
+                env.location_visits[env.movable_locations] = 0
+                start = time.perf_counter()
+                for _ in range(ROUNDS):
+                    env.step_all([moves[i] for i in rng.integers(0, len(moves), num_agents)])
+                round_time = (time.perf_counter() - start) / ROUNDS
+                traced = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+                nbytes = env.agent_location_visits.nbytes
+                visits = np.asarray(env.agent_location_visits)[:, env.movable_locations]
+                visited = np.count_nonzero(visits) / visits.size
+                del visits
+                start = time.perf_counter()
+                for agent in env.agents:
+                    env.reset_agent(agent)
+                reset_time = (time.perf_counter() - start) / num_agents
+                backend = f"{visit_memory} {visit_dtype}"
+                print(f"{grid_size:>6} {num_agents:>7} {backend:>15} {visited * 100:>12.2f} {traced / 1e6:>12.2f} "
+                      f"{nbytes / 1e6:>12.2f} {round_time * 1e6:>11.1f} {reset_time * 1e6:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+""" Benchmark branching rollouts with get_state/set_state against copy.deepcopy of the world
+
+run from the repository root with:
+    python -m benchmarks.bench_world_state
+"""
+import copy
+import time
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+
+BRANCHES = 200
+ROLLOUT_ROUNDS = 5
+
+
+def rollout(env, rng):
+    moves = [SARGridWorld.Actions.LEFT, SARGridWorld.Actions.DOWN, SARGridWorld.Actions.UP, SARGridWorld.Actions.RIGHT]
+    for _ in range(ROLLOUT_ROUNDS):
+        env.step_all([moves[i] for i in rng.integers(0, len(moves), env.num_agents)])
+
+
+def main():
+    options = default_options.copy()
+    options['grid_size'] = 200
+    options['num_agents'] = 20
+    options['num_rescuers'] = 5
+    options['num_victums'] = 5
+    options['seed'] = 0
+    env = SARGridWorld(options)
+    rng = np.random.default_rng(0)
+    # get the episode going before branching from it
+    for _ in range(50):
+        rollout(env, rng)
+
+    start = time.perf_counter()
+    for _ in range(BRANCHES):
+        rollout(copy.deepcopy(env), rng)
+    deepcopy_time = time.perf_counter() - start
+
+    root = env.get_state()
+    start = time.perf_counter()
+    states = list()
+    for _ in range(BRANCHES):
+        rollout(env, rng)
+        states.append(env.get_state())
+        env.set_state(root)
+    state_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        env.set_state(env.get_state())
+    save_restore = (time.perf_counter() - start) / 1000
+
+    state_bytes = np.mean([state.arrays.nbytes + state.visits.nbytes for state in states])
+    visit_bytes = env.agent_location_visits.nbytes + env.location_visits.nbytes
+    print(f"{BRANCHES} branches of {ROLLOUT_ROUNDS} rounds: {deepcopy_time:.2f}s with deepcopy, {state_time:.2f}s with get_state/set_state")
+    print(f"get_state + set_state: {save_restore * 1e6:.0f}us")
+    print(f"memory per saved state: {state_bytes / 1000:.1f}kB (the visit maps are {visit_bytes / 1e6:.1f}MB)")
+
+
+if __name__ == '__main__':
+    main()
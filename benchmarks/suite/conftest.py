@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from src.environments import SARGridWorld, default_options
+from src.map_factory import ImageGridFactory
+
+MAP_FILES = {
+    'strong0': './assets/maps/old_maps/strong0_new.npy',
+    '6_rooms_obstructed': './assets/maps/unreal_maps/6_rooms_obstructed/clean_dialated_resized.png',
+}
+# open grids of several sizes and the maps (whose size comes from the map)
+WORLDS = ['open_20', 'open_100', 'open_500', 'strong0', '6_rooms_obstructed']
+AGENT_COUNTS = [5, 100, 1000]
+# combinations whose (uint8) per-agent visit maps need more memory are skipped
+MAX_VISIT_MAP_BYTES = 400 * 10**6
+
+
+def world_options(world, num_agents, **options):
+    """ Build the options of a seeded world from its name in WORLDS """
+    options = {**default_options, 'seed': 0, 'num_agents': num_agents, 'num_rescuers': max(num_agents // 5, 1), 'num_victums': 5, 'visit_dtype': 'uint8', **options}
+    if world.startswith('open_'):
+        options['grid_size'] = int(world[len('open_'):])
+    else:
+        options['map_file'] = MAP_FILES[world]
+        options['grid_size'] = ImageGridFactory.load_grid(options['map_file'], options['scout_visible_range']).shape[0]
+    # every agent has its own visit map
+    if num_agents * options['grid_size'] ** 2 > MAX_VISIT_MAP_BYTES:
+        pytest.skip(f"the visit maps of {num_agents} agents on {world} need more than {MAX_VISIT_MAP_BYTES // 10**6}MB")
+    return options
+
+
+def record_steps_per_second(benchmark, steps_per_call):
+    # regressions are compared on time, the steps per second make the report easier to read
+    # (there are no stats when benchmarking is disabled, e.g. a quick --benchmark-disable smoke run)
+    if benchmark.stats is None:
+        return
+    benchmark.extra_info['steps_per_second'] = steps_per_call / benchmark.stats.stats.mean
+
+
+@pytest.fixture(params=WORLDS)
+def world(request):
+    return request.param
+
+
+@pytest.fixture(params=AGENT_COUNTS)
+def num_agents(request):
+    return request.param
+
+
+@pytest.fixture
+def env(world, num_agents):
+    env = SARGridWorld(world_options(world, num_agents))
+    # some visits and known victums so the policies have something to work with
+    movable = env.movable_locations
+    env.location_visits[movable] = env.rng.integers(0, 5, len(movable))
+    env.known_victum_locations[:] = np.where(env.rng.random(env.known_victum_locations.shape) < 0.5, env.victum_locations, -1)
+    return env
@@ -0,0 +1,18 @@
+""" Benchmarks of the agent policies over grid sizes, maps and agent counts """
+from src.agents import ScoutAgent, RescueAgent
+
+from conftest import record_steps_per_second
+
+
+def bench_scout_policy(benchmark, env):
+    agent = ScoutAgent(env=env, rng=0)
+    observations = [env.get_observation_for_agent(i) for i in env.scouts]
+    benchmark(lambda: [agent.policy(obs) for obs in observations])
+    record_steps_per_second(benchmark, len(observations))
+
+
+def bench_rescue_policy(benchmark, env):
+    agent = RescueAgent(env=env, rng=0)
+    observations = [env.get_observation_for_agent(i) for i in env.rescuers]
+    benchmark(lambda: [agent.policy(obs) for obs in observations])
+    record_steps_per_second(benchmark, len(observations))
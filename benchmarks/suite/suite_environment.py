@@ -0,0 +1,42 @@
+""" Benchmarks of the SARGridWorld hot paths over grid sizes, maps and agent counts """
+from src.environments import SARGridWorld
+
+from conftest import record_steps_per_second
+
+
+def bench_cells_in_range(benchmark, env):
+    agents = env.agents
+    benchmark(lambda: [env.cells_in_range(agent) for agent in agents])
+    record_steps_per_second(benchmark, len(agents))
+
+
+def bench_agents_in_range(benchmark, env):
+    agents = env.agents
+    benchmark(lambda: [env.agents_in_range(agent) for agent in agents])
+    record_steps_per_second(benchmark, len(agents))
+
+
+def bench_update_map_with_visit(benchmark, env):
+    agents, locs = env.agents, env.agent_locations.copy()
+
+    def clear_visits():
+        # every timed visit increments the maps (cells at max_pheromone return early)
+        env.agent_location_visits = env.build_agent_location_visits()
+        env.location_visits[env.movable_locations] = 0
+
+    benchmark.pedantic(lambda: [env.update_map_with_visit(agent, loc) for agent, loc in zip(agents, locs)], setup=clear_visits, rounds=200)
+    record_steps_per_second(benchmark, len(agents))
+
+
+def bench_step_agent(benchmark, env):
+    moves = [SARGridWorld.Actions.LEFT, SARGridWorld.Actions.DOWN, SARGridWorld.Actions.UP, SARGridWorld.Actions.RIGHT]
+    actions = [moves[i] for i in env.rng.integers(0, len(moves), env.num_agents)]
+    benchmark(lambda: [env.step_agent(agent, actions[agent]) for agent in env.agents])
+    record_steps_per_second(benchmark, env.num_agents)
+
+
+def bench_step_all(benchmark, env):
+    moves = [SARGridWorld.Actions.LEFT, SARGridWorld.Actions.DOWN, SARGridWorld.Actions.UP, SARGridWorld.Actions.RIGHT]
+    actions = [moves[i] for i in env.rng.integers(0, len(moves), env.num_agents)]
+    benchmark(env.step_all, actions)
+    record_steps_per_second(benchmark, env.num_agents)
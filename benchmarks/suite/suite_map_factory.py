@@ -0,0 +1,38 @@
+""" Benchmarks of loading maps with ImageGridFactory (from the loaded maps, the disk cache and the map file) """
+import pytest
+
+from src import map_factory
+from src.map_factory import ImageGridFactory
+
+from conftest import MAP_FILES
+
+
+@pytest.fixture(params=list(MAP_FILES))
+def map_file(request):
+    return MAP_FILES[request.param]
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    # an empty disk cache for each benchmark
+    saved_dir = map_factory.MAP_CACHE_DIR
+    map_factory.MAP_CACHE_DIR = str(tmp_path)
+    map_factory._loaded_maps.clear()
+    yield tmp_path
+    map_factory.MAP_CACHE_DIR = saved_dir
+    map_factory._loaded_maps.clear()
+
+
+def bench_load_grid_loaded(benchmark, map_file, cache_dir):
+    ImageGridFactory.load_grid(map_file, 2)
+    benchmark(ImageGridFactory.load_grid, map_file, 2)
+
+
+def bench_load_grid_disk_cache(benchmark, map_file, cache_dir):
+    ImageGridFactory.load_grid(map_file, 2)
+    benchmark.pedantic(ImageGridFactory.load_grid, (map_file, 2), setup=map_factory._loaded_maps.clear, rounds=20)
+
+
+def bench_load_grid_uncached(benchmark, map_file, cache_dir):
+    map_factory.MAP_CACHE_DIR = None
+    benchmark.pedantic(ImageGridFactory.load_grid, (map_file, 2), setup=map_factory._loaded_maps.clear, rounds=5)
@@ -0,0 +1,20 @@
+""" Benchmarks of whole episodes with Simulation.run_simulation """
+import pytest
+
+from src.environments import SARGridWorld
+from src.simulation import Simulation
+
+from conftest import WORLDS, world_options, record_steps_per_second
+
+ROUNDS = 50
+
+
+@pytest.mark.parametrize('num_agents', [5, 100])
+@pytest.mark.parametrize('world', WORLDS)
+def bench_run_simulation(benchmark, world, num_agents):
+    options = world_options(world, num_agents)
+    def setup():
+        # a fresh (seeded) episode each round
+        return (Simulation(SARGridWorld(options)), ), dict()
+    stats = benchmark.pedantic(lambda simulation: simulation.run_simulation(ROUNDS), setup=setup, rounds=3)
+    record_steps_per_second(benchmark, stats['rounds'] * num_agents)
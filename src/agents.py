@@ -3,25 +3,58 @@ import math
 import numpy as np
 from src.environments import SARGridWorld, default_options
 
+def pick_tie(ties: np.array, uniforms):
+    """ Pick one of the True entries of each row with uniform draws
+
+    Args:
+        ties (np.array): boolean mask with at least one True (per row), 1d or 2d (one pick per row)
+        uniforms (float or np.array): a draw in [0, 1) (for each row)
+    Returns:
+        (int or np.array): the index of the picked entry (of each row)
+    """
+    if ties.ndim == 1:
+        indices = ties.nonzero()[0]
+        return int(indices[int(uniforms * len(indices))])
+    counts = np.count_nonzero(ties, axis=-1)
+    # the k-th tie (k = the draw scaled by the number of ties) is the first with a running count above k
+    picks = (uniforms * counts).astype(np.int64)
+    return np.argmax(np.cumsum(ties, axis=-1) > picks[:, None], axis=-1)
+
+
+def random_argmax(array, rng: np.random.Generator):
+    """ Argmax along the last axis which breaks ties at random (1d input gives an int, 2d one index per row) """
+    array = np.asarray(array)
+    ties = array == array.max(axis=-1, keepdims=True)
+    return pick_tie(ties, rng.random() if ties.ndim == 1 else rng.random(len(ties)))
+
+
+def random_argmin(array, rng: np.random.Generator):
+    """ Argmin along the last axis which breaks ties at random (1d input gives an int, 2d one index per row) """
+    array = np.asarray(array)
+    ties = array == array.min(axis=-1, keepdims=True)
+    return pick_tie(ties, rng.random() if ties.ndim == 1 else rng.random(len(ties)))
+
+
 class Agent:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, rng=None) -> None:
+        # ties are broken with the agent's own generator (a seed or np.random.Generator, see SARGridWorld.agent_rng)
+        self.rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
 
     def random_argmax(self, array):
-        return np.random.choice([i for i, v in enumerate(array) if v == np.max(array)])
+        return random_argmax(array, self.rng)
 
     def random_argmin(self, array):
-        return np.random.choice([i for i, v in enumerate(array) if v == np.min(array)])
+        return random_argmin(array, self.rng)
 
 
 class RLAgent(Agent):
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, rng=None) -> None:
+        super().__init__(rng)
 
 
 class ScoutAgent(Agent):
-    def __init__(self, actions=None, env=None) -> None:
-        super().__init__()
+    def __init__(self, actions=None, env=None, rng=None) -> None:
+        super().__init__(rng)
         #'LEFT', 'DOWN', 'UP', 'RIGHT', 'COMMUNICATE'
         self.A = env.get_scout_actions()
         self.env = env
@@ -63,9 +96,69 @@ class ScoutAgent(Agent):
         nearby_visits = np.array([visited[left], visited[down], visited[up], visited[right]])
         return nearby_visits
 
+class BatchScoutPolicy:
+    """ The scout policy for many scouts (and worlds) at once
+
+    Every scout moves to its least visited neighbouring cell (ties broken at random) like
+    ScoutAgent.policy, but the four neighbouring visit counts of every scout are read from the
+    visit map with one gather and the ties are broken with one draw per scout. With the same
+    generator the choices are the same as calling ScoutAgent.policy for each scout in order
+    (scouts never communicate, see ScoutAgent.should_communicate).
+    """
+
+    def __init__(self, env, rng=None) -> None:
+        """
+        Args:
+            env (GridWorld): the world (or batch of worlds) the scouts are in
+            rng (int or np.random.Generator): the generator ties are broken with (or its seed)
+        """
+        self.rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        self.A = np.array(env.get_scout_actions()[:4])
+        self.grid_size = env.grid_size
+        # 1d offsets of the cells LEFT, DOWN, UP and RIGHT of a location
+        self.offsets = np.array([dx + dy * env.grid_size for dx, dy in env.movement_deltas])
+
+    def get_action_visit_counts(self, location_visits, locs):
+        """ Get the visit counts of the cells next to each scout
+
+        Args:
+            location_visits (np.array): the visit map, shape (num_cells,) or (num_envs, num_cells)
+            locs (np.array): the 1d scout locations, shape (num_scouts,) or (num_envs, num_scouts)
+        Returns:
+            (np.array): the visits LEFT, DOWN, UP and RIGHT of each scout (inf off the grid), shape locs.shape + (4,)
+        """
+        location_visits = np.asarray(location_visits)
+        locs = np.asarray(locs)
+        num_cells = location_visits.shape[-1]
+        cells = locs[..., None] + self.offsets
+        x = locs % self.grid_size
+        off_grid = (cells < 0) | (cells >= num_cells)
+        off_grid[..., 0] |= x == 0
+        off_grid[..., 3] |= x == self.grid_size - 1
+        cells = np.where(off_grid, 0, cells)
+        if location_visits.ndim == 1:
+            visits = location_visits[cells]
+        else:
+            visits = np.take_along_axis(location_visits, cells.reshape(len(cells), -1), axis=-1).reshape(cells.shape)
+        return np.where(off_grid, np.inf, visits)
+
+    def moves(self, location_visits, locs) -> np.array:
+        """ Choose the move (index into LEFT, DOWN, UP, RIGHT) of every scout, see get_action_visit_counts """
+        counts = self.get_action_visit_counts(location_visits, locs)
+        return random_argmin(counts.reshape(-1, 4), self.rng).reshape(counts.shape[:-1])
+
+    def policy(self, location_visits, locs) -> np.array:
+        """ Choose the action of every scout, see get_action_visit_counts
+
+        Returns:
+            (np.array): the Actions of the scouts, shaped like locs
+        """
+        return self.A[self.moves(location_visits, locs)]
+
+
 class RescueAgent(ScoutAgent):
-    def __init__(self, actions=np.arange(0,6), env=None) -> None:
-        super().__init__(actions, env)
+    def __init__(self, actions=np.arange(0,6), env=None, rng=None) -> None:
+        super().__init__(actions, env, rng)
         self.A = env.get_rescuer_actions()
     
     #obs = agent_i, self.agent_locations, suggested_locs, visited_locs, carrying, self.goals
@@ -97,32 +190,134 @@ class RescueAgent(ScoutAgent):
 
 
     def get_victum_distances(self, loc, victum_locations):
+        # shortest path distances around the walls (estimated with the room graph if there is one)
+        room_graph = getattr(self.env, 'room_graph', None)
         vic_dists = np.zeros(len(victum_locations))
         for i, vic_loc in enumerate(victum_locations):
-            dist = self.env.manhatten_distance(vic_loc, loc)
-            vic_dists[i] = dist
+            if room_graph is not None:
+                vic_dists[i] = room_graph.distance(loc, vic_loc)
+            else:
+                vic_dists[i] = self.env.distance_field(vic_loc)[int(loc)]
         return vic_dists
 
 
     def get_action_distances_to_target(self, loc, target):
-        loc = self.env.convert_loc_to_2d(loc)
-        grid_size = self.env.grid_size
-
-        left_loc = np.add(loc, [-1,0])
-        down_loc = np.add(loc, [0,1])
-        up_loc = np.add(loc, [0,-1])
-        right_loc = np.add(loc, [1,0])
-
-        act_distances = np.empty(4)
-        for i, loc_2d in enumerate([left_loc, down_loc, up_loc, right_loc]):
-            loc_1d = self.env.convert_loc_from_2d(loc_2d[0], loc_2d[1])
-            if loc_2d[0] >= 0 and loc_2d[0] < grid_size and loc_2d[1] >= 0 and loc_2d[1] < grid_size:
-                dist = self.env.manhatten_distance(loc_1d, target)
-                act_distances[i] = dist
-            else:
-                act_distances[i] = np.inf
-        return np.array(act_distances)
+        # shortest path distance to the target after each move (LEFT, DOWN, UP, RIGHT),
+        # moves blocked by walls or edges are never chosen
+        room_graph = getattr(self.env, 'room_graph', None)
+        if room_graph is not None:
+            return room_graph.action_distances(loc, target)
+        loc = int(loc)
+        next_locs = self.env.transitions[loc]
+        act_distances = self.env.distance_field(target)[next_locs].astype(float)
+        return np.where(next_locs == loc, np.inf, act_distances)
+
+
+class BatchRescuePolicy:
+    """ The rescuer policy for many rescuers (and worlds) at once
+
+    Makes the same decisions as RescueAgent.policy: carrying rescuers drop off at a goal or
+    move towards the first goal, the others pick up or move towards their closest known victum
+    (away from the goals) and scout without one. The distances from every rescuer to every
+    known victum are looked up with one distance field per distinct victum location, and the
+    closest victums and moves are chosen with row-wise tie breaking. Each rescuer uses as
+    many draws as RescueAgent.policy does, in the same order, so with the same generator the
+    choices are the same as calling RescueAgent.policy for each rescuer in turn.
+    """
+
+    def __init__(self, env, rng=None) -> None:
+        """
+        Args:
+            env (GridWorld): the world (or batch of worlds) the rescuers are in
+            rng (int or np.random.Generator): the generator ties are broken with (or its seed)
+        """
+        self.rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        self.env = env
+        self.A = np.array(env.get_rescuer_actions())
+        self.scout_policy = BatchScoutPolicy(env, self.rng)
+
+    def policy(self, locs, known_victum_locations, carrying, location_visits) -> np.array:
+        """ Choose the action of every rescuer
+
+        Args:
+            locs (np.array): the 1d rescuer locations, shape (num_rescuers,) or (num_envs, num_rescuers)
+            known_victum_locations (np.array): the victum locations each rescuer knows (-1 if unknown),
+                                               shape locs.shape + (num_victums,)
+            carrying (np.array): whether each rescuer is carrying a victum, shaped like locs
+            location_visits (np.array): the visit map, shape (num_cells,) or (num_envs, num_cells)
+        Returns:
+            (np.array): the Actions of the rescuers, shaped like locs
+        """
+        shape = np.shape(locs)
+        goals = self.env.goals
+        locs = np.asarray(locs).ravel()
+        known = np.asarray(known_victum_locations).reshape(len(locs), -1)
+        carrying = np.asarray(carrying).ravel()
+        at_goal = np.isin(locs, goals)
+        possible = (known >= 0) & ~np.isin(known, goals)
+        dropping_off = carrying & at_goal
+        returning = carrying & ~at_goal
+        hunting = ~carrying & np.any(possible, axis=1)
+        scouting = ~carrying & ~hunting
+        # distances to the known victums (inf for the victums a rescuer doesn't consider)
+        victum_distances = np.full(known.shape, np.inf)
+        for vic_loc in np.unique(known[possible]):
+            rows, columns = np.nonzero(possible & (known == vic_loc))
+            victum_distances[rows, columns] = self.get_victum_distances(locs[rows], vic_loc)
+        closest_distances = np.min(victum_distances, axis=1)
+        picking_up = hunting & (closest_distances == 0)
+        # draw like the per agent policy: one draw to choose between tied victums or moves and
+        # a second one to choose the move towards the chosen victum
+        num_draws = (~dropping_off).astype(int) + (hunting & ~picking_up)
+        uniforms = self.rng.random(np.sum(num_draws))
+        first_draws = np.zeros(len(locs))
+        second_draws = np.zeros(len(locs))
+        offsets = np.cumsum(num_draws) - num_draws
+        first_draws[num_draws > 0] = uniforms[offsets[num_draws > 0]]
+        second_draws[num_draws > 1] = uniforms[offsets[num_draws > 1] + 1]
+
+        actions = np.empty(len(locs), dtype=object)
+        actions[dropping_off] = SARGridWorld.Actions.DROPOFF
+        actions[picking_up] = SARGridWorld.Actions.PICKUP
+        targets = np.full(len(locs), -1)
+        targets[returning] = goals[0]
+        if np.any(hunting):
+            ties = possible[hunting] & (victum_distances[hunting] == closest_distances[hunting, None])
+            closest = pick_tie(ties, first_draws[hunting])
+            targets[hunting] = known[hunting][np.arange(len(closest)), closest]
+        moving = returning | (hunting & ~picking_up)
+        if np.any(moving):
+            action_distances = self.get_action_distances_to_targets(locs[moving], targets[moving])
+            ties = action_distances == np.min(action_distances, axis=1, keepdims=True)
+            actions[moving] = self.A[pick_tie(ties, np.where(returning, first_draws, second_draws)[moving])]
+        if np.any(scouting):
+            visit_counts = self.scout_policy.get_action_visit_counts(location_visits, locs.reshape(shape)).reshape(len(locs), 4)[scouting]
+            ties = visit_counts == np.min(visit_counts, axis=1, keepdims=True)
+            actions[scouting] = self.A[pick_tie(ties, first_draws[scouting])]
+        return actions.reshape(shape)
 
+    def get_victum_distances(self, locs, victum_location) -> np.array:
+        # shortest path distances from many locations to one victum (see RescueAgent.get_victum_distances)
+        room_graph = getattr(self.env, 'room_graph', None)
+        if room_graph is not None:
+            return np.array([room_graph.distance(loc, victum_location) for loc in locs])
+        return self.env.distance_field(victum_location)[locs]
 
-            
+    def get_action_distances_to_targets(self, locs, targets) -> np.array:
+        """ Distances to each target after moving LEFT, DOWN, UP, and RIGHT (inf for blocked moves)
 
+        Args:
+            locs (np.array): the 1d locations
+            targets (np.array): the 1d target of each location
+        Returns:
+            (np.array): shape (len(locs), 4)
+        """
+        room_graph = getattr(self.env, 'room_graph', None)
+        if room_graph is not None:
+            return np.array([room_graph.action_distances(loc, target) for loc, target in zip(locs, targets)]).reshape(len(locs), 4)
+        next_locs = self.env.transitions[locs]
+        act_distances = np.empty(next_locs.shape)
+        for target in np.unique(targets):
+            rows = targets == target
+            act_distances[rows] = self.env.distance_field(target)[next_locs[rows]]
+        return np.where(next_locs == locs[:, None], np.inf, act_distances)
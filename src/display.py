@@ -2,15 +2,30 @@ import numpy as np
 from enum import Enum
 import time
 
-import pygame
 import math
+import cv2
+
+from src.video import FrameWriter
+
+# pygame is only imported once a display is created (so headless runs never load it)
+pygame = None
 
 default_options = {
     'screen_size': 100,
     'render_mode': None,
-    'render_delay': 0 # in seconds
+    'render_delay': 0, # in seconds
+    'frame_size': None, # (width, height) of rgb_array frames (None for one pixel per cell)
+    'video_file': None, # video file (.avi or .mp4) or image directory which rgb_array frames are written to
+    'video_fps': 30
 }
 
+def import_pygame():
+    global pygame
+    if pygame is None:
+        import pygame as pygame_module
+        pygame = pygame_module
+    return pygame
+
 # color
 WHITE = (255, 255, 255)
 BLACK = (0,0,0)
@@ -19,7 +34,86 @@ YELLOW = (255, 255, 0)
 PURPLE = (255, 0, 255)
 BLUE = (0, 0, 255)
 GREEN = (0, 255, 0)
-   
+
+
+def grey_scale_for_visit_counts(visit_counts):
+    """ Vectorized version of DisplayVisitor.grey_scale_for_visit_count
+
+    Args:
+        visit_counts (np.array): visit counts of the cells
+    Returns:
+        (np.array): grey levels (0 to 255) which get darker with more visits
+    """
+    visited = (visit_counts > 0) & (visit_counts < 255)
+    grey_scale = np.where(visited, 255 - np.where(visited, visit_counts, 0) * 10, 255)
+    return np.clip(grey_scale, 0, 255).astype(np.uint8)
+
+
+def grid_frame(env):
+    """ Build an image of the grid directly from the environment arrays (without pygame)
+
+    Args:
+        env (SARGridWorld): the environment to draw
+    Returns:
+        (np.array): an rgb image with one pixel per cell, shape (grid_size, grid_size, 3)
+    """
+    # walls are black and spaces are grey depending on how often they've been visited
+    pixels = np.zeros((len(env.world), 3), dtype=np.uint8)
+    movable = env.movable_locations
+    pixels[movable] = grey_scale_for_visit_counts(env.location_visits[movable])[:, None]
+    # draw the goals, victums, and agents (in that order so agents are on top)
+    pixels[env.goals] = GREEN
+    pixels[env.victum_locations] = RED
+    pixels[env.agent_locations[env.scouts]] = YELLOW
+    carrying = env.agents_carrying_victum[env.rescuers] >= 0
+    pixels[env.agent_locations[env.rescuers[~carrying]]] = BLUE
+    pixels[env.agent_locations[env.rescuers[carrying]]] = PURPLE
+    return pixels.reshape(env.grid_size, env.grid_size, 3)
+
+
+class FrameVisitor:
+    """ Draws the grid into numpy frames instead of a window (render_mode 'rgb_array'),
+    optionally streaming every frame to a video file
+    """
+
+    def __init__(self, options) -> None:
+        self.unpack_options(options)
+        self.frame = None
+        self.writer = None
+        if self.video_file is not None:
+            self.writer = FrameWriter(self.video_file, self.video_fps)
+
+    def unpack_options(self, options):
+        # apply all dictionary key-values as object properties (missing options use the defaults)
+        options = {**default_options, **options}
+        for option in options:
+            setattr(self, option, options[option])
+
+    def stop_simulation(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    def visit(self, env):
+        self.frame = self.render_frame(env)
+        if self.writer is not None:
+            self.writer.write(self.frame)
+
+    def render_frame(self, env):
+        """ Draw the grid as an rgb image resized to frame_size
+
+        Args:
+            env (SARGridWorld): the environment to draw
+        Returns:
+            (np.array): an rgb image of shape (height, width, 3)
+        """
+        frame = grid_frame(env)
+        if self.frame_size is not None and tuple(self.frame_size) != (env.grid_size, env.grid_size):
+            # nearest keeps cells crisp when scaling up, area averages cells when scaling down
+            upscaling = self.frame_size[0] >= env.grid_size
+            interpolation = cv2.INTER_NEAREST if upscaling else cv2.INTER_AREA
+            frame = cv2.resize(frame, tuple(self.frame_size), interpolation=interpolation)
+        return frame
+
 
 class DisplayVisitor:
     Actions = Enum('Actions', ['LEFT', 'DOWN', 'UP', 'RIGHT', 'COMMUNICATE', 'REASSESS', 'PICKUP', 'DROPOFF'])
@@ -45,10 +139,16 @@ class DisplayVisitor:
     
     def init_pygame(self):
         # setup screen
+        import_pygame()
         pygame.init()
         self.grid2screen = self.screen_size / self.grid_size
         self.screen = pygame.display.set_mode((self.screen_size * 2.5, self.screen_size))
         pygame.display.set_caption('Grid World')
+        # fonts are slow to load so only load one
+        self.font = pygame.font.Font('freesansbold.ttf', 10)
+        # the grid is drawn one pixel per cell then scaled up to the screen
+        self.grid_surface = pygame.Surface((self.grid_size, self.grid_size))
+        self.scaled_grid_surface = pygame.Surface((self.screen_size, self.screen_size))
 
 
     def visit(self, env):
@@ -59,25 +159,11 @@ class DisplayVisitor:
     def render_grid(self, env):
         # fill the display buffor on the screen
         self.screen.fill(BLACK)
-        # draw the empty spaces
-        for space in env.movable_locations:
-            visit_count = int(env.location_visits[space])
-            grey_color = self.grey_scale_for_visit_count(visit_count)
-            self.draw_color_at_cell(env, grey_color, space)
-        # draw the agents, victums, and goals in the display buffer
-        for goal in env.goals:
-            self.draw_color_at_cell(env, GREEN, goal)
-        for victum_loc in env.victum_locations:
-            self.draw_color_at_cell(env, RED, victum_loc)
-        for scout_i in env.scouts:
-            loc = env.agent_locations[scout_i]
-            self.draw_color_at_cell(env, YELLOW, loc)
-        for rescuer_i in env.rescuers:
-            loc = env.agent_locations[rescuer_i]
-            if env.agents_carrying_victum[rescuer_i] >= 0:
-                self.draw_color_at_cell(env, PURPLE, loc)
-            else:
-                self.draw_color_at_cell(env, BLUE, loc)
+        # upload the grid image (surfarray is indexed by x then y) and scale it to the screen
+        frame = grid_frame(env)
+        pygame.surfarray.blit_array(self.grid_surface, frame.transpose(1, 0, 2))
+        pygame.transform.scale(self.grid_surface, self.scaled_grid_surface.get_size(), self.scaled_grid_surface)
+        self.screen.blit(self.scaled_grid_surface, (0, 0))
         
     def render_perception_data(self, env):
         i = 0
@@ -140,7 +226,8 @@ class DisplayVisitor:
     def grey_scale_for_visit_count(self, visit_count):
         grey_scale = 255
         if visit_count > 0 and visit_count < 255:
-            grey_scale = 255 - visit_count*10 
+            # cells visited more than 25 times are drawn black
+            grey_scale = max(255 - visit_count*10, 0)
         return (grey_scale, grey_scale, grey_scale)
 
     def draw_color_at_cell(self, env, color, loc):
@@ -161,8 +248,7 @@ class DisplayVisitor:
 
     def draw_text_at_position(self, text: str, x: int, y: int):
         # create a text surface object,
-        font = pygame.font.Font('freesansbold.ttf', 10)
-        text = font.render(text, True, GREEN, BLACK)
+        text = self.font.render(text, True, GREEN, BLACK)
         textRect = text.get_rect()
         textRect.center = x, y
         # draw the text to the screen
@@ -1,10 +1,17 @@
 import numpy as np
 from enum import Enum
+from collections import OrderedDict
 import time
 
 import math
 from src.map_factory import ImageGridFactory, SimpleGridFactory
-from src.display import DisplayVisitor
+from src.display import DisplayVisitor, FrameVisitor
+from src.occupancy import OccupancyIndex
+from src.room_graph import RoomGraph
+from src.scenarios import ScenarioSampler
+from src.profiling import StepProfiler
+from src.world_state import VisitJournal, WorldState
+from src.visit_memory import visit_memories
 
 default_options = {
     'screen_size': 100,
@@ -16,8 +23,23 @@ default_options = {
     'scout_visible_range': 2,
     'rescuer_visible_range': 1,
     'max_pheromone': 10,
+    'seed': None, # int, np.random.SeedSequence or np.random.Generator for reproducible worlds (None for fresh entropy)
+    'visit_dtype': 'float64', # dtype of the per-agent visit maps (e.g. 'uint8' or 'uint16' to save memory)
+    'visit_memory': 'dense', # 'dense' array or 'sparse' dict of visited cells per agent (for large maps, see src/visit_memory.py)
+    'max_distance_fields': 8, # shortest path distance fields (one per target cell) kept by each world
+    'room_graph_file': None, # gexf room graph of the map (e.g. Map0.gexf) used by rescuers to plan long paths
+    'accident_file': None, # gaussian accident centers of the map (gau_locs.mat) where victums are placed, needs scipy
+    'accident_sigma': 4, # spread of the accident gaussians in pixels of the 256x256 maps
+    'preallocate_observations': False, # fill each agent's observation buffers in place instead of building new arrays every step
+    'read_only_observations': False, # return read only views so the environment state can't be changed through observations
+    'profile': False, # time the phases of each step (see src/profiling.py), off costs nothing
+    'profile_file': None, # .json (json lines) or .csv file the episode profiles are appended to
     'render_mode': None,
-    'render_delay': 0 # in seconds
+    'render_interval': 1, # agent steps between frames (or 'round' to draw once per round of agent steps)
+    'render_delay': 0, # in seconds
+    'frame_size': None, # (width, height) of 'rgb_array' frames (None for one pixel per cell)
+    'video_file': None, # video file (.avi or .mp4) or image directory that 'rgb_array' frames are streamed to
+    'video_fps': 30
 }
 
 """
@@ -27,7 +49,33 @@ TODO add descriptions to each class/function
 TODO implement adjustable scout and rescuer speeds
 """
 
+# diamond shaped offset stencils shared by every world, keyed by (grid_size, visible_range)
+_range_stencils = dict()
+
 class GridWorld:
+    # change in x and y for each column of the transition table (LEFT, DOWN, UP, RIGHT)
+    movement_deltas = [(-1, 0), (0, 1), (0, -1), (1, 0)]
+
+    def unpack_options(self, options):
+        # apply all dictionary key-values as object properties (missing options use the defaults)
+        options = {**default_options, **options}
+        for option in options:
+            setattr(self, option, options[option])
+
+    def initialize_rng(self):
+        """ Create the world's random generator from the seed option along with independent
+        child seed sequences for each agent (so agent streams don't depend on the world's draws)
+        """
+        if isinstance(self.seed, np.random.Generator):
+            self.rng = self.seed
+        else:
+            self.rng = np.random.default_rng(self.seed)
+        # spawned children get distinct spawn keys so they never overlap with the parent or each other
+        self.agent_seed_sequences = self.rng.bit_generator.seed_seq.spawn(self.num_agents)
+
+    def agent_rng(self, agent_i):
+        """ Get a new random generator for an agent's policy (the same for every world built with the same seed) """
+        return np.random.default_rng(self.agent_seed_sequences[agent_i])
 
     def build_grid(self):
         # by default create a grid world of the appropriate size
@@ -39,17 +87,106 @@ class GridWorld:
             grid = SimpleGridFactory.load_grid(self.grid_size, self.scout_visible_range)
         return grid
 
+    def find_movable_locations(self, grid):
+        # maps loaded from files have their movable locations cached with the grid
+        if self.map_file is not None:
+            return ImageGridFactory.load_movable_locations(self.map_file, self.scout_visible_range)
+        return np.nonzero(grid)[0]
+
+    def build_transition_table(self):
+        """ Find the cell reached by each movement from every cell, so moving is a single lookup
+
+        Moves into walls or off the edge of the grid leave the agent in the same cell.
+
+        Returns:
+            (np.array): read only destination cells of shape (num_cells, 4), see movement_deltas
+        """
+        num_cells = len(self.world)
+        cells = np.arange(num_cells, dtype=np.int32 if num_cells < np.iinfo(np.int32).max else np.int64)
+        x, y = cells % self.grid_size, cells // self.grid_size
+        table = np.repeat(cells[:, None], len(self.movement_deltas), axis=1)
+        for column, (dx, dy) in enumerate(self.movement_deltas):
+            new_x, new_y = x + dx, y + dy
+            inside = (new_x >= 0) & (new_x < self.grid_size) & (new_y >= 0) & (new_y < self.grid_size)
+            destinations = cells[inside] + dy * self.grid_size + dx
+            movable = self.world[destinations] != 0
+            table[np.nonzero(inside)[0][movable], column] = destinations[movable]
+        table.setflags(write=False)
+        return table
+
+    def distance_field(self, target):
+        """ Get the shortest path distance (in moves around walls) from every cell to a target cell
+
+        Fields are computed with a breadth first search the first time a target is used and the
+        most recently used max_distance_fields are kept (walls never change so they stay valid).
+
+        Args:
+            target (int): the 1d location of the target
+        Returns:
+            (np.array): read only float32 distances, inf for cells which can't reach the target
+        """
+        target = int(target)
+        if target in self.distance_fields:
+            self.distance_fields.move_to_end(target)
+            return self.distance_fields[target]
+        distances = np.full(len(self.world), np.inf, dtype=np.float32)
+        distances[target] = 0
+        # expand one move at a time from the cells reached by the previous move
+        frontier = np.array([target])
+        distance = 0
+        while len(frontier) > 0:
+            distance += 1
+            neighbors = self.transitions[frontier].ravel()
+            # only the unreached neighbors need sorting to drop cells reached from two sides
+            frontier = np.unique(neighbors[np.isinf(distances[neighbors])])
+            distances[frontier] = distance
+        distances.setflags(write=False)
+        self.distance_fields[target] = distances
+        if len(self.distance_fields) > self.max_distance_fields:
+            self.distance_fields.popitem(last=False)
+        return distances
+
     def cells_in_range(self, agent_i):
+        """ Get the cells within manhatten distance of an agent's visible range
+
+        Args:
+            agent_i (int): the id of the agent
+        Returns:
+            (np.array): the 1d locations of the visible cells in row-major order
+        """
         # get the agent location
         agent_loc = self.agent_locations[agent_i]
-        # test for cells within range then add them to list
-        cells_in_range = list()
         visible_range = self.rescuer_visible_range if agent_i in self.rescuers else self.scout_visible_range
-        for loc, occupied in enumerate(self.world):
-            dist = self.manhatten_distance(loc, agent_loc)
-            if dist <= visible_range:
-                cells_in_range.append(loc)
-        return cells_in_range
+        dx, dy, offsets = self.range_stencil(visible_range)
+        x, y = self.convert_loc_to_2d(agent_loc)
+        # the whole diamond fits on the grid so no clipping is needed
+        if visible_range <= x < self.grid_size - visible_range and visible_range <= y < self.grid_size - visible_range:
+            return agent_loc + offsets
+        # otherwise drop the cells which fall off the edges of the grid
+        new_x = x + dx
+        new_y = y + dy
+        in_bounds = (new_x >= 0) & (new_x < self.grid_size) & (new_y >= 0) & (new_y < self.grid_size)
+        return agent_loc + offsets[in_bounds]
+
+    def range_stencil(self, visible_range):
+        """ Get the (cached) offsets of every cell in a diamond of the given range
+
+        Args:
+            visible_range (int): the manhatten radius of the diamond
+        Returns:
+            (tuple): x offsets, y offsets and 1d offsets in row-major order
+        """
+        key = (self.grid_size, visible_range)
+        if key not in _range_stencils:
+            dy, dx = np.mgrid[-visible_range:visible_range+1, -visible_range:visible_range+1]
+            in_range = np.abs(dx) + np.abs(dy) <= visible_range
+            # boolean indexing keeps the row-major order of the cells
+            dx, dy = dx[in_range], dy[in_range]
+            offsets = dy * self.grid_size + dx
+            for array in (dx, dy, offsets):
+                array.setflags(write=False)
+            _range_stencils[key] = (dx, dy, offsets)
+        return _range_stencils[key]
 
     def manhatten_distance(self, loc1, loc2):
         loc1_2d = self.convert_loc_to_2d(loc1)
@@ -68,37 +205,104 @@ class GridWorld:
 
 class SARGridWorld(GridWorld):
     Actions = Enum('Actions', ['LEFT', 'DOWN', 'UP', 'RIGHT', 'COMMUNICATE', 'REASSESS', 'PICKUP', 'DROPOFF'])
+    # change in x and y for the actions which only move the agent (these can be stepped as a batch)
+    action_deltas = {
+        Actions.LEFT: (-1, 0),
+        Actions.DOWN: (0, 1),
+        Actions.UP: (0, -1),
+        Actions.RIGHT: (1, 0),
+        Actions.REASSESS: (0, 0),
+    }
+    # column of the transition table for each action which changes the agent's location
+    transition_columns = {action: column for column, action in enumerate([Actions.LEFT, Actions.DOWN, Actions.UP, Actions.RIGHT])}
 
     def __init__(self, options) -> None:
         # unpack the options
         self.unpack_options(options)
+        self.initialize_rng()
         grid = self.build_grid()
-        self.populate_grid(grid.flatten())
+        self.populate_grid(grid.ravel())
         self.initialize_agent_data()
+        self.room_graph = None
+        if self.room_graph_file is not None:
+            self.room_graph = RoomGraph(self, self.room_graph_file)
 
         # initialize pygame if appropriate
+        self.display = None
+        self.steps_since_render = 0
         if self.render_mode == 'human':
             self.display = DisplayVisitor(options)
+        elif self.render_mode == 'rgb_array':
+            self.display = FrameVisitor(options)
+
+        self.profiler = None
+        if self.profile:
+            self.profiler = StepProfiler(self.profile_file)
+            self.instrument(self.profiler)
+
+    # the methods timed when profiling and the phase each is recorded as
+    profiled_phases = {
+        'step_agent': 'step_agent',
+        'step_all': 'step_all',
+        'step_movement_batch': 'movement_batch',
+        'apply_agent_action': 'apply_action',
+        'attempt_agent_communicate': 'communication',
+        'move_agent': 'movement',
+        'update_map_with_visit': 'pheromone',
+        'update_data_for_agents_in_range': 'perception',
+        'update_data_for_victums_in_range': 'perception',
+        'cells_in_range': 'cells_in_range',
+        'get_observation_for_agent': 'observation',
+    }
+
+    def instrument(self, profiler):
+        # wrap the profiled methods of this world (and its display) with timers
+        # steps are counted where each agent step is actually taken (step_all stops early when the game terminates)
+        profiler.instrument(self, self.profiled_phases, steps={'apply_agent_action': lambda agent_i, action: 1,
+                                                               'step_movement_batch': lambda agents, *args: len(agents)})
+        if self.display is not None:
+            profiler.instrument(self.display, {'visit': 'render'})
 
     def populate_grid(self, grid):
         # grid representing world 0 wall, 1 movable
-        self.agent_location_visits = np.zeros((self.num_agents, len(grid)))
-        self.location_visits = np.zeros((len(grid)))
-        for loc, occupied in enumerate(grid):
-            if occupied == 0:
-                self.agent_location_visits[:, loc] = np.inf
-                self.location_visits[loc] = np.inf
         self.world = grid
-        self.movable_locations = np.nonzero(self.world)[0]
+        self.movable_locations = self.find_movable_locations(grid)
+        self.wall_mask = self.world == 0
+        self.transitions = self.build_transition_table()
+        self.distance_fields = OrderedDict()
+        self.agent_location_visits = self.build_agent_location_visits()
+        # the global visit map always uses floats so walls can be marked with infinity
+        self.location_visits = np.zeros((len(grid)))
+        self.location_visits[self.wall_mask] = np.inf
+        # records visits once states are saved so they only hold the visits since a shared copy
+        self.visit_journal = VisitJournal(len(grid))
         # self.agent_location_visits = np.zeros((self.num_agents, len(self.world)))
         # start and goal locations
         self.starts = self.movable_locations
         self.goals = self.movable_locations[-3:-1]
-        # array of victum locations at random cells in the world
-        self.accident_locations = np.array([np.random.choice(self.movable_locations) for _ in range(4)])
-        # self.victum_locations = np.array([np.random.choice(self.movable_locations) for _ in range(self.num_victums)])
-        self.victum_locations = np.array([np.random.choice(self.accident_locations) for _ in range(self.num_victums)])
-        self.agent_locations = np.array([np.random.choice(self.starts) for _ in range(self.num_agents)])
+        # victums are spread over a few accident sites and agents start at random cells
+        self.scenario_sampler = ScenarioSampler(self)
+        victum_locations, agent_locations = self.scenario_sampler.sample(1)
+        self.victum_locations, self.agent_locations = victum_locations[0], agent_locations[0]
+        # indexes of which agents and victums are in each cell (kept up to date by the location setters)
+        self.agent_index = OccupancyIndex(len(grid), self.agent_locations)
+        self.victum_index = OccupancyIndex(len(grid), self.victum_locations)
+
+    def build_agent_location_visits(self):
+        """ Allocate the per-agent visit maps with the configured backend and dtype
+
+        Float maps mark walls with infinity, integer maps (uint8/uint16) can't
+        hold infinity so walls are left at 0 and masked by self.wall_mask instead.
+
+        Returns:
+            (DenseVisitMemory or SparseVisitMemory): empty visit maps of shape (num_agents, num_cells)
+        """
+        visit_dtype = np.dtype(self.visit_dtype)
+        if np.issubdtype(visit_dtype, np.integer) and self.max_pheromone > np.iinfo(visit_dtype).max:
+            raise ValueError(f"max_pheromone {self.max_pheromone} does not fit in visit_dtype {visit_dtype}")
+        if self.visit_memory not in visit_memories:
+            raise ValueError(f"unknown visit_memory {self.visit_memory!r}, expected one of {list(visit_memories)}")
+        return visit_memories[self.visit_memory](self.num_agents, self.wall_mask, visit_dtype)
 
     def initialize_agent_data(self):
         # simple arrays for rescuers and scouts
@@ -111,12 +315,90 @@ class SARGridWorld(GridWorld):
         self.known_victum_locations = np.ones((self.num_agents, self.num_victums)).astype(int)*(-1)
         self.agents_carrying_victum = np.ones((self.num_agents)).astype(int)*(-1)
         self.step_count = np.zeros((self.num_agents))
+        if self.preallocate_observations:
+            self.build_observation_buffers()
         for agent in self.agents:
             self.reset_agent(agent)
 
+    def observation_spec(self):
+        """ Get the layout of the preallocated observation buffers
+
+        Every buffer has a row for each agent. The visits around an agent are in the row-major
+        order of its visible diamond (see range_stencil), scouts and rescuers use the first
+        cells of the row that fit their range and cells off the grid are infinite like walls.
+
+        Returns:
+            (dict): the (shape, dtype) of each buffer
+        """
+        num_visible = max(len(self.range_stencil(visible_range)[2]) for visible_range in (self.scout_visible_range, self.rescuer_visible_range))
+        return {
+            'known_agent_locations': ((self.num_agents, self.num_agents), self.known_agent_locations.dtype),
+            'known_victum_locations': ((self.num_agents, self.num_victums), self.known_victum_locations.dtype),
+            'last_agent_communications': ((self.num_agents, self.num_agents), self.last_agent_communications.dtype),
+            'cell_visits': ((self.num_agents, num_visible), self.location_visits.dtype),
+            'carrying': ((self.num_agents,), np.dtype(bool)),
+        }
+
+    def build_observation_buffers(self):
+        # the buffers are filled in place by get_observation_for_agent and each agent's observation
+        # tuple holds views of its rows, so the same tuple is returned every step
+        spec = self.observation_spec()
+        self.observation_buffers = {name: np.zeros(shape, dtype=dtype) for name, (shape, dtype) in spec.items()}
+        observation_cells = np.zeros(spec['cell_visits'][0][1], dtype=int)
+        self.agent_observations = list()
+        # the visible range, stencil, cell buffer and visit row of each agent (looked up once here)
+        self.agent_observation_visits = list()
+        for agent_i in self.agents:
+            visible_range = self.rescuer_visible_range if agent_i in self.rescuers else self.scout_visible_range
+            stencil = self.range_stencil(visible_range)
+            num_visible = len(stencil[2])
+            self.agent_observation_visits.append((visible_range, stencil, observation_cells[:num_visible], self.observation_buffers['cell_visits'][agent_i, :num_visible]))
+            self.agent_observations.append((
+                agent_i,
+                self.observation_view(self.observation_buffers['known_agent_locations'][agent_i]),
+                self.observation_view(self.observation_buffers['known_victum_locations'][agent_i]),
+                self.observation_view(self.observation_buffers['last_agent_communications'][agent_i]),
+                self.observation_view(self.observation_buffers['cell_visits'][agent_i, :num_visible]),
+                # a 0d view so the flag changes in place
+                self.observation_view(self.observation_buffers['carrying'][agent_i:agent_i + 1].reshape(())),
+                self.observation_view(self.goals),
+            ))
+
+    def observation_view(self, array):
+        # a view of the array which is read only if read_only_observations is set
+        if not self.read_only_observations:
+            return array
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
     def __del__(self):
-        # close pygame if it was opened
-        self.display.stop_simulation()
+        # the display may not exist if initialization failed
+        if getattr(self, 'display', None) is not None:
+            self.stop_simulation()
+
+    def stop_simulation(self):
+        # close pygame or the video file if they were opened
+        if self.display is not None:
+            self.display.stop_simulation()
+
+    def render(self, steps=1):
+        """ Draw the world if rendering is enabled and enough agent steps have passed
+
+        Args:
+            steps (int): the number of agent steps taken since the last call
+        """
+        if self.display is None:
+            return
+        render_interval = self.num_agents if self.render_interval == 'round' else self.render_interval
+        self.steps_since_render += steps
+        if self.steps_since_render >= render_interval:
+            self.steps_since_render = 0
+            self.display.visit(self)
+
+    def get_frame(self):
+        """ Get the last frame drawn with render_mode 'rgb_array' (None before the first frame) """
+        return getattr(self.display, 'frame', None)
     
     def get_scout_actions(self):
         return [self.Actions.LEFT, self.Actions.DOWN, self.Actions.UP, self.Actions.RIGHT, self.Actions.COMMUNICATE]
@@ -126,18 +408,10 @@ class SARGridWorld(GridWorld):
         return [self.Actions.LEFT, self.Actions.DOWN, self.Actions.UP, self.Actions.RIGHT, self.Actions.COMMUNICATE, self.Actions.PICKUP, self.Actions.DROPOFF]
         # return [action.value for action in self.Actions]
 
-    def unpack_options(self, options):
-        # apply all dictionary key-values as object properties
-        for option in options:
-            setattr(self, option, options[option])
-
     def agents_in_range(self, agent_i):
         # test for agents within range then add them to list
         cells = self.cells_in_range(agent_i)
-        agents_in_range = list()
-        for cell in cells:
-            for other_i, loc in enumerate(self.agent_locations):
-                if loc == cell: agents_in_range.append(other_i)
+        agents_in_range = self.agent_index.ids_in_cells(cells)
         return  agents_in_range
 
     def is_agent_rescuer(self, agent_i):
@@ -149,20 +423,20 @@ class SARGridWorld(GridWorld):
     def victums_in_range(self, agent_i):
         # test for victums within range then add them to list
         cells = self.cells_in_range(agent_i)
-        victums_in_range = list()
-        for cell in cells:
-            for vic_i, loc in enumerate(self.victum_locations):
-                if loc == cell: victums_in_range.append(vic_i)
+        victums_in_range = self.victum_index.ids_in_cells(cells)
         return victums_in_range
 
     def cell_visits_in_range(self, agent_i):
         cells = self.cells_in_range(agent_i)
-        visits = np.array([self.location_visits[loc] for loc in cells])
+        visits = self.location_visits[cells]
         return visits
 
     def reset_agent(self, agent_i):
-        for space in self.movable_locations:
-            self.agent_location_visits[agent_i][space] = 0
+        # take the agent's visits out of the global map before clearing them
+        cells, counts = self.agent_location_visits.clear(agent_i)
+        self.location_visits[cells] -= counts
+        # saved states can't undo clearing the visits, so the next one copies the visit maps again
+        self.visit_journal.stop()
         self.last_agent_communications[agent_i][:] = 0
         self.known_agent_locations[agent_i][:] = -1
         self.known_victum_locations[agent_i][:] = -1
@@ -170,7 +444,61 @@ class SARGridWorld(GridWorld):
         obs = self.get_observation_for_agent(agent_i)
         return obs
     
+    # the small state arrays saved by get_state (the visit maps are saved by the visit journal)
+    state_arrays = ['agent_locations', 'victum_locations', 'agents_carrying_victum', 'step_count',
+                    'known_agent_locations', 'known_victum_locations', 'last_agent_communications']
+
+    def get_state(self):
+        """ Save the state of the episode (e.g. to branch rollouts from it)
+
+        The small arrays are copied into one flat buffer and the visit maps are saved as the
+        visits made since a copy shared by every saved state (see VisitJournal), so saving
+        costs about as much as the steps taken since the first save.
+
+        Returns:
+            (WorldState): the saved state, restore it with set_state
+        """
+        arrays = np.concatenate([getattr(self, name).ravel() for name in self.state_arrays], dtype=np.int64, casting='unsafe')
+        visit_base, visits = self.visit_journal.snapshot(self.agent_location_visits, self.location_visits)
+        return WorldState(arrays, visit_base, visits)
+
+    def set_state(self, state):
+        """ Restore a state saved by get_state (of this world)
+
+        Args:
+            state (WorldState): the saved state
+        """
+        start = 0
+        for name in self.state_arrays:
+            array = getattr(self, name)
+            np.copyto(array, state.arrays[start:start + array.size].reshape(array.shape), casting='unsafe')
+            start += array.size
+        self.visit_journal.restore(self.agent_location_visits, self.location_visits, state.visit_base, state.visits)
+        # move the changed ids of the occupancy indexes
+        for index, locations in [(self.agent_index, self.agent_locations), (self.victum_index, self.victum_locations)]:
+            for i in np.nonzero(index.locations != locations)[0]:
+                index.move(i, locations[i])
+
     def step_agent(self, agent_i, action):
+        reward, done, dx, dy = self.apply_agent_action(agent_i, action)
+        # draw changes to screen if enabled
+        self.render()
+        # update state space for selected action
+        self.update_agent_state(agent_i, dx, dy)
+        # format observation data
+        obs = self.get_observation_for_agent(agent_i)
+        # return the observation, reward, and termitation state
+        return obs, reward, done
+
+    def apply_agent_action(self, agent_i, action):
+        """ Apply the immediate effects of an agent's action (before it moves)
+
+        Args:
+            agent_i (int): the id of the acting agent
+            action (Actions): the selected action
+        Returns:
+            (tuple): the reward, termination state and the x and y movement of the agent
+        """
         self.step_count[agent_i] += 1
         # reward is -1 normally for each timestep
         reward, done = -1, False
@@ -202,27 +530,197 @@ class SARGridWorld(GridWorld):
                     reward = -10 # reward is -10 for failed communication
             case _:
                 pass
-        # draw changes to screen if enabled
-        if self.render_mode == 'human':
-            self.display.visit(self)
-        # update state space for selected action
+        return reward, done, dx, dy
+
+    def update_agent_state(self, agent_i, dx, dy):
+        # move the agent then update what it knows about its surroundings
         self.move_agent(agent_i, dx, dy)
         self.update_data_for_agents_in_range(agent_i)
         self.update_data_for_victums_in_range(agent_i)
-        # format observation data
-        obs = self.get_observation_for_agent(agent_i)
-        # return the observation, reward, and termitation state
-        return obs, reward, done
+
+    def step_all(self, actions):
+        """ Step every agent once with its action
+
+        The result is the same as calling step_agent for each agent in order of id,
+        stopping after the first step which terminates the game. Consecutive agents with
+        movement actions are stepped together with array operations, agents which
+        communicate, pickup or dropoff are stepped individually between them.
+        The display (if enabled) counts the round as one step for every agent and is drawn
+        before the agents are stepped.
+
+        Args:
+            actions (list): the action for each agent, indexed by agent id
+        Returns:
+            observations (list): the observation for each agent (None if the agent wasn't stepped)
+            rewards (np.array): the reward for each agent (0 if the agent wasn't stepped)
+            dones (np.array): the termination state returned by each agent's step
+        """
+        self.render(self.num_agents)
+        observations = [None] * self.num_agents
+        rewards = np.zeros(self.num_agents)
+        dones = np.zeros(self.num_agents, dtype=bool)
+        batch = list()
+        for agent_i in self.agents:
+            action = actions[agent_i]
+            if action in self.action_deltas:
+                batch.append(agent_i)
+                continue
+            # step the waiting movement agents before this one to keep the order
+            self.step_movement_batch(batch, actions, observations, rewards)
+            batch = list()
+            reward, done, dx, dy = self.apply_agent_action(agent_i, action)
+            self.update_agent_state(agent_i, dx, dy)
+            observations[agent_i] = self.copy_observation(self.get_observation_for_agent(agent_i))
+            rewards[agent_i] = reward
+            dones[agent_i] = done
+            # termination must stop the round like the sequential loop
+            if done:
+                return observations, rewards, dones
+        self.step_movement_batch(batch, actions, observations, rewards)
+        return observations, rewards, dones
+
+    def step_movement_batch(self, agents, actions, observations, rewards):
+        """ Step consecutive agents which are all moving (or idle) with array operations
+
+        Each agent perceives the others as if they were stepped one at a time, so agents
+        earlier in the batch are seen at their new locations and later ones at their old.
+
+        Args:
+            agents (list): the ids of the agents to step in order
+            actions (list): the action for each agent, indexed by agent id
+            observations (list): filled with the observation of each stepped agent
+            rewards (np.array): filled with the reward of each stepped agent
+        """
+        if len(agents) == 0:
+            return
+        agents = np.array(agents, dtype=int)
+        columns = np.array([self.transition_columns.get(actions[agent_i], -1) for agent_i in agents])
+        self.step_count[agents] += 1
+        rewards[agents] = -1
+        agent_locs_before = self.agent_locations.copy()
+        victum_locs_before = self.victum_locations.copy()
+        # move the agents with the transition table (idle agents stay where they are)
+        locs = agent_locs_before[agents]
+        moving = columns >= 0
+        new_locs = locs.copy()
+        new_locs[moving] = self.transitions[locs[moving], columns[moving]]
+        # (coordinates are int32 since the pairwise arithmetic below is much faster than with int64)
+        x, y = (locs % self.grid_size).astype(np.int32), (locs // self.grid_size).astype(np.int32)
+        new_x, new_y = (new_locs % self.grid_size).astype(np.int32), (new_locs // self.grid_size).astype(np.int32)
+        for agent_i, loc in zip(agents, new_locs):
+            self.set_agent_1d_loc(agent_i, loc)
+        # carried victums move with their rescuers (the later rescuer wins if two carry the same victum)
+        carried = self.agents_carrying_victum[agents]
+        carriers = np.nonzero(carried >= 0)[0]
+        for i in carriers:
+            self.set_victum_1d_loc(carried[i], new_locs[i])
+        # update the visit maps for every agent that didn't reach its max pheromone
+        visited = ~self.wall_mask[new_locs] & (self.agent_location_visits.counts(agents, new_locs) < self.max_pheromone)
+        self.agent_location_visits.add(agents[visited], new_locs[visited])
+        np.add.at(self.location_visits, new_locs[visited], 1)
+        if self.visit_journal.base is not None:
+            self.visit_journal.record(agents[visited] * len(self.world) + new_locs[visited])
+        # where each agent sees the other agents and victums (earlier agents in the batch have already moved)
+        moved_before = np.tri(len(agents), dtype=bool)
+        seen_agent_x = np.tile((agent_locs_before % self.grid_size).astype(np.int32), (len(agents), 1))
+        seen_agent_y = np.tile((agent_locs_before // self.grid_size).astype(np.int32), (len(agents), 1))
+        seen_agent_x[:, agents] = np.where(moved_before, new_x[None, :], x[None, :])
+        seen_agent_y[:, agents] = np.where(moved_before, new_y[None, :], y[None, :])
+        seen_victum_x = np.tile((victum_locs_before % self.grid_size).astype(np.int32), (len(agents), 1))
+        seen_victum_y = np.tile((victum_locs_before // self.grid_size).astype(np.int32), (len(agents), 1))
+        for i in carriers:
+            seen_victum_x[i:, carried[i]] = new_x[i]
+            seen_victum_y[i:, carried[i]] = new_y[i]
+        visible_ranges = np.where(np.isin(agents, self.rescuers), self.rescuer_visible_range, self.scout_visible_range).astype(np.int32)
+        for known_locations, seen_x, seen_y in [(self.known_agent_locations, seen_agent_x, seen_agent_y), (self.known_victum_locations, seen_victum_x, seen_victum_y)]:
+            dist = np.abs(seen_x - new_x[:, None]) + np.abs(seen_y - new_y[:, None])
+            rows, cols = np.nonzero(dist <= visible_ranges[:, None])
+            known_locations[agents[rows], cols] = seen_y[rows, cols].astype(int) * self.grid_size + seen_x[rows, cols]
+        # agents are always communicating with themselves
+        self.last_agent_communications[agents, agents] = self.step_count[agents]
+        # observations see the visit map before the later agents in the batch visited it, so count the
+        # later visits to each observed cell by searching sorted (location, batch position) keys
+        num_batch = len(agents)
+        later_keys = np.sort(new_locs[visited] * num_batch + np.nonzero(visited)[0])
+        observed_areas = [None] * num_batch
+        for visible_range in np.unique(visible_ranges):
+            rows = np.nonzero(visible_ranges == visible_range)[0]
+            dx, dy, offsets = self.range_stencil(visible_range)
+            cells = new_locs[rows, None] + offsets[None, :]
+            cells_x = new_x[rows, None] + dx[None, :]
+            cells_y = new_y[rows, None] + dy[None, :]
+            in_bounds = (cells_x >= 0) & (cells_x < self.grid_size) & (cells_y >= 0) & (cells_y < self.grid_size)
+            later_counts = np.searchsorted(later_keys, cells * num_batch + num_batch) - np.searchsorted(later_keys, cells * num_batch + rows[:, None] + 1)
+            observed = self.location_visits[np.where(in_bounds, cells, 0)] - later_counts
+            if self.preallocate_observations:
+                self.observation_buffers['cell_visits'][agents[rows], :len(offsets)] = np.where(in_bounds, observed, np.inf)
+                continue
+            all_in_bounds = np.all(in_bounds, axis=1)
+            for row, observed_row, row_in_bounds, row_all_in_bounds in zip(rows, observed, in_bounds, all_in_bounds):
+                observed_areas[row] = observed_row if row_all_in_bounds else observed_row[row_in_bounds]
+        if self.preallocate_observations:
+            buffers = self.observation_buffers
+            buffers['known_agent_locations'][agents] = self.known_agent_locations[agents]
+            buffers['known_victum_locations'][agents] = self.known_victum_locations[agents]
+            buffers['last_agent_communications'][agents] = self.last_agent_communications[agents]
+            buffers['carrying'][agents] = self.agents_carrying_victum[agents] >= 0
+            for agent_i in agents:
+                observations[agent_i] = self.agent_observations[agent_i]
+            return
+        # copy the knowledge rows once for the whole batch so the observations are snapshots
+        known_agent_locs = self.known_agent_locations[agents]
+        known_victum_locs = self.known_victum_locations[agents]
+        last_agent_comms = self.last_agent_communications[agents]
+        carrying = self.agents_carrying_victum[agents] >= 0
+        for i, agent_i in enumerate(agents):
+            observations[agent_i] = agent_i, known_agent_locs[i], known_victum_locs[i], last_agent_comms[i], observed_areas[i], carrying[i], self.goals
+
+    def copy_observation(self, obs):
+        # observations share rows with the environment state, so copy them to keep a snapshot
+        # (preallocated observations are already separate from the state)
+        if self.preallocate_observations:
+            return obs
+        agent_i, known_agent_locs, known_victum_locs, last_agent_comms, observed_area, carrying, goals = obs
+        return agent_i, known_agent_locs.copy(), known_victum_locs.copy(), last_agent_comms.copy(), observed_area, carrying, goals
 
     def get_observation_for_agent(self, agent_i):
-        known_victum_locs = self.known_victum_locations[agent_i]
-        known_agent_locs = self.known_agent_locations[agent_i]
-        last_agent_comms = self.last_agent_communications[agent_i]
+        if self.preallocate_observations:
+            return self.fill_observation(agent_i)
+        known_victum_locs = self.observation_view(self.known_victum_locations[agent_i])
+        known_agent_locs = self.observation_view(self.known_agent_locations[agent_i])
+        last_agent_comms = self.observation_view(self.last_agent_communications[agent_i])
         observed_area = self.cell_visits_in_range(agent_i)
         carrying = self.check_agent_carrying_victum(agent_i)
-        obs = agent_i, known_agent_locs, known_victum_locs, last_agent_comms, observed_area, carrying, self.goals
+        obs = agent_i, known_agent_locs, known_victum_locs, last_agent_comms, observed_area, carrying, self.observation_view(self.goals)
         return obs
 
+    def fill_observation(self, agent_i):
+        """ Copy an agent's observation into its preallocated buffers (without allocating new arrays)
+
+        Args:
+            agent_i (int): the id of the agent
+        Returns:
+            (tuple): the agent's observation tuple, whose arrays are views of the buffers
+        """
+        buffers = self.observation_buffers
+        buffers['known_agent_locations'][agent_i] = self.known_agent_locations[agent_i]
+        buffers['known_victum_locations'][agent_i] = self.known_victum_locations[agent_i]
+        buffers['last_agent_communications'][agent_i] = self.last_agent_communications[agent_i]
+        buffers['carrying'][agent_i] = self.agents_carrying_victum[agent_i] >= 0
+        # gather the visits around the agent through the preallocated cell buffer
+        agent_loc = int(self.agent_locations[agent_i])
+        visible_range, (dx, dy, offsets), cells, visits = self.agent_observation_visits[agent_i]
+        y, x = divmod(agent_loc, self.grid_size)
+        if visible_range <= x < self.grid_size - visible_range and visible_range <= y < self.grid_size - visible_range:
+            np.add(offsets, agent_loc, out=cells)
+            self.location_visits.take(cells, out=visits)
+        else:
+            # cells off the grid are seen as walls to keep the layout
+            in_bounds = (x + dx >= 0) & (x + dx < self.grid_size) & (y + dy >= 0) & (y + dy < self.grid_size)
+            visits[:] = np.inf
+            visits[in_bounds] = self.location_visits[agent_loc + offsets[in_bounds]]
+        return self.agent_observations[agent_i]
+
     def update_data_for_victums_in_range(self, agent_i):
         # check for victums in range
         victums_in_range = self.victums_in_range(agent_i)
@@ -281,11 +779,11 @@ class SARGridWorld(GridWorld):
         # check if victum is at same location
         loc = self.agent_locations[agent_i]
         result = False
-        for vic_i, _ in enumerate(self.victum_locations):
-            vic_loc = self.victum_locations[vic_i]
-            if np.array_equal(loc, vic_loc):
-                self.agents_carrying_victum[agent_i] = vic_i
-                result = True
+        victums_at_loc = self.victum_index.ids_at(loc)
+        if len(victums_at_loc) > 0:
+            # the last victum at the location gets picked up
+            self.agents_carrying_victum[agent_i] = victums_at_loc[-1]
+            result = True
         return result
 
     def attempt_agent_dropoff(self, agent_i):
@@ -304,12 +802,10 @@ class SARGridWorld(GridWorld):
         return result
 
     def move_agent(self, agent_i, dx, dy):
-        x, y = self.get_agent_2d_loc(agent_i)
-        new_x = x + dx
-        new_y = y + dy
-        if new_x < 0 or new_x > self.grid_size-1: new_x = x
-        if new_y < 0 or new_y > self.grid_size-1: new_y = y
-        new_loc_1d = self.convert_loc_from_2d(new_x, new_y)
+        # agents stop at walls and the edges of the grid
+        new_loc_1d = int(self.agent_locations[agent_i])
+        if (dx, dy) != (0, 0):
+            new_loc_1d = int(self.transitions[new_loc_1d, self.movement_deltas.index((dx, dy))])
         self.set_agent_1d_loc(agent_i, new_loc_1d)
         # move victum if being carried
         carrying_vic = self.agents_carrying_victum[agent_i]
@@ -318,25 +814,29 @@ class SARGridWorld(GridWorld):
         self.update_map_with_visit(agent_i, new_loc_1d)
 
     def update_map_with_visit(self, agent_i, loc):
-        # update visited map data
-        if self.agent_location_visits[agent_i][loc] < self.max_pheromone:
-            self.agent_location_visits[agent_i][loc] += 1
-        # sum all the visits for a global value
-        self.location_visits = np.sum(self.agent_location_visits, axis=0)
+        # update visited map data (walls are never visited)
+        if not self.wall_mask[loc] and self.agent_location_visits.count(agent_i, loc) < self.max_pheromone:
+            self.agent_location_visits.increment(agent_i, loc)
+            # the global map is the sum of all agent visits, so only the visited cell changes
+            self.location_visits[loc] += 1
+            if self.visit_journal.base is not None:
+                self.visit_journal.record(agent_i * len(self.world) + loc)
 
     def set_agent_1d_loc(self, agent_i, loc):
         self.agent_locations[agent_i] = loc
+        self.agent_index.move(agent_i, loc)
 
     def set_victum_1d_loc(self, vic_i, loc):
         self.victum_locations[vic_i] = loc
+        self.victum_index.move(vic_i, loc)
 
     def set_agent_2d_loc(self, agent_i, x, y):
         loc_1d = self.convert_loc_from_2d(x, y)
-        self.agent_locations[agent_i] = loc_1d
+        self.set_agent_1d_loc(agent_i, loc_1d)
 
     def set_victum_2d_loc(self, vic_i, x, y):
         loc_1d = self.convert_loc_from_2d(x, y)
-        self.victum_locations[vic_i] = loc_1d
+        self.set_victum_1d_loc(vic_i, loc_1d)
 
     def get_agent_2d_loc(self, agent_i):
         grid_loc_1d = self.agent_locations[agent_i]
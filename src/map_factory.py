@@ -1,11 +1,29 @@
 import numpy as np
 from enum import Enum
+from collections import OrderedDict
+import hashlib
+import os
 import cv2
 
 
 EMPTY = 0
 WALL = 1
 
+# validated grids can be cached on disk (as uint8 grids and their movable locations) keyed by the
+# hash of the map file, so later loads (from any process) memory-map them instead of decoding the map
+# the disk cache is off (None) unless a directory is set here or with the SAR_MAP_CACHE_DIR environment
+# variable (e.g. ~/.cache/search_and_rescue_sim/maps for sweeps whose workers load the same maps)
+MAP_CACHE_DIR = os.environ.get('SAR_MAP_CACHE_DIR')
+# bump when the cached format or the validation changes so old cache files are ignored
+MAP_CACHE_VERSION = 1
+# the number of maps kept loaded by each process
+MAX_LOADED_MAPS = 8
+
+# (grid, movable_locations) of recently used maps, keyed by (content hash, padding)
+_loaded_maps = OrderedDict()
+# content hashes of map files, keyed by (path, modification time, size)
+_file_hashes = dict()
+
 class GridFactory:
     def load_grid(data: any) -> np.array:
         """ takes some form of data and returns a grid array
@@ -53,14 +71,87 @@ class ImageGridFactory(GridFactory):
             grid_file (str): the file to load
 
         Returns:
-            np.array: the grid array
+            np.array: the grid array (uint8 and read only since it is shared by every caller)
+        """
+        return ImageGridFactory.load_map(grid_file, padding)[0]
+
+    def load_movable_locations(grid_file: str, padding: int) -> np.array:
+        """get the 1d locations of the free space in a map (read only)"""
+        return ImageGridFactory.load_map(grid_file, padding)[1]
+
+    def load_map(grid_file: str, padding: int) -> tuple:
+        """load a validated grid and its movable locations, from memory or the disk cache
+        if the same map contents have been loaded before
+
+        Args:
+            grid_file (str): the file to load
+            padding (int): the wall padding around the map
+
+        Returns:
+            (tuple): the read only grid array and its movable locations
         """
-        grid = np.array([])
-        if grid_file.endswith("npy"):
-            grid = np.load(grid_file)
-        else:
-            grid = cv2.imread(grid_file, 0)
-        return ImageGridFactory.validate_grid(grid, padding)
+        key = (ImageGridFactory.file_hash(grid_file), padding)
+        if key in _loaded_maps:
+            _loaded_maps.move_to_end(key)
+            return _loaded_maps[key]
+        loaded = ImageGridFactory.read_cached_map(key)
+        if loaded is None:
+            grid = np.array([])
+            if grid_file.endswith("npy"):
+                grid = np.load(grid_file)
+            else:
+                grid = cv2.imread(grid_file, 0)
+            grid = ImageGridFactory.validate_grid(grid, padding).astype(np.uint8)
+            loaded = (grid, np.nonzero(grid.ravel())[0])
+            ImageGridFactory.write_cached_map(key, loaded)
+        for array in loaded:
+            array.flags.writeable = False
+        _loaded_maps[key] = loaded
+        if len(_loaded_maps) > MAX_LOADED_MAPS:
+            _loaded_maps.popitem(last=False)
+        return loaded
+
+    def file_hash(grid_file: str) -> str:
+        """hash the contents of a map file (remembered until the file is modified)"""
+        stat = os.stat(grid_file)
+        key = (os.path.abspath(grid_file), stat.st_mtime_ns, stat.st_size)
+        if key not in _file_hashes:
+            with open(grid_file, 'rb') as file:
+                _file_hashes[key] = hashlib.sha1(file.read()).hexdigest()
+        return _file_hashes[key]
+
+    def cached_map_files(key: tuple) -> tuple:
+        """the disk cache files of a map's grid and movable locations"""
+        file_hash, padding = key
+        prefix = os.path.join(MAP_CACHE_DIR, f'{file_hash}_p{padding}_v{MAP_CACHE_VERSION}')
+        return prefix + '_grid.npy', prefix + '_movable.npy'
+
+    def read_cached_map(key: tuple):
+        """memory-map a map from the disk cache (None if it isn't cached)"""
+        if MAP_CACHE_DIR is None:
+            return None
+        grid_file, movable_file = ImageGridFactory.cached_map_files(key)
+        try:
+            # asarray drops the memmap subclass but keeps the mapped memory
+            return np.asarray(np.load(grid_file, mmap_mode='r')), np.asarray(np.load(movable_file, mmap_mode='r'))
+        except (OSError, ValueError):
+            return None
+
+    def write_cached_map(key: tuple, loaded: tuple):
+        """save a map to the disk cache (skipped if the cache directory can't be written)"""
+        if MAP_CACHE_DIR is None:
+            return
+        try:
+            os.makedirs(MAP_CACHE_DIR, exist_ok=True)
+            # the movable locations are written first since the grid file marks a complete entry
+            for file, array in reversed(list(zip(ImageGridFactory.cached_map_files(key), loaded))):
+                # write to a temporary file then rename so other processes never see a partial file
+                temp_file = f'{file}.{os.getpid()}.tmp'
+                with open(temp_file, 'wb') as temp:
+                    np.save(temp, array)
+                os.replace(temp_file, file)
+        except OSError:
+            pass
 
 
     def is_padded(grid: np.array, pad_val: int, pad_length: int):
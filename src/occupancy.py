@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class OccupancyIndex:
+    """ Keeps track of which ids (agents or victums) occupy each cell of a
+    flattened grid, so that range queries only look at the cells in range
+    instead of comparing every cell against every location
+    """
+
+    def __init__(self, num_cells: int, locations: np.array) -> None:
+        """
+        Args:
+            num_cells (int): the number of cells in the flattened grid
+            locations (np.array): the initial 1d location of each id
+        """
+        self.counts = np.zeros(num_cells, dtype=int)
+        self.members = dict()
+        self.locations = np.array(locations, dtype=int)
+        for i, loc in enumerate(self.locations):
+            self.add(i, loc)
+
+    def add(self, i: int, loc: int):
+        loc = int(loc)
+        self.members.setdefault(loc, set()).add(int(i))
+        self.counts[loc] += 1
+        self.locations[i] = loc
+
+    def remove(self, i: int):
+        loc = int(self.locations[i])
+        occupants = self.members[loc]
+        occupants.discard(int(i))
+        if not occupants:
+            del self.members[loc]
+        self.counts[loc] -= 1
+
+    def move(self, i: int, loc: int):
+        """ Move an id to a new cell
+
+        Args:
+            i (int): the id to move
+            loc (int): the new 1d location
+        """
+        if self.locations[i] != loc:
+            self.remove(i)
+            self.add(i, loc)
+
+    def ids_at(self, loc: int) -> list:
+        """ Get the ids in a single cell (sorted) """
+        return sorted(self.members.get(int(loc), ()))
+
+    def ids_in_cells(self, cells: np.array) -> list:
+        """ Get the ids located in any of the given cells
+
+        Args:
+            cells (np.array): 1d locations to look in
+        Returns:
+            (list): the ids ordered by the cells they were found in, then by id
+        """
+        cells = np.asarray(cells)
+        occupied = cells[self.counts[cells] > 0]
+        ids = list()
+        for cell in occupied:
+            ids.extend(sorted(self.members[int(cell)]))
+        return ids
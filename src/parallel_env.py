@@ -0,0 +1,201 @@
+import numpy as np
+
+from src.environments import SARGridWorld
+from src.vector_environments import VectorSARGridWorld
+
+# the wrapper follows the pettingzoo ParallelEnv api, pettingzoo (and gymnasium for the spaces) are optional
+try:
+    from pettingzoo import ParallelEnv
+except ImportError:
+    ParallelEnv = object
+try:
+    from gymnasium import spaces
+except ImportError:
+    spaces = None
+
+
+class SARParallelEnv(ParallelEnv):
+    """ A pettingzoo style parallel environment for training search and rescue agents
+
+    Every agent acts at once each step (see VectorSARGridWorld for the order the actions are
+    resolved in). Agents are named 'rescuer_<id>' and 'scout_<id>'. Each agent observes a dict of
+        'observation': float32 vector of
+            the visits to the cells of a diamond around the agent (the larger of the scouts' and
+            rescuers' visible ranges, in row-major order), -1 for walls and the cells off the grid
+            or outside the agent's own range
+            the agent's x and y, whether it's carrying a victum,
+            the x and y of each victum it knows about (-1 if unknown) and the x and y of the goals
+        'action_mask': int8 vector, 1 for the actions the agent can take
+    Actions are the indices of SARGridWorld.Actions (the action's value - 1).
+
+    Besides the dict api, step_arrays and reset_arrays step a batch of num_envs worlds with
+    arrays (agents along the second axis), which is what vectorized trainers should use.
+    """
+    metadata = {'name': 'search_and_rescue_v0', 'render_modes': []}
+
+    def __init__(self, options, num_envs=1, max_cycles=500, auto_reset=False) -> None:
+        """
+        Args:
+            options (dict): the SARGridWorld options (render options are ignored)
+            num_envs (int): the number of worlds stepped together by the array api (the dict api needs 1)
+            max_cycles (int): the number of steps before an episode is truncated
+            auto_reset (bool): whether the array api resets worlds which terminate or are truncated
+        """
+        self.engine = VectorSARGridWorld(options, num_envs, auto_reset=False)
+        self.num_envs = num_envs
+        self.max_cycles = max_cycles
+        self.auto_reset = auto_reset
+        engine = self.engine
+        self.possible_agents = [f"rescuer_{i}" if i in engine.rescuers else f"scout_{i}" for i in engine.agents]
+        self.agent_ids = {name: i for i, name in enumerate(self.possible_agents)}
+        self.agents = list()
+        self.episode_steps = np.zeros(num_envs, dtype=int)
+        # action masks from the actions each kind of agent can take
+        self.action_masks = np.zeros((engine.num_agents, len(SARGridWorld.Actions)), dtype=np.int8)
+        for i in engine.agents:
+            actions = engine.get_rescuer_actions() if i in engine.rescuers else engine.get_scout_actions()
+            self.action_masks[i, [action.value - 1 for action in actions]] = 1
+        # the perception window is the diamond of the larger visible range, cells outside each agent's own range are hidden
+        window_range = max(engine.scout_visible_range, engine.rescuer_visible_range)
+        self.window_dx, self.window_dy, self.window_offsets = engine.range_stencil(window_range)
+        distances = np.abs(self.window_dx) + np.abs(self.window_dy)
+        self.window_hidden = distances[None, :] > engine.visible_ranges[:, None]
+        goal_x, goal_y = engine.goals % engine.grid_size, engine.goals // engine.grid_size
+        self.goal_features = np.stack([goal_x, goal_y], axis=1).ravel().astype(np.float32)
+        self.observation_size = len(self.window_offsets) + 3 + 2 * engine.num_victums + len(self.goal_features)
+        # the spaces of each agent are built once (None without gymnasium)
+        self.observation_spaces, self.action_spaces = None, None
+        if spaces is not None:
+            self.observation_spaces = {agent: spaces.Dict({
+                'observation': spaces.Box(-1, np.inf, (self.observation_size,), dtype=np.float32),
+                'action_mask': spaces.MultiBinary(len(SARGridWorld.Actions)),
+            }) for agent in self.possible_agents}
+            self.action_spaces = {agent: spaces.Discrete(len(SARGridWorld.Actions)) for agent in self.possible_agents}
+
+    def observation_space(self, agent):
+        self.check_spaces()
+        return self.observation_spaces[agent]
+
+    def action_space(self, agent):
+        self.check_spaces()
+        return self.action_spaces[agent]
+
+    def check_spaces(self):
+        if spaces is None:
+            raise ImportError("gymnasium is needed for the observation and action spaces (pip install gymnasium)")
+
+    def reset_arrays(self, seed=None):
+        """ Reset every world
+
+        Args:
+            seed (int): reseeds the worlds' generator if given
+        Returns:
+            observations (np.array): shape (num_envs, num_agents, observation_size)
+            action_masks (np.array): shape (num_envs, num_agents, num_actions)
+        """
+        if seed is not None:
+            self.engine.seed = seed
+            self.engine.initialize_rng()
+            self.engine.scenario_sampler.rng = self.engine.rng
+        self.engine.reset()
+        self.episode_steps[:] = 0
+        return self.get_observation_arrays(), self.get_action_mask_arrays()
+
+    def step_arrays(self, actions):
+        """ Step every agent of every world at once
+
+        Args:
+            actions (np.array): the action index of each agent, shape (num_envs, num_agents)
+        Returns:
+            observations (np.array): shape (num_envs, num_agents, observation_size), of the reset
+                                     state for the worlds which ended if auto_reset is set
+            rewards (np.array): shape (num_envs, num_agents)
+            terminations (np.array): whether each world's victums were all rescued, shape (num_envs,)
+            truncations (np.array): whether each world reached max_cycles, shape (num_envs,)
+        """
+        actions = np.asarray(actions).reshape(self.num_envs, self.engine.num_agents)
+        # masked actions do nothing (they are stepped as REASSESS)
+        allowed = self.action_masks[np.arange(self.engine.num_agents), actions] == 1
+        values = np.where(allowed, actions + 1, SARGridWorld.Actions.REASSESS.value)
+        _, rewards, terminations = self.engine.step(values)
+        self.episode_steps += 1
+        truncations = (self.episode_steps >= self.max_cycles) & ~terminations
+        if self.auto_reset:
+            ended = np.nonzero(terminations | truncations)[0]
+            self.engine.reset_worlds(ended)
+            self.episode_steps[ended] = 0
+        return self.get_observation_arrays(), rewards, terminations, truncations
+
+    def get_observation_arrays(self):
+        engine = self.engine
+        grid_size = engine.grid_size
+        locs = engine.agent_locations
+        x, y = locs % grid_size, locs // grid_size
+        # visits to the cells of every agent's window
+        cells_x = x[:, :, None] + self.window_dx
+        cells_y = y[:, :, None] + self.window_dy
+        hidden = (cells_x < 0) | (cells_x >= grid_size) | (cells_y < 0) | (cells_y >= grid_size) | self.window_hidden
+        cells = np.where(hidden, 0, locs[:, :, None] + self.window_offsets)
+        visits = np.take_along_axis(engine.location_visits, cells.reshape(self.num_envs, -1), axis=1).reshape(cells.shape)
+        window = np.where(hidden | np.isinf(visits), -1, visits)
+        known = engine.known_victum_locations
+        known_x = np.where(known >= 0, known % grid_size, -1)
+        known_y = np.where(known >= 0, known // grid_size, -1)
+        known_features = np.stack([known_x, known_y], axis=3).reshape(self.num_envs, engine.num_agents, -1)
+        carrying = engine.agents_carrying_victum >= 0
+        goal_features = np.broadcast_to(self.goal_features, (self.num_envs, engine.num_agents, len(self.goal_features)))
+        return np.concatenate([window, x[:, :, None], y[:, :, None], carrying[:, :, None], known_features, goal_features], axis=2).astype(np.float32)
+
+    def get_action_mask_arrays(self):
+        return np.broadcast_to(self.action_masks, (self.num_envs,) + self.action_masks.shape)
+
+    def reset(self, seed=None, options=None):
+        """ Reset the world (pettingzoo api)
+
+        Returns:
+            observations (dict): the observation of each agent
+            infos (dict): an empty dict for each agent
+        """
+        self.check_single_world()
+        observations, action_masks = self.reset_arrays(seed)
+        self.agents = list(self.possible_agents)
+        return self.observation_dict(observations, action_masks), {agent: {} for agent in self.agents}
+
+    def step(self, actions):
+        """ Step every live agent with its action (pettingzoo api)
+
+        Args:
+            actions (dict): the action index of each agent (missing agents do nothing)
+        Returns:
+            (tuple): dicts of the observations, rewards, terminations, truncations and infos of each agent
+        """
+        self.check_single_world()
+        action_array = np.full((1, self.engine.num_agents), SARGridWorld.Actions.REASSESS.value - 1)
+        for agent, action in actions.items():
+            action_array[0, self.agent_ids[agent]] = action
+        auto_reset, self.auto_reset = self.auto_reset, False
+        observations, rewards, terminations, truncations = self.step_arrays(action_array)
+        self.auto_reset = auto_reset
+        observation_dict = self.observation_dict(observations, self.get_action_mask_arrays())
+        agents = self.agents
+        # the episode is over for everyone when the world ends
+        if terminations[0] or truncations[0]:
+            self.agents = list()
+        return (observation_dict,
+                {agent: float(rewards[0, self.agent_ids[agent]]) for agent in agents},
+                {agent: bool(terminations[0]) for agent in agents},
+                {agent: bool(truncations[0]) for agent in agents},
+                {agent: {} for agent in agents})
+
+    def observation_dict(self, observations, action_masks):
+        return {agent: {'observation': observations[0, i], 'action_mask': action_masks[0, i]} for agent, i in self.agent_ids.items() if agent in self.agents}
+
+    def check_single_world(self):
+        if self.num_envs != 1:
+            raise ValueError("the dict api steps a single world, use step_arrays for num_envs > 1")
+
+    def render(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,128 @@
+import csv
+import functools
+import json
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+# upper edges (in microseconds) of the latency histogram buckets, the last bucket holds everything slower
+HISTOGRAM_EDGES_US = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class StepProfiler:
+    """ Collects named phase timings and the agent steps taken while an episode runs
+
+    Worlds only create a profiler when the 'profile' option is set. The profiler replaces the
+    instrumented methods of those worlds (and their agents and display) with timed wrappers, so
+    nothing is timed or checked when profiling is off. Phases nest (a step includes its movement)
+    so their times don't add up to the step time. Timings are kept in nanoseconds until
+    end_episode summarizes them, then the summary is appended to the sink file (if any) as a json
+    line (.json/.jsonl) or csv rows (.csv).
+    """
+
+    def __init__(self, sink=None) -> None:
+        """
+        Args:
+            sink (str): the file episode summaries are appended to (None to only keep them in memory)
+        """
+        self.sink = sink
+        self.episodes = list()
+        self.reset()
+
+    def reset(self):
+        # the timings of the current episode
+        self.durations = defaultdict(list)
+        self.steps = 0
+
+    def record(self, name, nanoseconds):
+        self.durations[name].append(nanoseconds)
+
+    def step(self, amount=1):
+        # agent steps taken, used for the calls per step of each phase
+        self.steps += amount
+
+    def instrument(self, obj, phases, steps=None):
+        """ Time calls to some methods of an object (only that instance is changed)
+
+        Args:
+            obj (object): the object to instrument
+            phases (dict): the phase name of each method name
+            steps (dict): for methods which step agents, a function of the call's arguments
+                          returning the number of agent steps taken
+        """
+        steps = steps or dict()
+        for method_name, phase in phases.items():
+            setattr(obj, method_name, self.timed(getattr(obj, method_name), phase, steps.get(method_name)))
+
+    def timed(self, method, phase, steps=None):
+        @functools.wraps(method)
+        def timed_method(*args, **kwargs):
+            if steps is not None:
+                self.step(steps(*args, **kwargs))
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                # (look the list up each call since reset replaces the durations)
+                self.durations[phase].append(time.perf_counter_ns() - start)
+        return timed_method
+
+    def summary(self):
+        """ Summarize the timings of the current episode
+
+        Returns:
+            (dict): the steps and for each phase its calls, calls per step, total, p50, p99
+                    and max latency (in microseconds) and histogram (counts per HISTOGRAM_EDGES_US bucket)
+        """
+        phases = dict()
+        steps = max(self.steps, 1)
+        for name, durations in self.durations.items():
+            durations_us = np.array(durations) / 1000
+            histogram = np.bincount(np.searchsorted(HISTOGRAM_EDGES_US, durations_us), minlength=len(HISTOGRAM_EDGES_US) + 1)
+            phases[name] = {
+                'calls': len(durations),
+                'calls_per_step': len(durations) / steps,
+                'total_ms': float(np.sum(durations_us) / 1000),
+                'p50_us': float(np.percentile(durations_us, 50)),
+                'p99_us': float(np.percentile(durations_us, 99)),
+                'max_us': float(np.max(durations_us)),
+                'histogram': histogram.tolist(),
+            }
+        return {'steps': self.steps, 'phases': phases}
+
+    def end_episode(self, **labels):
+        """ Summarize the episode, write it to the sink and start a new one
+
+        Args:
+            labels: extra values stored with the summary (e.g. the seed)
+        Returns:
+            (dict): the episode summary
+        """
+        summary = {'episode': len(self.episodes), **labels, **self.summary()}
+        self.episodes.append(summary)
+        if self.sink is not None:
+            self.write(summary)
+        self.reset()
+        return summary
+
+    def write(self, summary):
+        if os.path.splitext(self.sink)[1] == '.csv':
+            write_summary_csv(summary, self.sink)
+        else:
+            with open(self.sink, 'a') as sink:
+                sink.write(json.dumps(summary) + '\n')
+
+
+def write_summary_csv(summary, file):
+    """ Append an episode summary to a csv file with one row per phase (the header is written for new files) """
+    labels = {key: value for key, value in summary.items() if key != 'phases'}
+    fieldnames = list(labels) + ['phase', 'calls', 'calls_per_step', 'total_ms', 'p50_us', 'p99_us', 'max_us', 'histogram']
+    new_file = not os.path.exists(file) or os.path.getsize(file) == 0
+    with open(file, 'a', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
+        if new_file:
+            writer.writeheader()
+        for phase, stats in summary['phases'].items():
+            writer.writerow({**labels, 'phase': phase, **stats, 'histogram': ' '.join(map(str, stats['histogram']))})
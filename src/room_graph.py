@@ -0,0 +1,254 @@
+import heapq
+import xml.etree.ElementTree as ElementTree
+from collections import OrderedDict
+import numpy as np
+
+# the gexf room graphs were built on the 256x256 versions of the maps (clean_dialated.png, where the building
+# is drawn), so they match the maps which load with the rooms as movable cells (clean_inverted.png and
+# clean_inverted_resized.png), not clean_dialated_resized.png which loads with the building as walls
+ROOM_GRAPH_MAP_SIZE = 256
+# local searches (each over a few regions) kept by each graph, every victum target adds new ones
+MAX_LOCAL_FIELDS = 64
+
+
+def load_room_graph(gexf_file: str) -> tuple:
+    """ Read the waypoints and edges of a room graph saved by networkx as gexf
+
+    Args:
+        gexf_file (str): the graph file (node ids are "(x, y)" pixel strings)
+    Returns:
+        nodes (np.array): (x, y) of each waypoint, shape (num_nodes, 2)
+        edges (list): (node index, node index, weight) of each edge
+    """
+    root = ElementTree.parse(gexf_file).getroot()
+    # the tags include the gexf namespace
+    namespace = root.tag[:root.tag.index('}') + 1] if root.tag.startswith('{') else ''
+    node_ids = [node.get('id') for node in root.iter(f'{namespace}node')]
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    nodes = np.array([[float(value) for value in node_id.strip('()').split(',')] for node_id in node_ids])
+    edges = list()
+    for edge in root.iter(f'{namespace}edge'):
+        source, target = index[edge.get('source')], index[edge.get('target')]
+        edges.append((source, target, float(edge.get('weight', 1))))
+    return nodes, edges
+
+
+class RoomGraph:
+    """ Plans long paths with a room (waypoint) graph on top of local breadth first searches
+
+    The rooms are the waypoints of the gexf graph, but the graph's edges are rebuilt from the grid:
+    every cell belongs to the region of its closest waypoint (by path length) and regions which touch
+    are connected (the gexf edges were made on the undilated maps and don't always match the walls
+    of the grid, which would send agents back and forth between rooms). Agents head for the
+    waypoint two regions ahead along the shortest graph path, searching only the cells of the regions
+    in between, until the target is within two regions. Searches which can't reach their goal inside
+    those regions fall back to the world's full distance fields.
+    """
+
+    def __init__(self, env, gexf_file: str) -> None:
+        """
+        Args:
+            env (GridWorld): the world the graph's map was loaded into
+            gexf_file (str): the room graph of the world's map
+        """
+        self.env = env
+        nodes, _ = load_room_graph(gexf_file)
+        # waypoints are scaled from the 256x256 map and moved off the walls
+        padding = env.scout_visible_range
+        scale = (env.grid_size - 2 * padding) / ROOM_GRAPH_MAP_SIZE
+        self.waypoints = np.array([self.nearest_movable_cell(y * scale + padding, x * scale + padding) for x, y in nodes])
+        self.regions, self.waypoint_distances = self.build_regions()
+        self.neighbors = self.build_region_graph()
+        self.region_paths = dict()
+        # the most recently used local searches, keyed by (goal cell, regions)
+        self.local_fields = OrderedDict()
+        self.max_local_fields = MAX_LOCAL_FIELDS
+        # reused by every local search so only the cells searched need resetting
+        self.scratch = np.full(len(env.world), np.inf, dtype=np.float32)
+        self.owners = np.zeros(len(env.world), dtype=np.int32)
+
+    def nearest_movable_cell(self, row: float, column: float) -> int:
+        grid = self.env.world.reshape(self.env.grid_size, self.env.grid_size)
+        row, column = int(round(row)), int(round(column))
+        radius = 1
+        while radius < 2 * self.env.grid_size:
+            top, left = max(row - radius, 0), max(column - radius, 0)
+            rows, columns = np.nonzero(grid[top:row + radius + 1, left:column + radius + 1])
+            if len(rows) > 0:
+                closest = np.argmin((rows + top - row) ** 2 + (columns + left - column) ** 2)
+                return self.env.convert_loc_from_2d(columns[closest] + left, rows[closest] + top)
+            radius *= 2
+        raise ValueError("the map has no movable cells")
+
+    def build_regions(self) -> tuple:
+        """ Assign every cell to its closest waypoint with a breadth first search from all waypoints
+
+        Returns:
+            regions (np.array): the waypoint index of each cell (-1 if no waypoint can reach it)
+            distances (np.array): the distance from each cell to its waypoint
+        """
+        num_cells = len(self.env.world)
+        regions = np.full(num_cells, -1, dtype=np.int32)
+        distances = np.full(num_cells, np.inf, dtype=np.float32)
+        regions[self.waypoints] = np.arange(len(self.waypoints))
+        distances[self.waypoints] = 0
+        frontier = self.waypoints
+        distance = 0
+        while len(frontier) > 0:
+            distance += 1
+            neighbors = self.env.transitions[frontier].ravel()
+            labels = np.repeat(regions[frontier], self.env.transitions.shape[1])
+            unreached = regions[neighbors] < 0
+            frontier, first = np.unique(neighbors[unreached], return_index=True)
+            regions[frontier] = labels[unreached][first]
+            distances[frontier] = distance
+        return regions, distances
+
+    def build_region_graph(self) -> list:
+        """ Connect the regions which share a border
+
+        Returns:
+            (list): for each region a dict of neighboring regions and the shortest path length
+                    between their waypoints through the border
+        """
+        neighbors = [dict() for _ in self.waypoints]
+        cells = np.nonzero(self.regions >= 0)[0]
+        for column in range(self.env.transitions.shape[1]):
+            next_cells = self.env.transitions[cells, column]
+            border = (self.regions[next_cells] != self.regions[cells]) & (self.regions[next_cells] >= 0)
+            sources, targets = self.regions[cells[border]], self.regions[next_cells[border]]
+            lengths = self.waypoint_distances[cells[border]] + self.waypoint_distances[next_cells[border]] + 1
+            # keep the shortest crossing between each pair of regions
+            order = np.lexsort((lengths, targets, sources))
+            pairs = np.stack([sources[order], targets[order]], axis=1)
+            _, first = np.unique(pairs, axis=0, return_index=True)
+            for source, target, length in zip(pairs[first, 0].tolist(), pairs[first, 1].tolist(), lengths[order][first].tolist()):
+                length = min(length, neighbors[source].get(target, np.inf))
+                neighbors[source][target] = neighbors[target][source] = length
+        return neighbors
+
+    def region_path(self, source: int, target: int):
+        """ Find the shortest graph path between two waypoints (dijkstra)
+
+        Returns:
+            (tuple): the path length and the waypoints along it (None if they aren't connected)
+        """
+        key = (source, target)
+        if key not in self.region_paths:
+            lengths = {source: 0}
+            previous = dict()
+            queue = [(0, source)]
+            while queue:
+                length, node = heapq.heappop(queue)
+                if node == target:
+                    break
+                if length > lengths[node]:
+                    continue
+                for neighbor, weight in self.neighbors[node].items():
+                    if length + weight < lengths.get(neighbor, np.inf):
+                        lengths[neighbor] = length + weight
+                        previous[neighbor] = node
+                        heapq.heappush(queue, (length + weight, neighbor))
+            path = None
+            if target in lengths:
+                path = [target]
+                while path[-1] != source:
+                    path.append(previous[path[-1]])
+                path = (lengths[target], path[::-1])
+            self.region_paths[key] = path
+        return self.region_paths[key]
+
+    def local_field(self, goal: int, regions: tuple) -> tuple:
+        """ Breadth first search from a goal cell through the cells of some regions only
+
+        The most recently used max_local_fields searches are kept.
+
+        Returns:
+            (tuple): the sorted cells reached and their distances to the goal
+        """
+        key = (goal, regions)
+        if key in self.local_fields:
+            self.local_fields.move_to_end(key)
+        else:
+            scratch = self.scratch
+            scratch[goal] = 0
+            reached = [np.array([goal])]
+            frontier = reached[0]
+            distance = 0
+            while len(frontier) > 0:
+                distance += 1
+                neighbors = self.env.transitions[frontier].ravel()
+                neighbors = neighbors[np.isinf(scratch[neighbors])]
+                neighbors = neighbors[np.isin(self.regions[neighbors], regions)]
+                # drop cells reached from two sides (the last write to owners wins) without sorting
+                order = np.arange(len(neighbors), dtype=np.int32)
+                self.owners[neighbors] = order
+                frontier = neighbors[self.owners[neighbors] == order]
+                scratch[frontier] = distance
+                reached.append(frontier)
+            cells = np.sort(np.concatenate(reached))
+            self.local_fields[key] = cells, scratch[cells].copy()
+            scratch[cells] = np.inf
+            if len(self.local_fields) > self.max_local_fields:
+                self.local_fields.popitem(last=False)
+        return self.local_fields[key]
+
+    def local_distances(self, field: tuple, locs: np.array) -> np.array:
+        # look up cells in a local field (inf outside of it)
+        cells, distances = field
+        i = np.minimum(np.searchsorted(cells, locs), len(cells) - 1)
+        return np.where(cells[i] == locs, distances[i], np.inf)
+
+    def next_goal(self, loc: int, target: int):
+        """ Get the cell to head for on the way to a target and the regions to search for it
+
+        Returns:
+            (tuple): the goal cell and regions (None if the graph can't be used)
+        """
+        region, target_region = int(self.regions[loc]), int(self.regions[target])
+        if region < 0 or target_region < 0:
+            return None
+        if region == target_region:
+            return target, (region,)
+        path = self.region_path(region, target_region)
+        if path is None:
+            return None
+        regions = path[1]
+        if len(regions) <= 3:
+            return target, tuple(sorted(regions))
+        # head for the waypoint two regions ahead so agents don't detour through every waypoint
+        return int(self.waypoints[regions[2]]), tuple(sorted(regions[:3]))
+
+    def action_distances(self, loc: int, target: int) -> np.array:
+        """ Distances used to choose between moving LEFT, DOWN, UP, and RIGHT towards a target
+
+        Args:
+            loc (int): the 1d location of the agent
+            target (int): the 1d location of the target
+        Returns:
+            (np.array): the distance after each move to the next goal (inf for blocked moves)
+        """
+        loc, target = int(loc), int(target)
+        next_locs = self.env.transitions[loc]
+        goal = self.next_goal(loc, target)
+        distances = np.full(len(next_locs), np.inf)
+        if goal is not None:
+            distances = self.local_distances(self.local_field(*goal), next_locs)
+        if np.all(np.isinf(distances)):
+            distances = self.env.distance_field(target)[next_locs].astype(float)
+        return np.where(next_locs == loc, np.inf, distances)
+
+    def distance(self, loc: int, target: int) -> float:
+        """ Estimate the path length between two cells (exact when the target is within two regions) """
+        loc, target = int(loc), int(target)
+        goal = self.next_goal(loc, target)
+        if goal is None:
+            return float(self.env.distance_field(target)[loc])
+        if goal[0] == target:
+            distance = self.local_distances(self.local_field(*goal), loc)
+            if np.isfinite(distance):
+                return float(distance)
+            return float(self.env.distance_field(target)[loc])
+        path_length = self.region_path(int(self.regions[loc]), int(self.regions[target]))[0]
+        # the graph path length doesn't include the distances to and from the waypoints
+        return float(self.waypoint_distances[loc] + path_length + self.waypoint_distances[target])
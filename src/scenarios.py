@@ -0,0 +1,103 @@
+from collections import OrderedDict
+import numpy as np
+
+# the accident locations were chosen on the 256x256 versions of the maps (clean_dialated.png, where the
+# building is drawn), their rooms are the movable cells of the clean_inverted maps
+ACCIDENT_MAP_SIZE = 256
+# the number of accident sites the victums of a scenario are spread over
+NUM_ACCIDENTS = 4
+# cumulative accident probabilities of recently used maps, keyed by (file, grid_size, padding, sigma)
+MAX_CACHED_MASSES = 4
+_accident_cdfs = OrderedDict()
+
+
+def load_accident_centers(mat_file: str) -> np.array:
+    """ Read the accident centers from a gau_locs.mat file (needs scipy)
+
+    Args:
+        mat_file (str): the file, its 'pts' array holds pairs of (x, y) pixels
+    Returns:
+        (np.array): the distinct (x, y) centers, shape (num_centers, 2)
+    """
+    try:
+        import scipy.io
+    except ImportError as error:
+        raise ImportError("scipy is needed to read accident files (pip install scipy)") from error
+    points = scipy.io.loadmat(mat_file)['pts'].reshape(-1, 2)
+    return np.unique(points, axis=0)
+
+
+class ScenarioSampler:
+    """ Draws the starting agent and victum locations of many scenarios at once (with the world's generator)
+
+    Accident sites are drawn from a mixture of gaussians around the centers of the map's accident
+    file (or uniformly over the movable cells without one), victums are spread over the accident
+    sites and agents start anywhere. The probability mass over the movable cells is computed once
+    per map and shared by every sampler.
+    """
+
+    def __init__(self, env) -> None:
+        """
+        Args:
+            env (GridWorld): the world to place agents and victums in (uses its accident_file and accident_sigma options)
+        """
+        self.rng = env.rng
+        self.movable_locations = env.movable_locations
+        self.starts = env.starts
+        self.num_agents = env.num_agents
+        self.num_victums = env.num_victums
+        self.cdf = None
+        if env.accident_file is not None:
+            self.cdf = self.accident_cdf(env)
+
+    def accident_cdf(self, env) -> np.array:
+        key = (env.accident_file, env.grid_size, env.scout_visible_range, env.accident_sigma)
+        if key in _accident_cdfs:
+            _accident_cdfs.move_to_end(key)
+            return _accident_cdfs[key]
+        padding = env.scout_visible_range
+        scale = (env.grid_size - 2 * padding) / ACCIDENT_MAP_SIZE
+        centers = load_accident_centers(env.accident_file) * scale + padding
+        sigma = env.accident_sigma * scale
+        # sum the gaussians (cut off beyond 4 sigma) then keep the movable cells
+        grid_mass = np.zeros((env.grid_size, env.grid_size))
+        reach = int(np.ceil(4 * sigma))
+        for column, row in centers:
+            top, bottom = max(int(row) - reach, 0), min(int(row) + reach + 1, env.grid_size)
+            left, right = max(int(column) - reach, 0), min(int(column) + reach + 1, env.grid_size)
+            rows = np.exp(-(np.arange(top, bottom) - row) ** 2 / (2 * sigma ** 2))
+            columns = np.exp(-(np.arange(left, right) - column) ** 2 / (2 * sigma ** 2))
+            grid_mass[top:bottom, left:right] += np.outer(rows, columns)
+        mass = grid_mass.ravel()[self.movable_locations]
+        if mass.sum() == 0:
+            # the centers are all in walls (e.g. a map loaded with the rooms as walls)
+            raise ValueError(f"no movable cell of {env.map_file} is near the accident centers of {env.accident_file}")
+        cdf = np.cumsum(mass)
+        cdf /= cdf[-1]
+        cdf.setflags(write=False)
+        _accident_cdfs[key] = cdf
+        if len(_accident_cdfs) > MAX_CACHED_MASSES:
+            _accident_cdfs.popitem(last=False)
+        return cdf
+
+    def sample_accident_locations(self, shape) -> np.array:
+        if self.cdf is None:
+            return self.movable_locations[self.rng.integers(0, len(self.movable_locations), shape)]
+        # cells with no mass are never drawn (the clip only guards against rounding)
+        cells = np.minimum(np.searchsorted(self.cdf, self.rng.random(shape), side='right'), len(self.cdf) - 1)
+        return self.movable_locations[cells]
+
+    def sample(self, num_scenarios: int) -> tuple:
+        """ Draw the starting locations of several scenarios
+
+        Args:
+            num_scenarios (int): the number of scenarios
+        Returns:
+            victum_locations (np.array): shape (num_scenarios, num_victums)
+            agent_locations (np.array): shape (num_scenarios, num_agents)
+        """
+        accident_locations = self.sample_accident_locations((num_scenarios, NUM_ACCIDENTS))
+        accidents = self.rng.integers(0, NUM_ACCIDENTS, (num_scenarios, self.num_victums))
+        victum_locations = np.take_along_axis(accident_locations, accidents, axis=1)
+        agent_locations = self.starts[self.rng.integers(0, len(self.starts), (num_scenarios, self.num_agents))]
+        return victum_locations, agent_locations
@@ -4,8 +4,9 @@ from src.environments import SARGridWorld, default_options
 from src.agents import ScoutAgent, RescueAgent
 
 class Simulation:
-    def __init__(self, env=SARGridWorld(default_options)) -> None:
-        self.grid_world = env
+    def __init__(self, env=None) -> None:
+        # build the default environment here rather than once at import
+        self.grid_world = env if env is not None else SARGridWorld(default_options)
         # dictionary for holding agent classes
         self.agent_dict = dict()
         self.initialize_agents(self.grid_world)
@@ -14,39 +15,87 @@ class Simulation:
         # get agents for environment
         scouts = env.scouts
         rescuers = env.rescuers
-        # initialize scouts
+        # initialize scouts (each agent gets its own random stream from the environment's seed)
         scout_actions = np.arange(0,4)
         for i in scouts:
-            agent = ScoutAgent(scout_actions, env)
+            agent = ScoutAgent(scout_actions, env, env.agent_rng(i))
             self.agent_dict[i] = agent
         # initialize rescuers
         rescuer_actions = np.arange(0,6)
         for j in rescuers:
-            agent = RescueAgent(rescuer_actions, env)
+            agent = RescueAgent(rescuer_actions, env, env.agent_rng(j))
             self.agent_dict[j] = agent
+        # time the policies along with the world's steps
+        profiler = getattr(env, 'profiler', None)
+        if profiler is not None:
+            for i, agent in self.agent_dict.items():
+                profiler.instrument(agent, {'policy': 'rescuer_policy' if i in rescuers else 'scout_policy'})
         
-    def run_simulation(self):
+    def run_simulation(self, max_rounds=None, recorder=None):
+        """ Step every agent in turn until the game terminates
+
+        Args:
+            max_rounds (int): the maximum number of rounds to run (None runs until termination)
+            recorder (TrajectoryRecorder): records the state after every round (closed at the end)
+        Returns:
+            (dict): statistics about the episode
+        """
         env_agents = self.grid_world.agents
         terminated = False
+        rounds = 0
+        communications = 0
 
         agent_actions = list()
         for i in self.agent_dict:
             obs = self.grid_world.reset_agent(i)
             act = self.agent_dict[i].policy(obs)
             agent_actions.append(act)
+        if recorder is not None:
+            recorder.record(self.grid_world)
+            round_actions = [None] * len(agent_actions)
+            round_rewards = np.zeros(len(agent_actions))
 
-        while not terminated:
+        while not terminated and (max_rounds is None or rounds < max_rounds):
+            rounds += 1
             for i in env_agents:
                 agent = self.agent_dict[i]
                 act = agent_actions[i]
                 obs, reward, terminated = self.grid_world.step_agent(i, act)
+                if recorder is not None:
+                    round_actions[i], round_rewards[i] = act, reward
+                # failed communications are penalized
+                if act == SARGridWorld.Actions.COMMUNICATE and reward != -10:
+                    communications += 1
 
                 # setup the next action for the agent
                 agent_actions[i] = agent.policy(obs)
                 # termination must break the loop or other agents will reset it
                 if(terminated): break
+            if recorder is not None:
+                recorder.record(self.grid_world, round_actions, round_rewards)
+                round_actions[:] = [None] * len(round_actions)
+                round_rewards[:] = 0
         self.grid_world.stop_simulation()
-            
+        if recorder is not None:
+            recorder.close()
+        stats = self.get_episode_statistics(rounds, terminated, communications)
+        if getattr(self.grid_world, 'profiler', None) is not None:
+            stats['profile'] = self.grid_world.profiler.end_episode(seed=self.grid_world.seed if isinstance(self.grid_world.seed, int) else None)
+        return stats
+
+    def get_episode_statistics(self, rounds, terminated, communications):
+        env = self.grid_world
+        # victums count as rescued once they are left at a goal
+        carried = np.isin(np.arange(env.num_victums), env.agents_carrying_victum)
+        rescued = np.isin(env.victum_locations, env.goals) & ~carried
+        visited = env.location_visits[env.movable_locations] > 0
+        return {
+            'rounds': rounds,
+            'terminated': bool(terminated),
+            'victums_rescued': int(np.sum(rescued)),
+            'coverage': float(np.mean(visited)),
+            'communications': communications,
+        }
 
     # environment must assign rewards to certain joint action state combinations from the network
     # Joint_Action_Space = ...
@@ -0,0 +1,144 @@
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+from src.map_factory import ImageGridFactory
+from src.simulation import Simulation
+
+# episode statistics averaged by aggregate_results
+METRICS = ['rounds', 'terminated', 'victums_rescued', 'coverage', 'communications', 'seconds']
+
+
+def build_sweep_configs(seeds, map_files=(None,), agent_counts=(5,), rescuer_counts=(2,), visible_ranges=(2,), base_options=None):
+    """ Build one episode config for every combination of the swept values
+
+    Args:
+        seeds (list): random seeds (one episode per seed for every combination)
+        map_files (list): map files to load (None for an open grid of base_options['grid_size'])
+        agent_counts (list): total numbers of agents
+        rescuer_counts (list): numbers of rescuers
+        visible_ranges (list): scout visible ranges
+        base_options (dict): options shared by every episode
+    Returns:
+        (list): episode configs (environment options, each with its own seed)
+    """
+    base_options = {**default_options, **(base_options or {})}
+    configs = list()
+    for map_file, num_agents, num_rescuers, visible_range, seed in itertools.product(map_files, agent_counts, rescuer_counts, visible_ranges, seeds):
+        config = base_options.copy()
+        config.update({
+            'map_file': map_file,
+            'num_agents': num_agents,
+            'num_rescuers': num_rescuers,
+            'scout_visible_range': visible_range,
+            'seed': seed,
+        })
+        configs.append(config)
+    return configs
+
+
+def run_episode(config, max_rounds=1000):
+    """ Run a single headless episode (this is what each worker process runs)
+
+    Args:
+        config (dict): environment options (including the episode seed)
+        max_rounds (int): the maximum number of rounds before the episode is stopped
+    Returns:
+        (dict): the config values which identify the episode and its statistics
+    """
+    # the seed option seeds the world and every agent's stream
+    options = config.copy()
+    if options['map_file'] is not None:
+        # maps are cached by the factory, so each worker only reads a map once
+        grid = ImageGridFactory.load_grid(options['map_file'], options['scout_visible_range'])
+        options['grid_size'] = grid.shape[0]
+    # workers can't open windows, but they can record frames (see render_interval and frame_size)
+    if options['render_mode'] != 'rgb_array':
+        options['render_mode'] = None
+    elif options['video_file'] is not None:
+        options['video_file'] = episode_video_file(options)
+    start = time.perf_counter()
+    simulation = Simulation(SARGridWorld(options))
+    stats = simulation.run_simulation(max_rounds)
+    stats['seconds'] = time.perf_counter() - start
+    # profiled episodes report the latency of each phase (see the profile option)
+    profile = stats.pop('profile', None)
+    if profile is not None:
+        for phase, phase_stats in profile['phases'].items():
+            stats[f'{phase}_p50_us'] = phase_stats['p50_us']
+            stats[f'{phase}_p99_us'] = phase_stats['p99_us']
+    result = {key: config.get(key) for key in ['seed', 'map_file', 'num_agents', 'num_rescuers', 'scout_visible_range']}
+    result['grid_size'] = options['grid_size']
+    if options['render_mode'] == 'rgb_array':
+        result['video_file'] = options['video_file']
+    result.update(stats)
+    return result
+
+
+def episode_video_file(options):
+    """ Give an episode its own video file (or image directory) so parallel episodes don't write to the same one
+
+    The swept values are added to the name, e.g. episode.avi becomes
+    episode_6_rooms_clean_inverted_a5_r2_v2_s0.avi (map directory and name, agents, rescuers, visible range and seed).
+    """
+    root, extension = os.path.splitext(options['video_file'])
+    if options['map_file'] is None:
+        map_name = f"grid{options['grid_size']}"
+    else:
+        map_dir, map_file = os.path.split(os.path.splitext(options['map_file'])[0])
+        map_name = f"{os.path.basename(map_dir)}_{map_file}"
+    seed = options['seed'] if isinstance(options['seed'], int) else None
+    return f"{root}_{map_name}_a{options['num_agents']}_r{options['num_rescuers']}_v{options['scout_visible_range']}_s{seed}{extension}"
+
+
+def run_sweep(configs, max_workers=None, max_rounds=1000):
+    """ Run episodes in parallel worker processes, yielding each result as it finishes
+
+    Args:
+        configs (list): episode configs (see build_sweep_configs)
+        max_workers (int): the number of worker processes (defaults to the number of cpus)
+        max_rounds (int): the maximum number of rounds for each episode
+    Yields:
+        (dict): the result of each episode (in order of completion)
+    """
+    max_workers = max_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_episode, config, max_rounds) for config in configs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def aggregate_results(results, group_by=('map_file', 'num_agents', 'num_rescuers', 'scout_visible_range')):
+    """ Average the episode statistics over the episodes sharing the same group_by values
+
+    Args:
+        results (list): episode results from run_sweep
+        group_by (tuple): the result keys which identify a group
+    Returns:
+        (list): one row per group with the number of episodes and the mean of each metric
+    """
+    groups = dict()
+    for result in results:
+        key = tuple(result[column] for column in group_by)
+        groups.setdefault(key, list()).append(result)
+    table = list()
+    for key, episodes in groups.items():
+        row = dict(zip(group_by, key))
+        row['episodes'] = len(episodes)
+        for metric in METRICS:
+            row[metric] = float(np.mean([episode[metric] for episode in episodes]))
+        table.append(row)
+    return table
+
+
+def write_results_csv(rows, file):
+    """ Write result rows (dicts with the same keys) to a csv file """
+    with open(file, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,181 @@
+import json
+import os
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+
+# recorded columns: (dtype, whether the column has a value per agent (or per victum))
+TRAJECTORY_COLUMNS = {
+    'agent_locations': (np.int32, 'agents'),
+    'actions': (np.int8, 'agents'), # Actions values, 0 for agents which weren't stepped
+    'rewards': (np.float32, 'agents'),
+    'victum_locations': (np.int32, 'victums'),
+    'carrying': (np.int16, 'agents'), # the victum each agent carries (-1 if none)
+}
+# what each agent knows, only recorded with record_knowledge (one row per agent each round)
+KNOWLEDGE_COLUMNS = {
+    'known_agent_locations': (np.int32, 'agents'),
+    'known_victum_locations': (np.int32, 'victums'),
+    'last_agent_communications': (np.int32, 'agents'),
+}
+
+
+class TrajectoryRecorder:
+    """ Records the state of a world after every round into preallocated chunk buffers
+
+    Each full chunk is written to its own compressed file (chunk_000000.npz, ...) in the
+    trajectory directory along with meta.json, which holds the world options needed to replay it.
+    Row 0 is the state after the agents are reset, every later row the state after a round
+    (agents which weren't stepped because the game terminated have action 0).
+    """
+
+    def __init__(self, path: str, env, chunk_size: int = 1024, record_knowledge: bool = False) -> None:
+        """
+        Args:
+            path (str): the trajectory directory (created if needed)
+            env (SARGridWorld): the world being recorded
+            chunk_size (int): the number of rounds in each chunk file
+            record_knowledge (bool): also record what each agent knows (num_agents rows per round)
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.record_knowledge = record_knowledge
+        self.columns = {**TRAJECTORY_COLUMNS, **(KNOWLEDGE_COLUMNS if record_knowledge else dict())}
+        sizes = {'agents': env.num_agents, 'victums': env.num_victums}
+        self.buffers = dict()
+        for name, (dtype, size) in self.columns.items():
+            shape = (chunk_size, env.num_agents, sizes[size]) if name in KNOWLEDGE_COLUMNS else (chunk_size, sizes[size])
+            self.buffers[name] = np.zeros(shape, dtype=dtype)
+        self.row = 0
+        self.chunks = 0
+        self.rounds = 0
+        os.makedirs(path, exist_ok=True)
+        # the options replay needs to rebuild the world (a seed Generator can't be saved, and isn't needed)
+        self.options = {key: getattr(env, key) for key in default_options if is_json_value(getattr(env, key))}
+        self.options['seed'] = None
+
+    def record(self, env, actions=None, rewards=None):
+        """ Record the world's state at the end of a round
+
+        Args:
+            env (SARGridWorld): the recorded world
+            actions (list): the action of each agent this round (None for agents which weren't stepped)
+            rewards (np.array): the reward of each agent this round
+        """
+        row = self.row
+        buffers = self.buffers
+        buffers['agent_locations'][row] = env.agent_locations
+        buffers['victum_locations'][row] = env.victum_locations
+        buffers['carrying'][row] = env.agents_carrying_victum
+        buffers['actions'][row] = 0
+        if actions is not None:
+            buffers['actions'][row] = [0 if action is None else action.value for action in actions]
+        buffers['rewards'][row] = 0 if rewards is None else rewards
+        if self.record_knowledge:
+            buffers['known_agent_locations'][row] = env.known_agent_locations
+            buffers['known_victum_locations'][row] = env.known_victum_locations
+            buffers['last_agent_communications'][row] = env.last_agent_communications
+        self.row += 1
+        self.rounds += 1
+        if self.row == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        # write the filled rows of the buffers as the next chunk
+        if self.row == 0:
+            return
+        chunk_file = os.path.join(self.path, f'chunk_{self.chunks:06d}.npz')
+        np.savez_compressed(chunk_file, **{name: buffer[:self.row] for name, buffer in self.buffers.items()})
+        self.chunks += 1
+        self.row = 0
+
+    def close(self):
+        """ Write the last chunk and the meta data """
+        self.flush()
+        meta = {'options': self.options, 'rounds': self.rounds, 'chunks': self.chunks, 'record_knowledge': self.record_knowledge}
+        with open(os.path.join(self.path, 'meta.json'), 'w') as meta_file:
+            json.dump(meta, meta_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def is_json_value(value):
+    return value is None or isinstance(value, (bool, int, float, str, list, tuple))
+
+
+class TrajectoryReader:
+    """ Reads a recorded trajectory one chunk at a time """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): the trajectory directory written by TrajectoryRecorder
+        """
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as meta_file:
+            meta = json.load(meta_file)
+        self.options = meta['options']
+        self.num_rounds = meta['rounds']
+        self.num_chunks = meta['chunks']
+        self.record_knowledge = meta['record_knowledge']
+
+    def read_chunk(self, chunk: int) -> dict:
+        with np.load(os.path.join(self.path, f'chunk_{chunk:06d}.npz')) as chunk_file:
+            return {name: chunk_file[name] for name in chunk_file.files}
+
+    def read(self, name: str) -> np.array:
+        """ Read a whole column (e.g. 'rewards') with a row per round """
+        return np.concatenate([self.read_chunk(chunk)[name] for chunk in range(self.num_chunks)])
+
+    def rounds(self):
+        """ Iterate over the recorded rounds
+
+        Yields:
+            (dict): the recorded arrays of each round
+        """
+        for chunk in range(self.num_chunks):
+            columns = self.read_chunk(chunk)
+            for row in range(len(columns['agent_locations'])):
+                yield {name: column[row] for name, column in columns.items()}
+
+
+def replay_trajectory(path: str, options=None) -> SARGridWorld:
+    """ Draw a recorded trajectory with the world's display without simulating it again
+
+    The visit maps are rebuilt from the recorded locations (every stepped agent visits its cell).
+    Without recorded knowledge the agents are shown knowing nothing.
+
+    Args:
+        path (str): the trajectory directory
+        options (dict): options overriding the recorded ones, e.g. {'render_mode': 'rgb_array',
+                        'video_file': 'episode.avi'} to export frames or {'render_mode': 'human'}
+    Returns:
+        (SARGridWorld): the world in its final recorded state
+    """
+    reader = TrajectoryReader(path)
+    env = SARGridWorld({**reader.options, **(options or dict())})
+    for i, state in enumerate(reader.rounds()):
+        load_round(env, state, visit=i > 0)
+        if env.display is not None:
+            env.display.visit(env)
+    env.stop_simulation()
+    return env
+
+
+def load_round(env, state, visit=True):
+    # put the recorded state into the world, moving the changed ids of the occupancy indexes
+    for agent_i in np.nonzero(env.agent_locations != state['agent_locations'])[0]:
+        env.set_agent_1d_loc(agent_i, int(state['agent_locations'][agent_i]))
+    for vic_i in np.nonzero(env.victum_locations != state['victum_locations'])[0]:
+        env.set_victum_1d_loc(vic_i, int(state['victum_locations'][vic_i]))
+    env.agents_carrying_victum[:] = state['carrying']
+    if visit:
+        for agent_i in np.nonzero(state['actions'])[0]:
+            env.update_map_with_visit(agent_i, int(env.agent_locations[agent_i]))
+    for name in KNOWLEDGE_COLUMNS:
+        if name in state:
+            getattr(env, name)[:] = state[name]
@@ -0,0 +1,243 @@
+import numpy as np
+from collections import OrderedDict
+
+from src.environments import GridWorld, SARGridWorld
+from src.scenarios import ScenarioSampler
+
+
+class VectorSARGridWorld(GridWorld):
+    """ A batch of independent search and rescue worlds which share the same grid
+
+    The state of every world is stacked along a leading batch axis (agent and victum locations,
+    visit maps and agent knowledge) and all worlds are stepped at once with array operations.
+    Worlds which terminate are reset automatically with new random agent and victum locations.
+
+    Unlike SARGridWorld.step_agent, all agents in a world act simultaneously. Each step is
+    resolved in this order:
+        1. pickups and dropoffs (a pickup takes the highest numbered victum at the agent's location)
+        2. communication between agents in range of their positions before moving
+           (unknown victum locations are copied from the lowest numbered agent that knows them)
+        3. movement (blocked by walls), carried victums moving with their rescuers
+        4. visit map updates
+        5. perception of the agents and victums in range of the new positions
+    """
+    Actions = SARGridWorld.Actions
+
+    def __init__(self, options, num_envs, auto_reset=True) -> None:
+        """
+        Args:
+            options (dict): the same options used by SARGridWorld
+            num_envs (int): the number of worlds in the batch
+            auto_reset (bool): whether to reset worlds as soon as they terminate
+        """
+        self.unpack_options(options)
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        self.initialize_rng()
+        grid = self.build_grid()
+        self.populate_grid(grid.ravel())
+        self.initialize_agent_data()
+        # transition table column for each action value (-1 for actions which don't move)
+        self.action_columns = np.full(len(self.Actions) + 1, -1)
+        for action, column in SARGridWorld.transition_columns.items():
+            self.action_columns[action.value] = column
+        self.reset()
+
+    def populate_grid(self, grid):
+        # grid representing world 0 wall, 1 movable (shared by every world in the batch)
+        self.world = grid
+        self.movable_locations = self.find_movable_locations(grid)
+        self.wall_mask = self.world == 0
+        self.transitions = self.build_transition_table()
+        self.distance_fields = OrderedDict()
+        self.starts = self.movable_locations
+        self.goals = self.movable_locations[-3:-1]
+        self.scenario_sampler = ScenarioSampler(self)
+        # visit maps are copied from these when a world is reset
+        visit_dtype = np.dtype(self.visit_dtype)
+        if np.issubdtype(visit_dtype, np.integer) and self.max_pheromone > np.iinfo(visit_dtype).max:
+            raise ValueError(f"max_pheromone {self.max_pheromone} does not fit in visit_dtype {visit_dtype}")
+        self.empty_agent_visits = np.zeros(len(grid), dtype=visit_dtype)
+        if np.issubdtype(visit_dtype, np.floating):
+            self.empty_agent_visits[self.wall_mask] = np.inf
+        self.empty_location_visits = np.zeros(len(grid))
+        self.empty_location_visits[self.wall_mask] = np.inf
+
+    def initialize_agent_data(self):
+        num_envs, num_agents, num_victums, num_cells = self.num_envs, self.num_agents, self.num_victums, len(self.world)
+        self.agents = np.arange(0, num_agents)
+        self.rescuers = self.agents[:self.num_rescuers]
+        self.scouts = self.agents[self.num_rescuers:]
+        self.visible_ranges = np.where(np.isin(self.agents, self.rescuers), self.rescuer_visible_range, self.scout_visible_range)
+        # per world state
+        self.agent_locations = np.zeros((num_envs, num_agents), dtype=int)
+        self.victum_locations = np.zeros((num_envs, num_victums), dtype=int)
+        self.agent_location_visits = np.zeros((num_envs, num_agents, num_cells), dtype=self.empty_agent_visits.dtype)
+        self.location_visits = np.zeros((num_envs, num_cells))
+        self.last_agent_communications = np.zeros((num_envs, num_agents, num_agents), dtype=int)
+        self.known_agent_locations = np.zeros((num_envs, num_agents, num_agents), dtype=int)
+        self.known_victum_locations = np.zeros((num_envs, num_agents, num_victums), dtype=int)
+        self.agents_carrying_victum = np.zeros((num_envs, num_agents), dtype=int)
+        self.step_count = np.zeros((num_envs, num_agents))
+
+    def get_scout_actions(self):
+        return SARGridWorld.get_scout_actions(self)
+
+    def get_rescuer_actions(self):
+        return SARGridWorld.get_rescuer_actions(self)
+
+    def reset(self):
+        """ Reset every world in the batch
+
+        Returns:
+            (dict): the observation arrays for every world
+        """
+        self.reset_worlds(np.arange(self.num_envs))
+        return self.get_observations()
+
+    def reset_worlds(self, envs):
+        """ Place the agents and victums of some worlds at new random locations and clear their state
+
+        Args:
+            envs (np.array): the indices of the worlds to reset
+        """
+        num_reset = len(envs)
+        if num_reset == 0:
+            return
+        # victums are placed at a few random accident locations in each world
+        self.victum_locations[envs], self.agent_locations[envs] = self.scenario_sampler.sample(num_reset)
+        self.agent_location_visits[envs] = self.empty_agent_visits
+        self.location_visits[envs] = self.empty_location_visits
+        self.last_agent_communications[envs] = 0
+        self.known_agent_locations[envs] = -1
+        self.known_victum_locations[envs] = -1
+        self.agents_carrying_victum[envs] = -1
+        self.step_count[envs] = 0
+
+    def get_observations(self):
+        """ Get the observation arrays of every world (these are views of the live state)
+
+        Returns:
+            (dict): arrays with the batch as the leading axis
+        """
+        return {
+            'agent_locations': self.agent_locations,
+            'known_agent_locations': self.known_agent_locations,
+            'known_victum_locations': self.known_victum_locations,
+            'last_agent_communications': self.last_agent_communications,
+            'carrying': self.agents_carrying_victum >= 0,
+            'location_visits': self.location_visits,
+            'goals': self.goals,
+        }
+
+    def action_values(self, actions):
+        # accept either Actions or their integer values
+        actions = np.asarray(actions)
+        if actions.dtype == object:
+            actions = np.vectorize(lambda action: action.value, otypes=[int])(actions)
+        return actions.reshape(self.num_envs, self.num_agents)
+
+    def step(self, actions):
+        """ Step every agent in every world at once
+
+        Args:
+            actions (np.array): the action (or action value) of each agent, shape (num_envs, num_agents)
+        Returns:
+            observations (dict): the observation arrays (of the reset state for worlds which terminated)
+            rewards (np.array): the reward of each agent, shape (num_envs, num_agents)
+            dones (np.array): whether each world terminated this step, shape (num_envs,)
+        """
+        actions = self.action_values(actions)
+        self.step_count += 1
+        # reward is -1 normally for each timestep
+        rewards = np.full((self.num_envs, self.num_agents), -1)
+        dropped = self.apply_pickups_and_dropoffs(actions, rewards)
+        self.apply_communication(actions == self.Actions.COMMUNICATE.value, rewards)
+        new_locs = self.move_agents(actions)
+        self.update_maps_with_visits(new_locs)
+        self.update_perception()
+        # the game terminates when a dropoff leaves every victum in a goal
+        dones = np.any(dropped, axis=1) & np.all(np.isin(self.victum_locations, self.goals), axis=1)
+        if self.auto_reset:
+            self.reset_worlds(np.nonzero(dones)[0])
+        return self.get_observations(), rewards, dones
+
+    def locations_in_range(self, locs, other_locs):
+        """ Check which other locations are within each agent's visible range
+
+        Args:
+            locs (np.array): agent locations, shape (num_envs, num_agents)
+            other_locs (np.array): locations to test, shape (num_envs, n)
+        Returns:
+            (np.array): boolean array of shape (num_envs, num_agents, n)
+        """
+        x, y = locs % self.grid_size, locs // self.grid_size
+        other_x, other_y = other_locs % self.grid_size, other_locs // self.grid_size
+        dist = np.abs(x[:, :, None] - other_x[:, None, :]) + np.abs(y[:, :, None] - other_y[:, None, :])
+        return dist <= self.visible_ranges[None, :, None]
+
+    def apply_pickups_and_dropoffs(self, actions, rewards):
+        # pickup the highest numbered victum at the agent's location
+        pickup = actions == self.Actions.PICKUP.value
+        at_victum = self.agent_locations[:, :, None] == self.victum_locations[:, None, :]
+        found = pickup & np.any(at_victum, axis=2)
+        last_victum = self.num_victums - 1 - np.argmax(at_victum[:, :, ::-1], axis=2)
+        self.agents_carrying_victum[found] = last_victum[found]
+        rewards[pickup] = np.where(found[pickup], 10, -10)
+        # dropoff succeeds if a victum is being carried
+        dropoff = actions == self.Actions.DROPOFF.value
+        dropped = dropoff & (self.agents_carrying_victum >= 0)
+        self.agents_carrying_victum[dropped] = -1
+        rewards[dropoff] = np.where(dropped[dropoff], 10, -10)
+        return dropped
+
+    def apply_communication(self, communicating, rewards):
+        # agents communicate with every other agent in range of their current position
+        in_range = self.locations_in_range(self.agent_locations, self.agent_locations)
+        in_range &= ~np.eye(self.num_agents, dtype=bool)[None, :, :]
+        talking = communicating[:, :, None] & in_range
+        succeeded = np.any(talking, axis=2)
+        rewards[communicating & ~succeeded] = -10
+        if not np.any(succeeded):
+            return
+        # copy unknown victum locations from the lowest numbered agent in range that knows them
+        known = self.known_victum_locations
+        knows = talking[:, :, :, None] & (known[:, None, :, :] >= 0)
+        source = np.argmax(knows, axis=2)
+        envs = np.arange(self.num_envs)[:, None, None]
+        victums = np.arange(self.num_victums)[None, None, :]
+        shared = known[envs, source, victums]
+        np.copyto(known, shared, where=(known < 0) & np.any(knows, axis=2))
+        # both agents record the communication
+        step_counts = np.broadcast_to(self.step_count[:, :, None], talking.shape)
+        self.last_agent_communications[talking] = step_counts[talking]
+        talked_to = talking.transpose(0, 2, 1)
+        self.last_agent_communications[talked_to] = np.broadcast_to(self.step_count[:, None, :], talking.shape)[talked_to]
+
+    def move_agents(self, actions):
+        # agents stop at walls and the edges of the grid
+        columns = self.action_columns[actions]
+        moving = columns >= 0
+        new_locs = self.agent_locations.copy()
+        new_locs[moving] = self.transitions[self.agent_locations[moving], columns[moving]]
+        self.agent_locations[:] = new_locs
+        # carried victums move with their rescuers
+        carrying = self.agents_carrying_victum >= 0
+        envs, agents = np.nonzero(carrying)
+        self.victum_locations[envs, self.agents_carrying_victum[envs, agents]] = new_locs[envs, agents]
+        return new_locs
+
+    def update_maps_with_visits(self, new_locs):
+        envs, agents = np.indices(new_locs.shape)
+        visits = self.agent_location_visits[envs, agents, new_locs]
+        visited = ~self.wall_mask[new_locs] & (visits < self.max_pheromone)
+        self.agent_location_visits[envs[visited], agents[visited], new_locs[visited]] += 1
+        np.add.at(self.location_visits, (envs[visited], new_locs[visited]), 1)
+
+    def update_perception(self):
+        for known_locations, locs in [(self.known_agent_locations, self.agent_locations), (self.known_victum_locations, self.victum_locations)]:
+            in_range = self.locations_in_range(self.agent_locations, locs)
+            seen = np.broadcast_to(locs[:, None, :], in_range.shape)
+            known_locations[in_range] = seen[in_range]
+        # agents are always communicating with themselves
+        self.last_agent_communications[:, self.agents, self.agents] = self.step_count
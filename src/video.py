@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import cv2
+
+# codecs used for the supported video file types
+VIDEO_CODECS = {
+    '.avi': 'MJPG',
+    '.mp4': 'mp4v',
+}
+
+
+class FrameWriter:
+    """ Streams rgb frames to a video file, or to numbered png images if the path
+    isn't a video file, one frame at a time so an episode never has to fit in memory
+    """
+
+    def __init__(self, path: str, fps: int = 30) -> None:
+        """
+        Args:
+            path (str): a video file (.avi or .mp4) or a directory for the images
+            fps (int): the frame rate of the video
+        """
+        self.path = path
+        self.fps = fps
+        self.frame_count = 0
+        self.video = None
+        self.extension = os.path.splitext(path)[1].lower()
+        if self.extension not in VIDEO_CODECS:
+            os.makedirs(path, exist_ok=True)
+
+    def write(self, frame: np.array):
+        """ Write a single frame
+
+        Args:
+            frame (np.array): an rgb image of shape (height, width, 3)
+        """
+        # opencv expects bgr images
+        frame = cv2.cvtColor(np.ascontiguousarray(frame, dtype=np.uint8), cv2.COLOR_RGB2BGR)
+        if self.extension in VIDEO_CODECS:
+            if self.video is None:
+                # the video size is set by the first frame
+                height, width = frame.shape[:2]
+                fourcc = cv2.VideoWriter_fourcc(*VIDEO_CODECS[self.extension])
+                self.video = cv2.VideoWriter(self.path, fourcc, self.fps, (width, height))
+                # opencv drops every frame without an error when the codec or path isn't supported
+                if not self.video.isOpened():
+                    self.video = None
+                    raise OSError(f"could not open {self.path} for writing with the {VIDEO_CODECS[self.extension]} codec")
+            self.video.write(frame)
+        else:
+            image_file = os.path.join(self.path, f'frame_{self.frame_count:06d}.png')
+            if not cv2.imwrite(image_file, frame):
+                raise OSError(f"could not write {image_file}")
+        self.frame_count += 1
+
+    def close(self):
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,196 @@
+import copy
+import sys
+import numpy as np
+
+
+class DenseVisitMemory:
+    """ The per-agent visit maps as one (num_agents, num_cells) array
+
+    Lookups and updates are single array operations, but every agent holds a count for every
+    cell of the map whether it visited it or not. Float maps mark walls with infinity, integer
+    maps (uint8/uint16) can't hold infinity so walls are left at 0 (worlds mask them with their
+    wall_mask). Indexing (memory[agent], memory[agent, cells]) and np.asarray read the array.
+    """
+
+    def __init__(self, num_agents: int, wall_mask: np.array, dtype='float64') -> None:
+        """
+        Args:
+            num_agents (int): the number of agents
+            wall_mask (np.array): whether each cell of the world is a wall
+            dtype (str): dtype of the counts
+        """
+        self.num_agents = num_agents
+        self.wall_mask = wall_mask
+        self.dtype = np.dtype(dtype)
+        self.visits = np.zeros((num_agents, len(wall_mask)), dtype=self.dtype)
+        if np.issubdtype(self.dtype, np.floating):
+            self.visits[:, wall_mask] = np.inf
+
+    @property
+    def shape(self):
+        return self.visits.shape
+
+    @property
+    def nbytes(self):
+        return self.visits.nbytes
+
+    def __getitem__(self, key):
+        return self.visits[key]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.visits if dtype is None else self.visits.astype(dtype)
+
+    def count(self, agent_i: int, cell: int):
+        return self.visits[agent_i, cell]
+
+    def counts(self, agents: np.array, cells: np.array) -> np.array:
+        """ Get the visits of several (agent, cell) pairs """
+        return self.visits[agents, cells]
+
+    def increment(self, agent_i: int, cell: int):
+        self.visits[agent_i, cell] += 1
+
+    def add(self, agents: np.array, cells: np.array):
+        # (unbuffered so pairs can repeat)
+        np.add.at(self.visits, (agents, cells), 1)
+
+    def subtract(self, agents: np.array, cells: np.array):
+        # (subtracting rather than adding -1, which unsigned maps can't hold)
+        np.subtract.at(self.visits, (agents, cells), 1)
+
+    def clear(self, agent_i: int) -> tuple:
+        """ Forget an agent's visits
+
+        Returns:
+            cells (np.array): the cells the agent had visited
+            counts (np.array): the agent's visits to each of them
+        """
+        row = self.visits[agent_i]
+        cells = np.nonzero((row != 0) & ~self.wall_mask)[0]
+        counts = row[cells].copy()
+        row[cells] = 0
+        return cells, counts
+
+    def copy(self):
+        memory = copy.copy(self)
+        memory.visits = self.visits.copy()
+        return memory
+
+    def copy_from(self, other):
+        np.copyto(self.visits, other.visits)
+
+
+class SparseVisitMemory:
+    """ The per-agent visit maps as a dict of visited cells for each agent
+
+    Memory grows with the number of distinct cells each agent has visited rather than with the
+    size of the map, at the cost of a dict lookup per visit (a python int key and slot, around a
+    hundred bytes per visited cell against 1 to 8 for each cell of a dense row). Cells which
+    were never visited (and walls) hold no entry. Reads through indexing or np.asarray build
+    the dense rows (with the same wall values as DenseVisitMemory), so only use them for
+    inspection.
+    """
+
+    def __init__(self, num_agents: int, wall_mask: np.array, dtype='float64') -> None:
+        """
+        Args:
+            num_agents (int): the number of agents
+            wall_mask (np.array): whether each cell of the world is a wall
+            dtype (str): dtype of the dense rows built from the counts
+        """
+        self.num_agents = num_agents
+        self.wall_mask = wall_mask
+        self.dtype = np.dtype(dtype)
+        self.wall_value = np.inf if np.issubdtype(self.dtype, np.floating) else 0
+        self.rows = [dict() for _ in range(num_agents)]
+
+    @property
+    def shape(self):
+        return (self.num_agents, len(self.wall_mask))
+
+    @property
+    def nbytes(self):
+        # the dicts and their int keys (the small int counts are shared by the interpreter)
+        return sys.getsizeof(self.rows) + sum(sys.getsizeof(row) + len(row) * sys.getsizeof(len(self.wall_mask)) for row in self.rows)
+
+    def row(self, agent_i: int) -> np.array:
+        row = np.zeros(len(self.wall_mask), dtype=self.dtype)
+        row[self.wall_mask] = self.wall_value
+        visits = self.rows[agent_i]
+        if visits:
+            row[np.fromiter(visits.keys(), dtype=np.int64, count=len(visits))] = np.fromiter(visits.values(), dtype=self.dtype, count=len(visits))
+        return row
+
+    def to_dense(self) -> np.array:
+        return np.stack([self.row(agent_i) for agent_i in range(self.num_agents)])
+
+    def __getitem__(self, key):
+        # an agent's row, or any other index of the dense maps
+        if isinstance(key, (int, np.integer)):
+            return self.row(key)
+        return self.to_dense()[key]
+
+    def __array__(self, dtype=None, copy=None):
+        visits = self.to_dense()
+        return visits if dtype is None else visits.astype(dtype)
+
+    def count(self, agent_i: int, cell: int):
+        if self.wall_mask[cell]:
+            return self.wall_value
+        return self.rows[agent_i].get(int(cell), 0)
+
+    def counts(self, agents: np.array, cells: np.array) -> np.array:
+        """ Get the visits of several (agent, cell) pairs """
+        rows = self.rows
+        counts = np.fromiter((rows[agent_i].get(cell, 0) for agent_i, cell in zip(agents.tolist(), cells.tolist())), dtype=self.dtype, count=len(cells))
+        counts[self.wall_mask[cells]] = self.wall_value
+        return counts
+
+    def increment(self, agent_i: int, cell: int):
+        visits = self.rows[agent_i]
+        cell = int(cell)
+        visits[cell] = visits.get(cell, 0) + 1
+
+    def add(self, agents: np.array, cells: np.array):
+        rows = self.rows
+        for agent_i, cell in zip(np.atleast_1d(agents).tolist(), np.atleast_1d(cells).tolist()):
+            visits = rows[agent_i]
+            visits[cell] = visits.get(cell, 0) + 1
+
+    def subtract(self, agents: np.array, cells: np.array):
+        # cells brought back to 0 visits are removed so the dicts stay sparse
+        rows = self.rows
+        for agent_i, cell in zip(np.atleast_1d(agents).tolist(), np.atleast_1d(cells).tolist()):
+            visits = rows[agent_i]
+            if visits[cell] == 1:
+                del visits[cell]
+            else:
+                visits[cell] -= 1
+
+    def clear(self, agent_i: int) -> tuple:
+        """ Forget an agent's visits
+
+        Returns:
+            cells (np.array): the cells the agent had visited
+            counts (np.array): the agent's visits to each of them
+        """
+        visits = self.rows[agent_i]
+        cells = np.fromiter(visits.keys(), dtype=np.int64, count=len(visits))
+        counts = np.fromiter(visits.values(), dtype=self.dtype, count=len(visits))
+        self.rows[agent_i] = dict()
+        return cells, counts
+
+    def copy(self):
+        memory = copy.copy(self)
+        memory.rows = [dict(visits) for visits in self.rows]
+        return memory
+
+    def copy_from(self, other):
+        self.rows = [dict(visits) for visits in other.rows]
+
+
+# the backends selected by the 'visit_memory' option
+visit_memories = {
+    'dense': DenseVisitMemory,
+    'sparse': SparseVisitMemory,
+}
@@ -0,0 +1,82 @@
+from collections import namedtuple
+import numpy as np
+
+# a snapshot of a world (see SARGridWorld.get_state):
+#   arrays: the small state arrays flattened into one int64 buffer
+#   visit_base: the visit maps the journal starts from (shared by every snapshot since the journal started)
+#   visits: the visits since the base, as flat indexes into the per-agent visit maps
+WorldState = namedtuple('WorldState', ['arrays', 'visit_base', 'visits'])
+
+
+class VisitJournal:
+    """ Records every visit (one increment of a per-agent and the global visit map) so snapshots
+    of the visit maps only need to hold the visits since a shared base copy
+
+    Restoring a snapshot undoes the visits made since the snapshot's branch split from the
+    current one and redoes the snapshot's own, so branching rollouts from the same state only
+    touch the cells they visited. The journal is off (and costs nothing) until the first
+    snapshot, and stops when an agent's visits are cleared (the next snapshot starts a new base).
+    """
+
+    def __init__(self, num_cells: int) -> None:
+        """
+        Args:
+            num_cells (int): the number of cells in the world (the stride of an agent's visit map)
+        """
+        self.num_cells = num_cells
+        self.base = None
+        self.entries = np.zeros(1024, dtype=np.int64)
+        self.length = 0
+
+    def record(self, indexes):
+        # indexes are agent * num_cells + cell of the visits (only called while the journal is on)
+        indexes = np.atleast_1d(indexes)
+        end = self.length + len(indexes)
+        if end > len(self.entries):
+            self.entries = np.resize(self.entries, max(end, 2 * len(self.entries)))
+        self.entries[self.length:end] = indexes
+        self.length = end
+
+    def stop(self):
+        self.base = None
+        self.length = 0
+
+    def snapshot(self, agent_location_visits, location_visits) -> tuple:
+        """ Get the base and visits that restore the current visit maps
+
+        Returns:
+            (tuple): the base (shared) and a copy of the visits since it
+        """
+        if self.base is None:
+            self.base = (agent_location_visits.copy(), location_visits.copy())
+            self.length = 0
+        return self.base, self.entries[:self.length].copy()
+
+    def restore(self, agent_location_visits, location_visits, base, visits):
+        """ Change the visit maps (in place) to a snapshot's """
+        if base is self.base:
+            # only the visits after the point where the snapshot and the current maps diverge change
+            shared = min(self.length, len(visits))
+            differ = np.nonzero(self.entries[:shared] != visits[:shared])[0]
+            common = differ[0] if len(differ) > 0 else shared
+            self.apply(agent_location_visits, location_visits, self.entries[common:self.length], -1)
+        else:
+            # a snapshot from an older base starts over from its base
+            agent_location_visits.copy_from(base[0])
+            np.copyto(location_visits, base[1])
+            self.base = base
+            common = 0
+        self.apply(agent_location_visits, location_visits, visits[common:], 1)
+        self.length = 0
+        self.record(visits)
+
+    def apply(self, agent_location_visits, location_visits, indexes, change):
+        # add (change 1) or undo (change -1) visits, a cell can be visited more than once so the
+        # updates are unbuffered (and subtracted rather than adding -1, which unsigned maps can't hold)
+        agents, cells = np.divmod(indexes, self.num_cells)
+        if change > 0:
+            agent_location_visits.add(agents, cells)
+            np.add.at(location_visits, cells, 1)
+        else:
+            agent_location_visits.subtract(agents, cells)
+            np.subtract.at(location_visits, cells, 1)
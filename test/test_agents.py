@@ -1,10 +1,12 @@
 
 from src import agents    # The code to test
-from src.agents import ScoutAgent, RescueAgent, SARGridWorld
+from src.agents import ScoutAgent, RescueAgent, BatchScoutPolicy, BatchRescuePolicy, SARGridWorld
 
 
 import unittest   # The test framework
 import numpy as np
+import os
+import tempfile
 
 default_options =  {
     'screen_size': 10,
@@ -244,5 +246,134 @@ class Test_RescueAgent(unittest.TestCase):
         suggested_act = self.agent.policy(obs)
         self.assertEqual(suggested_act, self.env.Actions.DROPOFF)
 
+    def test_moves_around_walls_toward_target(self):
+        # a wall between the agent and the target with a gap at the bottom
+        grid = np.zeros((11, 11))
+        grid[:9, 5] = 1
+        with tempfile.TemporaryDirectory() as map_dir:
+            map_file = os.path.join(map_dir, 'wall.npy')
+            np.save(map_file, grid)
+            options = default_options.copy()
+            options['map_file'] = map_file
+            options['grid_size'] = 15
+            env = SARGridWorld(options)
+        agent = RescueAgent(env.get_rescuer_actions(), env)
+        # (the map is padded by 2 so the wall is at x=7 from y=2 to y=10)
+        # the manhatten distance would move right into the wall, the path around it goes down
+        loc = env.convert_loc_from_2d(6, 4)
+        target = env.convert_loc_from_2d(8, 4)
+        action_distances = agent.get_action_distances_to_target(loc, target)
+        self.assertEqual(agent.A[np.argmin(action_distances)], env.Actions.DOWN)
+        self.assertEqual(action_distances[3], np.inf)
+        self.assertEqual(agent.get_victum_distances(loc, [target])[0], 7 + 2 + 7)
+
+class Test_BatchScoutPolicy(unittest.TestCase):
+
+    def setUp(self) -> None:
+        options = default_options.copy()
+        options['grid_size'] = 20
+        options['num_agents'] = 40
+        options['num_rescuers'] = 0
+        self.env = SARGridWorld(options)
+        # give the cells a few different visit counts so there are ties and clear minimums
+        movable = self.env.movable_locations
+        self.env.location_visits[movable] = np.random.default_rng(1).integers(0, 3, len(movable))
+
+    def test_matches_scout_policy_with_same_generator(self):
+        agent = ScoutAgent(env=self.env, rng=np.random.default_rng(5))
+        expected = [agent.policy(self.env.get_observation_for_agent(i)) for i in self.env.scouts]
+        policy = BatchScoutPolicy(self.env, np.random.default_rng(5))
+        actions = policy.policy(self.env.location_visits, self.env.agent_locations[self.env.scouts])
+        self.assertEqual(actions.tolist(), expected)
+
+    def test_never_moves_into_walls(self):
+        policy = BatchScoutPolicy(self.env, 0)
+        locs = self.env.agent_locations[self.env.scouts]
+        for _ in range(20):
+            next_locs = self.env.transitions[locs, policy.moves(self.env.location_visits, locs)]
+            self.assertFalse(np.any(next_locs == locs))
+
+    def test_decides_for_batches_of_worlds(self):
+        location_visits = np.stack([self.env.location_visits, self.env.location_visits[::-1]])
+        locs = np.stack([self.env.agent_locations, self.env.agent_locations[::-1]])
+        policy = BatchScoutPolicy(self.env, 3)
+        counts = policy.get_action_visit_counts(location_visits, locs)
+        self.assertEqual(counts.shape, (2, self.env.num_agents, 4))
+        for world in range(2):
+            self.assertTrue(np.array_equal(counts[world], policy.get_action_visit_counts(location_visits[world], locs[world])))
+        self.assertEqual(policy.moves(location_visits, locs).shape, (2, self.env.num_agents))
+
+
+class Test_BatchRescuePolicy(unittest.TestCase):
+
+    def setUp(self) -> None:
+        options = default_options.copy()
+        options['grid_size'] = 20
+        options['num_agents'] = 60
+        options['num_rescuers'] = 60
+        options['num_victums'] = 3
+        self.env = SARGridWorld(options)
+        rng = np.random.default_rng(2)
+        movable = self.env.movable_locations
+        self.env.location_visits[movable] = rng.integers(0, 3, len(movable))
+        # rescuers in every situation: scouting, hunting (some at their victum), carrying and at a goal
+        rescuers = self.env.rescuers
+        self.env.known_victum_locations[rescuers] = np.where(rng.random((len(rescuers), 3)) < 0.4, rng.choice(movable, (len(rescuers), 3)), -1)
+        for rescuer, loc in zip(rescuers[:5], movable[:5]):
+            self.env.set_agent_1d_loc(rescuer, loc)
+        self.env.known_victum_locations[rescuers[:5], 0] = movable[:5]
+        self.env.known_victum_locations[rescuers[5:10], 1] = self.env.goals[0]
+        self.env.agents_carrying_victum[rescuers[10:30]] = 0
+        for rescuer in rescuers[10:15]:
+            self.env.set_agent_1d_loc(rescuer, self.env.goals[1])
+        # (the policies read their own location from what they know)
+        self.env.known_agent_locations[rescuers, rescuers] = self.env.agent_locations[rescuers]
+
+    def test_matches_rescue_agent_with_same_generator(self):
+        agent = RescueAgent(env=self.env, rng=np.random.default_rng(7))
+        expected = [agent.policy(self.env.get_observation_for_agent(i)) for i in self.env.rescuers]
+        policy = BatchRescuePolicy(self.env, np.random.default_rng(7))
+        rescuers = self.env.rescuers
+        actions = policy.policy(self.env.agent_locations[rescuers], self.env.known_victum_locations[rescuers], self.env.agents_carrying_victum[rescuers] >= 0, self.env.location_visits)
+        self.assertEqual(actions.tolist(), expected)
+        self.assertEqual(set(expected[:5]), {SARGridWorld.Actions.PICKUP})
+        self.assertEqual(set(expected[10:15]), {SARGridWorld.Actions.DROPOFF})
+
+    def test_decides_for_batches_of_worlds(self):
+        rescuers = self.env.rescuers
+        locs = np.stack([self.env.agent_locations[rescuers]] * 2)
+        known = np.stack([self.env.known_victum_locations[rescuers]] * 2)
+        carrying = np.stack([self.env.agents_carrying_victum[rescuers] >= 0] * 2)
+        location_visits = np.stack([self.env.location_visits] * 2)
+        actions = BatchRescuePolicy(self.env, 0).policy(locs, known, carrying, location_visits)
+        self.assertEqual(actions.shape, locs.shape)
+        self.assertEqual(actions[:, :5].tolist(), [[SARGridWorld.Actions.PICKUP] * 5] * 2)
+        self.assertEqual(actions[:, 10:15].tolist(), [[SARGridWorld.Actions.DROPOFF] * 5] * 2)
+
+
+class Test_TieBreaking(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.rng = np.random.default_rng(0)
+
+    def test_random_argmin_picks_only_minimums(self):
+        array = np.array([3, 1, 2, 1, 1])
+        picks = [agents.random_argmin(array, self.rng) for _ in range(300)]
+        self.assertEqual(set(picks), {1, 3, 4})
+        self.assertIsInstance(picks[0], int)
+        self.assertEqual(agents.random_argmax(array, self.rng), 0)
+
+    def test_random_argmin_handles_infinite_ties(self):
+        self.assertIn(agents.random_argmin([np.inf, np.inf], self.rng), [0, 1])
+
+    def test_random_argmin_picks_one_per_row(self):
+        array = np.array([[0, 0, 1], [2, 1, 1], [5, 4, 3]])
+        picks = np.array([agents.random_argmin(array, self.rng) for _ in range(300)])
+        self.assertEqual(picks.shape, (300, 3))
+        self.assertEqual(set(picks[:, 0]), {0, 1})
+        self.assertEqual(set(picks[:, 1]), {1, 2})
+        self.assertEqual(set(picks[:, 2]), {2})
+
+
 if __name__ == '__main__':
     unittest.main()
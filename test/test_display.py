@@ -1,7 +1,8 @@
 
 from src import environments    # The code to test
 from src.environments import default_options
-from src.display import DisplayVisitor
+from src.display import DisplayVisitor, grid_frame, grey_scale_for_visit_counts
+from src.environments import SARGridWorld
 
 
 import unittest   # The test framework
@@ -51,5 +52,31 @@ class Test_Display(unittest.TestCase):
         self.assertEqual(row_sizes[3], 3)
         self.assertEqual(row_sizes[4], 1)
 
+    def test_grid_frame_draws_walls_visits_and_agents(self):
+        env = SARGridWorld(default_options)
+        scout = env.scouts[0]
+        rescuer = env.rescuers[0]
+        # keep everything else away from the cells being checked
+        for agent in env.agents:
+            env.set_agent_2d_loc(agent, 60, 60)
+        for victum in range(env.num_victums):
+            env.set_victum_2d_loc(victum, 70, 70)
+        env.set_agent_2d_loc(scout, 10, 20)
+        env.set_agent_2d_loc(rescuer, 30, 40)
+        env.location_visits[env.convert_loc_from_2d(50, 50)] = 3
+        frame = grid_frame(env)
+        self.assertEqual(frame.shape, (env.grid_size, env.grid_size, 3))
+        # frames are indexed by row (y) then column (x)
+        self.assertEqual(tuple(frame[20, 10]), (255, 255, 0))
+        self.assertEqual(tuple(frame[40, 30]), (0, 0, 255))
+        self.assertEqual(tuple(frame[0, 0]), (0, 0, 0))
+        self.assertEqual(tuple(frame[50, 50]), (225, 225, 225))
+
+    def test_grey_scale_matches_single_cell_version(self):
+        visit_counts = np.array([0, 1, 10, 25, 26, 100, 254, 255])
+        grey_scale = grey_scale_for_visit_counts(visit_counts)
+        for visit_count, grey in zip(visit_counts, grey_scale):
+            self.assertEqual(self.display.grey_scale_for_visit_count(visit_count), (grey, grey, grey))
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,6 +5,21 @@ from src.environments import SARGridWorld, default_options
 
 import unittest   # The test framework
 import numpy as np
+import collections
+import copy
+import subprocess
+import sys
+
+class CountingDisplay:
+    # stands in for the pygame display and counts the frames drawn
+    def __init__(self) -> None:
+        self.frames = 0
+
+    def visit(self, env):
+        self.frames += 1
+
+    def stop_simulation(self):
+        pass
 
 class Test_Environment(unittest.TestCase):
 
@@ -16,6 +31,10 @@ class Test_Environment(unittest.TestCase):
         self.victums = np.arange(0, len(self.env.victum_locations))
         return super().setUp()
 
+    def wall_at(self, x, y):
+        # agents can't move into walls
+        return self.env.world[self.env.convert_loc_from_2d(x, y)] == 0
+
     def tearDown(self) -> None:
         return super().tearDown()
 
@@ -93,7 +112,7 @@ class Test_Environment(unittest.TestCase):
         initial_loc = self.env.get_agent_2d_loc(agent)
         self.env.step_agent(agent, act)
         next_loc = self.env.get_agent_2d_loc(agent)
-        if initial_loc[0] != 0:
+        if initial_loc[0] != 0 and not self.wall_at(initial_loc[0] - 1, initial_loc[1]):
             self.assertEqual(initial_loc[0] - 1, next_loc[0])
         else:
             self.assertEqual(initial_loc[0], next_loc[0])
@@ -116,7 +135,7 @@ class Test_Environment(unittest.TestCase):
         initial_loc = self.env.get_agent_2d_loc(agent)
         self.env.step_agent(agent, act)
         next_loc = self.env.get_agent_2d_loc(agent)
-        if initial_loc[0] != self.env.grid_size-1:
+        if initial_loc[0] != self.env.grid_size-1 and not self.wall_at(initial_loc[0] + 1, initial_loc[1]):
             self.assertEqual(initial_loc[0] + 1, next_loc[0])
         else:
             self.assertEqual(initial_loc[0], next_loc[0])
@@ -139,7 +158,7 @@ class Test_Environment(unittest.TestCase):
         initial_loc = self.env.get_agent_2d_loc(agent)
         self.env.step_agent(agent, act)
         next_loc = self.env.get_agent_2d_loc(agent)
-        if initial_loc[1] != 0:
+        if initial_loc[1] != 0 and not self.wall_at(initial_loc[0], initial_loc[1] - 1):
             self.assertEqual(initial_loc[1] - 1, next_loc[1])
         else:
             self.assertEqual(initial_loc[1], next_loc[1])
@@ -162,7 +181,7 @@ class Test_Environment(unittest.TestCase):
         initial_loc = self.env.get_agent_2d_loc(agent)
         self.env.step_agent(agent, act)
         next_loc = self.env.get_agent_2d_loc(agent)
-        if initial_loc[1] != self.env.grid_size-1:
+        if initial_loc[1] != self.env.grid_size-1 and not self.wall_at(initial_loc[0], initial_loc[1] + 1):
             self.assertEqual(initial_loc[1] + 1, next_loc[1])
         else:
             self.assertEqual(initial_loc[1], next_loc[1])
@@ -206,9 +225,10 @@ class Test_Environment(unittest.TestCase):
         pick_act = SARGridWorld.Actions.PICKUP
         right_act = SARGridWorld.Actions.RIGHT
         down_act = SARGridWorld.Actions.DOWN
-        # move the rescuer to the victum location
-        self.env.set_agent_2d_loc(rescuer, 0, 0)
-        self.env.set_victum_2d_loc(victum, 0, 0)
+        # move the rescuer to the victum location (inside the walls around the grid)
+        corner = self.env.scout_visible_range
+        self.env.set_agent_2d_loc(rescuer, corner, corner)
+        self.env.set_victum_2d_loc(victum, corner, corner)
         # pickup the victum and move the rescuer to a new location
         self.env.step_agent(rescuer, pick_act)
         self.env.step_agent(rescuer, right_act)
@@ -226,9 +246,10 @@ class Test_Environment(unittest.TestCase):
         drop_act = SARGridWorld.Actions.DROPOFF
         right_act = SARGridWorld.Actions.RIGHT
         down_act = SARGridWorld.Actions.DOWN
-        # move the rescuer to the victum location
-        self.env.set_agent_2d_loc(rescuer, 0, 0)
-        self.env.set_victum_2d_loc(victum, 0, 0)
+        # move the rescuer to the victum location (inside the walls around the grid)
+        corner = self.env.scout_visible_range
+        self.env.set_agent_2d_loc(rescuer, corner, corner)
+        self.env.set_victum_2d_loc(victum, corner, corner)
         # pickup the victum and move the rescuer to a new location
         self.env.step_agent(rescuer, pick_act)
         self.env.step_agent(rescuer, right_act)
@@ -400,6 +421,17 @@ class Test_Environment(unittest.TestCase):
         dist = self.env.manhatten_distance(loc1, loc2)
         self.assertEqual(dist, 5)
 
+    def test_cells_in_range_matches_full_grid_scan(self):
+        # the stencil lookup should give the same cells in the same order as checking every cell
+        agent = np.random.choice(self.agents)
+        grid_size = self.env.grid_size
+        for x, y in [(0, 0), (1, grid_size-1), (grid_size-1, 2), (5, 5), (np.random.randint(0, grid_size), np.random.randint(0, grid_size))]:
+            self.env.set_agent_2d_loc(agent, x, y)
+            agent_loc = self.env.agent_locations[agent]
+            visible_range = self.env.rescuer_visible_range if agent in self.rescuers else self.env.scout_visible_range
+            expected = [loc for loc in range(len(self.env.world)) if self.env.manhatten_distance(loc, agent_loc) <= visible_range]
+            self.assertEqual(self.env.cells_in_range(agent).tolist(), expected)
+
     def test_agent_outside_range_updates_likely_location(self):
         # selecting a victum and agent
         agent = np.random.choice(self.scouts)
@@ -440,8 +472,9 @@ class Test_Environment(unittest.TestCase):
         victum = np.random.choice(self.victums)
         # set the victum just outside the visible range
         vis_range = default_options['scout_visible_range']
-        self.env.set_agent_2d_loc(agent, 0, 0)
-        self.env.set_victum_2d_loc(victum, vis_range, 0)
+        corner = self.env.scout_visible_range
+        self.env.set_agent_2d_loc(agent, corner, corner)
+        self.env.set_victum_2d_loc(victum, corner + vis_range, corner)
         vic_loc = self.env.victum_locations[victum]
         # moving still out of range should not update the likely location
         down_act = SARGridWorld.Actions.DOWN
@@ -524,6 +557,45 @@ class Test_Environment(unittest.TestCase):
         next_visit_count = next_visited[next_loc_index]
         self.assertEqual(next_visit_count, max_count)
 
+    def test_global_visit_map_is_sum_of_agent_visits(self):
+        actions = [SARGridWorld.Actions.LEFT, SARGridWorld.Actions.DOWN, SARGridWorld.Actions.UP, SARGridWorld.Actions.RIGHT]
+        for step in range(200):
+            agent = np.random.choice(self.agents)
+            self.env.step_agent(agent, np.random.choice(actions))
+            if step % 50 == 0:
+                self.env.reset_agent(agent)
+        expected = np.sum(self.env.agent_location_visits, axis=0)
+        self.assertEqual(self.env.location_visits.tolist(), expected.tolist())
+
+    def test_compact_visit_dtype_caps_visits_and_keeps_walls_infinite(self):
+        custom_options = default_options.copy()
+        custom_options['grid_size'] = 10
+        custom_options['visit_dtype'] = 'uint8'
+        env = SARGridWorld(custom_options)
+        scout = env.scouts[0]
+        env.set_agent_2d_loc(scout, 3, 3)
+        for _ in range(env.max_pheromone + 5):
+            env.step_agent(scout, SARGridWorld.Actions.RIGHT)
+            env.step_agent(scout, SARGridWorld.Actions.LEFT)
+        loc = env.convert_loc_from_2d(4, 3)
+        self.assertEqual(env.agent_location_visits.dtype, np.uint8)
+        self.assertEqual(env.agent_location_visits[scout][loc], env.max_pheromone)
+        self.assertEqual(env.location_visits[loc], env.max_pheromone)
+        # walls stay infinite in the global map even though the agent map can't hold infinity
+        wall = env.convert_loc_from_2d(0, 0)
+        env.set_agent_1d_loc(scout, wall)
+        env.step_agent(scout, SARGridWorld.Actions.COMMUNICATE)
+        self.assertEqual(env.agent_location_visits[scout][wall], 0)
+        self.assertEqual(env.location_visits[wall], np.inf)
+
+    def test_compact_visit_dtype_rejects_max_pheromone_that_doesnt_fit(self):
+        custom_options = default_options.copy()
+        custom_options['grid_size'] = 10
+        custom_options['visit_dtype'] = 'uint8'
+        custom_options['max_pheromone'] = 1000
+        with self.assertRaises(ValueError):
+            SARGridWorld(custom_options)
+
     def test_agent_communication_succeeds_for_agents_in_range(self):
         # select a scout and a rescuer
         scout = np.random.choice(self.scouts)
@@ -606,6 +678,260 @@ class Test_Environment(unittest.TestCase):
         # the agent should now have registered a communication one step later
         self.assertEqual(last_agent_comm[agent], old_step_count + 1)
 
+    def assert_same_state(self, env, other):
+        for attribute in ['agent_locations', 'victum_locations', 'agents_carrying_victum', 'step_count', 'agent_location_visits',
+                          'location_visits', 'known_agent_locations', 'known_victum_locations', 'last_agent_communications']:
+            self.assertTrue(np.array_equal(getattr(env, attribute), getattr(other, attribute)), attribute)
+
+    def assert_same_observation(self, obs, other):
+        self.assertEqual(len(obs), len(other))
+        for value, other_value in zip(obs, other):
+            self.assertTrue(np.array_equal(value, other_value))
+
+    def test_transition_table_matches_bounded_wall_checks(self):
+        for loc in range(len(self.env.world)):
+            x, y = self.env.convert_loc_to_2d(loc)
+            for column, (dx, dy) in enumerate(self.env.movement_deltas):
+                new_x, new_y = x + dx, y + dy
+                expected = loc
+                if 0 <= new_x < self.env.grid_size and 0 <= new_y < self.env.grid_size and self.env.world[self.env.convert_loc_from_2d(new_x, new_y)] != 0:
+                    expected = self.env.convert_loc_from_2d(new_x, new_y)
+                self.assertEqual(self.env.transitions[loc, column], expected)
+
+    def test_distance_field_matches_breadth_first_search(self):
+        options = default_options.copy()
+        options['map_file'] = './assets/maps/old_maps/strong0_new.npy'
+        env = SARGridWorld(options)
+        target = env.goals[0]
+        expected = np.full(len(env.world), np.inf)
+        expected[target] = 0
+        queue = collections.deque([target])
+        while queue:
+            loc = queue.popleft()
+            x, y = env.convert_loc_to_2d(loc)
+            for dx, dy in env.movement_deltas:
+                if 0 <= x + dx < env.grid_size and 0 <= y + dy < env.grid_size:
+                    next_loc = env.convert_loc_from_2d(x + dx, y + dy)
+                    if env.world[next_loc] != 0 and expected[next_loc] == np.inf:
+                        expected[next_loc] = expected[loc] + 1
+                        queue.append(next_loc)
+        self.assertTrue(np.array_equal(env.distance_field(target), expected))
+
+    def test_distance_fields_are_cached_per_target(self):
+        self.env.max_distance_fields = 2
+        targets = self.env.movable_locations[:3]
+        field = self.env.distance_field(targets[0])
+        self.assertIs(self.env.distance_field(targets[0]), field)
+        for target in targets[1:]:
+            self.env.distance_field(target)
+        self.assertEqual(list(self.env.distance_fields), list(targets[1:]))
+
+    def test_agents_stop_at_walls(self):
+        agent = np.random.choice(self.agents)
+        corner = self.env.scout_visible_range
+        self.env.set_agent_2d_loc(agent, corner, corner)
+        for action in [SARGridWorld.Actions.LEFT, SARGridWorld.Actions.UP]:
+            self.env.step_agent(agent, action)
+            self.assertEqual(self.env.get_agent_2d_loc(agent).tolist(), [corner, corner])
+        self.env.step_all([SARGridWorld.Actions.LEFT] * self.env.num_agents)
+        self.assertEqual(self.env.get_agent_2d_loc(agent).tolist(), [corner, corner])
+
+    def test_step_all_matches_sequential_steps(self):
+        custom_options = default_options.copy()
+        custom_options['grid_size'] = 12
+        custom_options['num_agents'] = 10
+        custom_options['num_rescuers'] = 4
+        custom_options['num_victums'] = 3
+        env = SARGridWorld(custom_options)
+        sequential_env = copy.deepcopy(env)
+        actions = list(SARGridWorld.Actions)
+        # mostly movement with occasional communication, pickups and dropoffs
+        weights = np.array([4, 4, 4, 4, 1, 1, 1, 1]) / 20
+        for _ in range(60):
+            # occasionally put rescuers on victums so pickups succeed
+            rescuer = np.random.choice(env.rescuers)
+            vic = np.random.randint(0, env.num_victums)
+            for world in (env, sequential_env):
+                world.set_agent_1d_loc(rescuer, world.victum_locations[vic])
+            round_actions = [actions[i] for i in np.random.choice(len(actions), env.num_agents, p=weights)]
+            observations, rewards, dones = env.step_all(round_actions)
+            for agent in env.agents:
+                obs, reward, done = sequential_env.step_agent(agent, round_actions[agent])
+                self.assert_same_observation(observations[agent], obs)
+                self.assertEqual(rewards[agent], reward)
+                self.assertEqual(dones[agent], done)
+                if done: break
+            self.assert_same_state(env, sequential_env)
+            if np.any(dones): break
+
+    def test_step_all_stops_after_termination(self):
+        rescuer = self.rescuers[0]
+        goal_loc = self.env.goals[0]
+        for victum in self.victums:
+            self.env.set_victum_1d_loc(victum, goal_loc)
+        self.env.set_agent_1d_loc(rescuer, goal_loc)
+        self.env.agents_carrying_victum[rescuer] = 0
+        actions = [SARGridWorld.Actions.RIGHT for _ in self.agents]
+        actions[rescuer] = SARGridWorld.Actions.DROPOFF
+        step_counts = self.env.step_count.copy()
+        observations, rewards, dones = self.env.step_all(actions)
+        self.assertTrue(dones[rescuer])
+        # agents after the terminating one aren't stepped
+        for agent in self.agents[rescuer+1:]:
+            self.assertIsNone(observations[agent])
+            self.assertEqual(self.env.step_count[agent], step_counts[agent])
+        for agent in self.agents[:rescuer+1]:
+            self.assertEqual(self.env.step_count[agent], step_counts[agent] + 1)
+
+    def test_seed_reproduces_world(self):
+        options = default_options.copy()
+        options['seed'] = 3
+        first, second = SARGridWorld(options), SARGridWorld(options)
+        self.assertTrue(np.array_equal(first.agent_locations, second.agent_locations))
+        self.assertTrue(np.array_equal(first.victum_locations, second.victum_locations))
+        options['seed'] = np.random.default_rng(3)
+        third = SARGridWorld(options)
+        self.assertTrue(np.array_equal(first.agent_locations, third.agent_locations))
+
+    def test_agent_streams_are_reproducible_and_independent(self):
+        options = default_options.copy()
+        options['seed'] = 3
+        env = SARGridWorld(options)
+        draws = [env.agent_rng(agent).random(4) for agent in env.agents]
+        self.assertTrue(np.array_equal(draws[0], SARGridWorld(options).agent_rng(0).random(4)))
+        self.assertEqual(len({tuple(draw) for draw in draws}), env.num_agents)
+        # agent streams don't depend on how much the world has drawn
+        env.rng.random(100)
+        self.assertTrue(np.array_equal(draws[1], env.agent_rng(1).random(4)))
+
+    def test_preallocated_observations_match_new_observations(self):
+        options = default_options.copy()
+        options['seed'] = 4
+        options['num_victums'] = 3
+        env = SARGridWorld(options)
+        options['preallocate_observations'] = True
+        buffered_env = SARGridWorld(options)
+        actions = list(SARGridWorld.Actions)
+        rng = np.random.default_rng(4)
+        first_obs = buffered_env.get_observation_for_agent(0)
+        for _ in range(30):
+            round_actions = [actions[i] for i in rng.integers(0, len(actions), env.num_agents)]
+            for agent in env.agents:
+                obs, _, _ = env.step_agent(agent, round_actions[agent])
+                buffered_obs, _, _ = buffered_env.step_agent(agent, round_actions[agent])
+                self.assert_same_observation(buffered_obs, obs)
+            observations, _, _ = env.step_all(round_actions)
+            buffered_observations, _, _ = buffered_env.step_all(round_actions)
+            for obs, buffered_obs in zip(observations, buffered_observations):
+                self.assert_same_observation(buffered_obs, obs)
+        # the same buffers are filled every step
+        self.assertIs(buffered_env.get_observation_for_agent(0), first_obs)
+
+    def test_preallocated_observations_keep_their_layout_off_the_grid(self):
+        options = default_options.copy()
+        options['preallocate_observations'] = True
+        env = SARGridWorld(options)
+        scout = env.scouts[0]
+        env.set_agent_2d_loc(scout, 0, 0)
+        visits = env.get_observation_for_agent(scout)[4]
+        self.assertEqual(len(visits), len(env.range_stencil(env.scout_visible_range)[2]))
+        # the cells above and left of the corner are off the grid
+        self.assertTrue(np.all(np.isinf(visits[:6])))
+        self.assertEqual(env.observation_spec()['cell_visits'][0], (env.num_agents, len(visits)))
+
+    def test_read_only_observations_cant_change_the_environment(self):
+        for preallocate in (False, True):
+            options = default_options.copy()
+            options['read_only_observations'] = True
+            options['preallocate_observations'] = preallocate
+            env = SARGridWorld(options)
+            obs, _, _ = env.step_agent(0, SARGridWorld.Actions.RIGHT)
+            for array in obs[1:4] + (obs[6],):
+                with self.assertRaises(ValueError):
+                    array[0] = 5
+            # the environment still updates what the observations show
+            env.known_victum_locations[0] = 7
+            obs, _, _ = env.step_agent(0, SARGridWorld.Actions.REASSESS)
+            self.assertTrue(np.array_equal(obs[2], env.known_victum_locations[0]))
+
+    def random_rounds(self, env, rounds, rng):
+        # rounds of random actions, stepped in turn and as batches
+        actions = list(SARGridWorld.Actions)
+        for round_i in range(rounds):
+            round_actions = [actions[i] for i in rng.integers(0, len(actions), env.num_agents)]
+            if round_i % 2:
+                env.step_all(round_actions)
+            else:
+                for agent in env.agents:
+                    env.step_agent(agent, round_actions[agent])
+
+    def test_set_state_restores_branching_rollouts(self):
+        for visit_dtype, visit_memory in [('float64', 'dense'), ('uint8', 'dense'), ('float64', 'sparse')]:
+            options = default_options.copy()
+            options['num_victums'] = 3
+            options['visit_dtype'] = visit_dtype
+            options['visit_memory'] = visit_memory
+            env = SARGridWorld(options)
+            rng = np.random.default_rng(0)
+            self.random_rounds(env, 5, rng)
+            root, root_env = env.get_state(), copy.deepcopy(env)
+            self.random_rounds(env, 10, rng)
+            branch, branch_env = env.get_state(), copy.deepcopy(env)
+            env.set_state(root)
+            self.assert_same_state(env, root_env)
+            # a different branch from the root, then back to the first branch
+            self.random_rounds(env, 10, rng)
+            env.set_state(branch)
+            self.assert_same_state(env, branch_env)
+            self.assertEqual(env.agents_in_range(0), branch_env.agents_in_range(0))
+            env.set_state(root)
+            self.assert_same_state(env, root_env)
+
+    def test_states_share_the_visit_maps(self):
+        self.random_rounds(self.env, 2, np.random.default_rng(1))
+        first = self.env.get_state()
+        for agent in self.agents:
+            self.env.step_agent(agent, SARGridWorld.Actions.RIGHT)
+        second = self.env.get_state()
+        self.assertIs(first.visit_base, second.visit_base)
+        # only the new visits are saved
+        self.assertEqual(len(first.visits), 0)
+        self.assertLessEqual(len(second.visits), self.env.num_agents)
+
+    def test_set_state_after_visits_are_cleared(self):
+        state, saved_env = self.env.get_state(), copy.deepcopy(self.env)
+        self.random_rounds(self.env, 4, np.random.default_rng(2))
+        self.env.reset_agent(0)
+        self.random_rounds(self.env, 4, np.random.default_rng(3))
+        self.env.set_state(state)
+        self.assert_same_state(self.env, saved_env)
+
+    def test_headless_environment_doesnt_import_pygame(self):
+        code = 'import sys; from src.environments import SARGridWorld, default_options; SARGridWorld(default_options); print("pygame" in sys.modules)'
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_headless_environment_can_be_deleted(self):
+        self.assertIsNone(self.env.display)
+        self.env.stop_simulation()
+        self.env.__del__()
+
+    def test_render_interval_throttles_frames(self):
+        self.env.display = CountingDisplay()
+        self.env.render_interval = 3
+        for _ in range(9):
+            self.env.step_agent(self.agents[0], SARGridWorld.Actions.RIGHT)
+        self.assertEqual(self.env.display.frames, 3)
+
+    def test_round_render_interval_draws_once_per_round(self):
+        self.env.display = CountingDisplay()
+        self.env.render_interval = 'round'
+        for _ in range(2):
+            for agent in self.agents:
+                self.env.step_agent(agent, SARGridWorld.Actions.RIGHT)
+        self.env.step_all([SARGridWorld.Actions.LEFT for _ in self.agents])
+        self.assertEqual(self.env.display.frames, 3)
+
     def test_convert_loc_returns_int(self):
         # convert function should even convert float coordinates to ints
         loc_1d = self.env.convert_loc_from_2d(0.0, 1.0)
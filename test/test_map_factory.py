@@ -0,0 +1,95 @@
+from src import map_factory    # The code to test
+from src.map_factory import ImageGridFactory
+from src.environments import SARGridWorld, default_options
+
+
+import unittest   # The test framework
+import numpy as np
+import os
+import tempfile
+
+MAP_FILE = './assets/maps/old_maps/strong0_new.npy'
+
+class Test_ImageGridFactory(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # use an empty disk cache and clear the loaded maps
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = map_factory.MAP_CACHE_DIR
+        map_factory.MAP_CACHE_DIR = os.path.join(self.temp_dir.name, 'cache')
+        map_factory._loaded_maps.clear()
+
+    def tearDown(self) -> None:
+        map_factory.MAP_CACHE_DIR = self.cache_dir
+        map_factory._loaded_maps.clear()
+        self.temp_dir.cleanup()
+
+    def uncached_grid(self, grid_file, padding):
+        return ImageGridFactory.validate_grid(np.load(grid_file), padding)
+
+    def test_loaded_grid_matches_validated_grid(self):
+        grid = ImageGridFactory.load_grid(MAP_FILE, 2)
+        self.assertEqual(grid.dtype, np.uint8)
+        self.assertTrue(np.array_equal(grid, self.uncached_grid(MAP_FILE, 2)))
+        movable = ImageGridFactory.load_movable_locations(MAP_FILE, 2)
+        self.assertTrue(np.array_equal(movable, np.nonzero(grid.ravel())[0]))
+
+    def test_loaded_grids_are_read_only(self):
+        grid = ImageGridFactory.load_grid(MAP_FILE, 2)
+        with self.assertRaises(ValueError):
+            grid[0, 0] = 1
+
+    def test_grids_are_loaded_from_disk_cache(self):
+        grid = ImageGridFactory.load_grid(MAP_FILE, 2)
+        self.assertEqual(len(os.listdir(map_factory.MAP_CACHE_DIR)), 2)
+        # a new process only has the disk cache
+        map_factory._loaded_maps.clear()
+        cached = ImageGridFactory.load_grid(MAP_FILE, 2)
+        self.assertTrue(np.array_equal(cached, grid))
+        self.assertIsInstance(cached.base, np.memmap)
+
+    def test_disk_cache_is_off_by_default(self):
+        self.assertEqual(self.cache_dir, os.environ.get('SAR_MAP_CACHE_DIR'))
+        cache_dir, map_factory.MAP_CACHE_DIR = map_factory.MAP_CACHE_DIR, None
+        grid = ImageGridFactory.load_grid(MAP_FILE, 2)
+        self.assertTrue(np.array_equal(grid, self.uncached_grid(MAP_FILE, 2)))
+        self.assertFalse(os.path.exists(cache_dir))
+
+    def test_padding_is_part_of_the_cache_key(self):
+        grid_file = os.path.join(self.temp_dir.name, 'map.npy')
+        np.save(grid_file, np.zeros((10, 10)))
+        self.assertEqual(ImageGridFactory.load_grid(grid_file, 1).shape, (12, 12))
+        self.assertEqual(ImageGridFactory.load_grid(grid_file, 2).shape, (14, 14))
+
+    def test_changed_map_file_is_reloaded(self):
+        grid_file = os.path.join(self.temp_dir.name, 'map.npy')
+        grid = np.zeros((10, 10))
+        np.save(grid_file, grid)
+        self.assertEqual(ImageGridFactory.load_grid(grid_file, 1).sum(), 100)
+        grid[5, 5] = 1
+        np.save(grid_file, grid)
+        # make sure the modification time changes even on coarse file systems
+        os.utime(grid_file, ns=(0, 0))
+        self.assertEqual(ImageGridFactory.load_grid(grid_file, 1).sum(), 99)
+
+    def test_least_recently_used_maps_are_unloaded(self):
+        map_factory.MAX_LOADED_MAPS = 2
+        try:
+            for padding in range(1, 4):
+                ImageGridFactory.load_grid(MAP_FILE, padding)
+            self.assertEqual(len(map_factory._loaded_maps), 2)
+            self.assertEqual([padding for _, padding in map_factory._loaded_maps], [2, 3])
+        finally:
+            map_factory.MAX_LOADED_MAPS = 8
+
+    def test_environment_uses_cached_movable_locations(self):
+        options = default_options.copy()
+        options['map_file'] = MAP_FILE
+        options['grid_size'] = ImageGridFactory.load_grid(MAP_FILE, options['scout_visible_range']).shape[0]
+        env = SARGridWorld(options)
+        self.assertTrue(np.array_equal(env.movable_locations, np.nonzero(env.world)[0]))
+        self.assertTrue(np.all(env.world[env.agent_locations] == 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+from src import occupancy    # The code to test
+from src.occupancy import OccupancyIndex
+from src.environments import SARGridWorld, default_options
+
+
+import unittest   # The test framework
+import numpy as np
+
+def brute_force_ids_in_range(env, agent_i, locations):
+    # check every location against every cell in range
+    ids = list()
+    for cell in env.cells_in_range(agent_i):
+        for other_i, loc in enumerate(locations):
+            if loc == cell: ids.append(other_i)
+    return ids
+
+class Test_OccupancyIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.index = OccupancyIndex(25, np.array([3, 7, 3, 24]))
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        return super().tearDown()
+
+    def test_indexes_initial_locations(self):
+        self.assertEqual(self.index.ids_at(3), [0, 2])
+        self.assertEqual(self.index.ids_at(7), [1])
+        self.assertEqual(self.index.ids_at(5), [])
+        self.assertEqual(self.index.counts.sum(), 4)
+
+    def test_move_updates_both_cells(self):
+        self.index.move(2, 7)
+        self.assertEqual(self.index.ids_at(3), [0])
+        self.assertEqual(self.index.ids_at(7), [1, 2])
+        self.assertEqual(self.index.counts[3], 1)
+        self.assertEqual(self.index.counts[7], 2)
+
+    def test_ids_in_cells_are_ordered_by_cell_then_id(self):
+        ids = self.index.ids_in_cells(np.array([2, 3, 7, 24]))
+        self.assertEqual(ids, [0, 2, 1, 3])
+
+
+class Test_EnvironmentOccupancy(unittest.TestCase):
+
+    def setUp(self) -> None:
+        options = default_options.copy()
+        options['grid_size'] = 12
+        options['num_agents'] = 8
+        options['num_rescuers'] = 4
+        options['num_victums'] = 3
+        self.env = SARGridWorld(options)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        return super().tearDown()
+
+    def assert_index_consistent(self):
+        for agent in self.env.agents:
+            self.assertEqual(self.env.agents_in_range(agent), brute_force_ids_in_range(self.env, agent, self.env.agent_locations))
+            self.assertEqual(self.env.victums_in_range(agent), brute_force_ids_in_range(self.env, agent, self.env.victum_locations))
+
+    def test_index_matches_brute_force_on_random_trajectories(self):
+        actions = list(SARGridWorld.Actions)
+        for _ in range(300):
+            agent = np.random.choice(self.env.agents)
+            # occasionally put rescuers on top of victums so pickups and dropoffs happen
+            if np.random.rand() < 0.1:
+                vic = np.random.randint(0, self.env.num_victums)
+                self.env.set_agent_1d_loc(agent, self.env.victum_locations[vic])
+            if np.random.rand() < 0.02:
+                self.env.reset_agent(agent)
+            self.env.step_agent(agent, np.random.choice(actions))
+            self.assert_index_consistent()
+
+    def test_index_follows_carried_victum(self):
+        rescuer = self.env.rescuers[0]
+        self.env.set_agent_2d_loc(rescuer, 4, 4)
+        self.env.set_victum_2d_loc(0, 4, 4)
+        self.env.step_agent(rescuer, SARGridWorld.Actions.PICKUP)
+        self.env.step_agent(rescuer, SARGridWorld.Actions.RIGHT)
+        new_loc = self.env.convert_loc_from_2d(5, 4)
+        self.assertIn(0, self.env.victum_index.ids_at(new_loc))
+        self.assertNotIn(0, self.env.victum_index.ids_at(self.env.convert_loc_from_2d(4, 4)))
+
+if __name__ == '__main__':
+    unittest.main()
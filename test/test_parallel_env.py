@@ -0,0 +1,96 @@
+from src.parallel_env import SARParallelEnv    # The code to test
+from src.environments import SARGridWorld, default_options
+
+
+import unittest   # The test framework
+import importlib.util
+import numpy as np
+
+class Test_SARParallelEnv(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.options = default_options.copy()
+        self.options['seed'] = 0
+        self.options['num_victums'] = 3
+        self.env = SARParallelEnv(self.options, max_cycles=5)
+
+    def test_reset_observes_every_agent(self):
+        observations, infos = self.env.reset(seed=1)
+        self.assertEqual(sorted(observations), sorted(self.env.possible_agents))
+        self.assertEqual(self.env.possible_agents[:2], ['rescuer_0', 'rescuer_1'])
+        for agent, obs in observations.items():
+            self.assertEqual(obs['observation'].shape, (self.env.observation_size,))
+            self.assertEqual(obs['observation'].dtype, np.float32)
+        # a reset with the same seed places the agents in the same cells
+        first = self.env.engine.agent_locations.copy()
+        self.env.reset(seed=1)
+        self.assertTrue(np.array_equal(first, self.env.engine.agent_locations))
+
+    def test_action_masks_allow_each_agents_actions(self):
+        observations, _ = self.env.reset()
+        pickup = SARGridWorld.Actions.PICKUP.value - 1
+        self.assertEqual(observations['rescuer_0']['action_mask'][pickup], 1)
+        self.assertEqual(observations['scout_2']['action_mask'][pickup], 0)
+        self.assertEqual(observations['scout_2']['action_mask'][SARGridWorld.Actions.REASSESS.value - 1], 0)
+
+    def test_observation_window_shows_visits_around_agent(self):
+        self.env.reset()
+        engine = self.env.engine
+        observation = self.env.get_observation_arrays()[0, 2]
+        dx, dy, offsets = engine.range_stencil(engine.scout_visible_range)
+        visits = engine.location_visits[0, engine.agent_locations[0, 2] + offsets]
+        self.assertTrue(np.array_equal(observation[:len(offsets)], np.where(np.isinf(visits), -1, visits)))
+        x, y = observation[len(offsets):len(offsets) + 2]
+        self.assertEqual(engine.convert_loc_from_2d(x, y), engine.agent_locations[0, 2])
+        # rescuers don't see as far as scouts
+        rescuer_window = self.env.get_observation_arrays()[0, 0, :len(offsets)]
+        self.assertTrue(np.all(rescuer_window[np.abs(dx) + np.abs(dy) > engine.rescuer_visible_range] == -1))
+
+    def test_episode_is_truncated_after_max_cycles(self):
+        self.env.reset()
+        right = SARGridWorld.Actions.RIGHT.value - 1
+        for _ in range(5):
+            self.assertEqual(len(self.env.agents), self.env.engine.num_agents)
+            observations, rewards, terminations, truncations, infos = self.env.step({agent: right for agent in self.env.agents})
+        self.assertTrue(all(truncations.values()))
+        self.assertEqual(self.env.agents, [])
+        self.assertEqual(set(rewards.values()), {-1})
+
+    def test_masked_actions_do_nothing(self):
+        self.env.reset()
+        pickup = SARGridWorld.Actions.PICKUP.value - 1
+        _, rewards, _, _, _ = self.env.step({'scout_2': pickup, 'rescuer_0': pickup})
+        # a failed pickup is penalized, a masked one isn't tried
+        self.assertEqual(rewards['rescuer_0'], -10)
+        self.assertEqual(rewards['scout_2'], -1)
+
+    def test_arrays_step_a_batch_of_worlds(self):
+        env = SARParallelEnv(self.options, num_envs=4, max_cycles=3, auto_reset=True)
+        observations, masks = env.reset_arrays()
+        self.assertEqual(observations.shape, (4, env.engine.num_agents, env.observation_size))
+        self.assertEqual(masks.shape, (4, env.engine.num_agents, len(SARGridWorld.Actions)))
+        actions = np.zeros((4, env.engine.num_agents), dtype=int)
+        for step in range(3):
+            observations, rewards, terminations, truncations = env.step_arrays(actions)
+        self.assertTrue(np.all(truncations))
+        # the truncated worlds were reset
+        self.assertTrue(np.all(env.episode_steps == 0))
+        with self.assertRaises(ValueError):
+            env.reset()
+
+    @unittest.skipUnless(importlib.util.find_spec('gymnasium'), "gymnasium isn't installed")
+    def test_spaces_contain_observations(self):
+        observations, _ = self.env.reset()
+        for agent, obs in observations.items():
+            self.assertTrue(self.env.observation_space(agent).contains(obs))
+            self.assertTrue(self.env.action_space(agent).contains(0))
+            self.assertIs(self.env.observation_space(agent), self.env.observation_space(agent))
+
+    @unittest.skipIf(importlib.util.find_spec('gymnasium'), "gymnasium is installed")
+    def test_spaces_need_gymnasium(self):
+        with self.assertRaises(ImportError):
+            self.env.observation_space(self.env.possible_agents[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+from src import profiling    # The code to test
+from src.profiling import StepProfiler
+from src.environments import SARGridWorld, default_options
+from src.simulation import Simulation
+
+
+import unittest   # The test framework
+import csv
+import json
+import os
+import tempfile
+import numpy as np
+
+class Test_StepProfiler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.options = default_options.copy()
+        self.options['profile'] = True
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_summary_has_latency_percentiles_and_histogram(self):
+        profiler = StepProfiler()
+        for nanoseconds in [1000] * 98 + [30000, 2000000]:
+            profiler.record('phase', nanoseconds)
+        profiler.step(50)
+        stats = profiler.summary()['phases']['phase']
+        self.assertEqual(stats['calls'], 100)
+        self.assertEqual(stats['calls_per_step'], 2)
+        self.assertEqual(stats['p50_us'], 1)
+        self.assertGreater(stats['p99_us'], 30)
+        self.assertEqual(sum(stats['histogram']), 100)
+        self.assertEqual(stats['histogram'][0], 98)
+
+    def test_world_isnt_instrumented_by_default(self):
+        env = SARGridWorld(default_options)
+        self.assertIsNone(env.profiler)
+        self.assertNotIn('step_agent', vars(env))
+
+    def test_steps_are_timed_by_phase(self):
+        env = SARGridWorld(self.options)
+        for _ in range(3):
+            for agent in env.agents:
+                env.step_agent(agent, SARGridWorld.Actions.RIGHT)
+        env.step_all([SARGridWorld.Actions.COMMUNICATE] * env.num_agents)
+        summary = env.profiler.summary()
+        self.assertEqual(summary['steps'], 4 * env.num_agents)
+        phases = summary['phases']
+        self.assertEqual(phases['step_agent']['calls'], 3 * env.num_agents)
+        self.assertEqual(phases['communication']['calls'], env.num_agents)
+        self.assertEqual(phases['pheromone']['calls_per_step'], 1)
+        self.assertEqual(phases['perception']['calls_per_step'], 2)
+
+    def test_only_steps_taken_are_counted(self):
+        env = SARGridWorld(self.options)
+        # the second rescuer drops the last victum at a goal, ending the round before the scouts step
+        rescuer = env.rescuers[1]
+        env.set_victum_1d_loc(0, env.goals[0])
+        env.set_agent_1d_loc(rescuer, env.goals[0])
+        env.agents_carrying_victum[rescuer] = 0
+        actions = [SARGridWorld.Actions.RIGHT] * env.num_agents
+        actions[rescuer] = SARGridWorld.Actions.DROPOFF
+        _, _, dones = env.step_all(actions)
+        self.assertTrue(dones[rescuer])
+        self.assertEqual(env.profiler.summary()['steps'], rescuer + 1)
+
+    def test_simulation_profiles_policies_and_writes_sinks(self):
+        for extension in ('json', 'csv'):
+            sink = os.path.join(self.temp_dir.name, f'profile.{extension}')
+            self.options['profile_file'] = sink
+            self.options['seed'] = 2
+            for _ in range(2):
+                stats = Simulation(SARGridWorld(self.options)).run_simulation(max_rounds=3)
+            self.assertIn('scout_policy', stats['profile']['phases'])
+            self.assertEqual(stats['profile']['seed'], 2)
+            with open(sink) as sink_file:
+                if extension == 'json':
+                    episodes = [json.loads(line) for line in sink_file]
+                    self.assertEqual(len(episodes), 2)
+                    self.assertIn('rescuer_policy', episodes[1]['phases'])
+                else:
+                    rows = list(csv.DictReader(sink_file))
+                    self.assertEqual({row['phase'] for row in rows}, set(stats['profile']['phases']))
+                    self.assertEqual(len(rows), 2 * len(stats['profile']['phases']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+from src import room_graph    # The code to test
+from src.room_graph import RoomGraph, load_room_graph
+from src.environments import SARGridWorld, default_options
+from src.map_factory import ImageGridFactory
+
+
+import unittest   # The test framework
+import numpy as np
+import os
+import tempfile
+
+# three rooms side by side, the first door is at the top and the second at the bottom
+ROOMS_SIZE = 22
+ROOM_CENTERS = [(11, 3), (11, 10.5), (11, 18)]
+
+def write_rooms(map_dir):
+    grid = np.zeros((ROOMS_SIZE, ROOMS_SIZE))
+    grid[:, 7] = 1
+    grid[2, 7] = 0
+    grid[:, 14] = 1
+    grid[18, 14] = 0
+    map_file = os.path.join(map_dir, 'rooms.npy')
+    np.save(map_file, grid)
+    # the graph's ids are (x, y) in 256x256 map coordinates and it has an edge between the first
+    # and last room which isn't a real door
+    scale = room_graph.ROOM_GRAPH_MAP_SIZE / ROOMS_SIZE
+    ids = [f'({column * scale}, {row * scale})' for row, column in ROOM_CENTERS]
+    nodes = ''.join(f'<node id="{node_id}" label="{node_id}" />' for node_id in ids)
+    edges = ''.join(f'<edge source="{ids[i]}" target="{ids[j]}" id="{k}" weight="10.0" />' for k, (i, j) in enumerate([(0, 1), (1, 2), (0, 2)]))
+    gexf_file = os.path.join(map_dir, 'Map0.gexf')
+    with open(gexf_file, 'w') as gexf:
+        gexf.write(f'<?xml version="1.0" encoding="utf-8"?><gexf xmlns="http://www.gexf.net/1.2draft" version="1.2"><graph defaultedgetype="undirected"><nodes>{nodes}</nodes><edges>{edges}</edges></graph></gexf>')
+    return map_file, gexf_file
+
+class Test_RoomGraph(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        map_file, self.gexf_file = write_rooms(self.temp_dir.name)
+        self.options = default_options.copy()
+        self.options['map_file'] = map_file
+        self.options['grid_size'] = ROOMS_SIZE + 2 * self.options['scout_visible_range']
+        self.options['room_graph_file'] = self.gexf_file
+        self.env = SARGridWorld(self.options)
+        self.graph = self.env.room_graph
+        self.padding = self.env.scout_visible_range
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def loc(self, row, column):
+        return self.env.convert_loc_from_2d(column + self.padding, row + self.padding)
+
+    def test_loads_shipped_gexf_files(self):
+        nodes, edges = load_room_graph('./assets/maps/unreal_maps/1_rooms/Map0.gexf')
+        self.assertEqual(nodes.shape, (6, 2))
+        self.assertEqual(len(edges), 5)
+        self.assertTrue(np.all((nodes >= 0) & (nodes < room_graph.ROOM_GRAPH_MAP_SIZE)))
+
+    def test_shipped_waypoints_are_in_the_rooms_of_their_maps(self):
+        for map_name in ('1_rooms', '6_rooms'):
+            map_dir = f'./assets/maps/unreal_maps/{map_name}/'
+            grid = ImageGridFactory.load_grid(map_dir + 'clean_inverted_resized.png', self.padding)
+            scale = (grid.shape[0] - 2 * self.padding) / room_graph.ROOM_GRAPH_MAP_SIZE
+            nodes, _ = load_room_graph(map_dir + 'Map0.gexf')
+            x, y = (nodes * scale + self.padding).round().astype(int).T
+            self.assertTrue(np.all(grid[y, x] == 1), map_name)
+            # so the waypoints don't need moving off the walls and each has its own region
+            options = {**default_options, 'map_file': map_dir + 'clean_inverted_resized.png', 'grid_size': grid.shape[0], 'room_graph_file': map_dir + 'Map0.gexf'}
+            graph = SARGridWorld(options).room_graph
+            self.assertTrue(np.array_equal(graph.waypoints, y * grid.shape[0] + x), map_name)
+            self.assertEqual(len(np.unique(graph.regions[graph.waypoints])), len(nodes))
+
+    def test_waypoints_are_placed_in_their_rooms(self):
+        for waypoint, (row, column) in zip(self.graph.waypoints, ROOM_CENTERS):
+            self.assertEqual(self.env.world[waypoint], 1)
+            self.assertEqual(self.env.manhatten_distance(waypoint, self.loc(row, int(column))), 0)
+
+    def test_every_movable_cell_has_a_region(self):
+        self.assertTrue(np.all(self.graph.regions[self.env.movable_locations] >= 0))
+        self.assertEqual(self.graph.regions[self.loc(20, 0)], 0)
+        self.assertEqual(self.graph.regions[self.loc(20, 21)], 2)
+
+    def test_regions_are_connected_through_doors_only(self):
+        self.assertEqual(sorted(self.graph.neighbors[0]), [1])
+        self.assertEqual(sorted(self.graph.neighbors[1]), [0, 2])
+        self.assertEqual(self.graph.region_path(0, 2)[1], [0, 1, 2])
+
+    def test_walks_shortest_path_between_rooms(self):
+        start, target = self.loc(20, 0), self.loc(20, 21)
+        loc, moves = start, 0
+        while loc != target and moves < 1000:
+            loc = int(self.env.transitions[loc, np.argmin(self.graph.action_distances(loc, target))])
+            moves += 1
+        self.assertEqual(loc, target)
+        self.assertEqual(moves, self.env.distance_field(target)[start])
+
+    def test_distance_is_exact_within_two_regions(self):
+        start, target = self.loc(20, 0), self.loc(20, 12)
+        self.assertEqual(self.graph.distance(start, target), self.env.distance_field(target)[start])
+
+    def test_least_recently_used_local_fields_are_dropped(self):
+        self.graph.max_local_fields = 2
+        first = self.graph.local_field(self.loc(20, 0), (0,))
+        self.graph.local_field(self.loc(20, 21), (2,))
+        self.assertIs(self.graph.local_field(self.loc(20, 0), (0,)), first)
+        self.graph.local_field(self.loc(0, 12), (1,))
+        self.assertEqual(list(self.graph.local_fields), [(self.loc(20, 0), (0,)), (self.loc(0, 12), (1,))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+from src import scenarios    # The code to test
+from src.scenarios import ScenarioSampler, load_accident_centers
+from src.environments import SARGridWorld, default_options
+from src.vector_environments import VectorSARGridWorld
+from src.map_factory import ImageGridFactory
+
+
+import unittest   # The test framework
+import numpy as np
+import os
+import tempfile
+try:
+    import scipy.io
+except ImportError:
+    scipy = None
+
+@unittest.skipIf(scipy is None, "scipy is needed to read accident files")
+class Test_ScenarioSampler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.options = default_options.copy()
+        self.options['grid_size'] = 30
+        # a single accident center at (x, y) of the 256x256 map (stored as a pair of points like gau_locs.mat)
+        self.center = (72.0, 176.0)
+        self.accident_file = self.write_accident_file('gau_locs.mat', self.center)
+        scenarios._accident_cdfs.clear()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def write_accident_file(self, name, center):
+        accident_file = os.path.join(self.temp_dir.name, name)
+        scipy.io.savemat(accident_file, {'pts': np.tile(center, (1, 2, 1, 1))})
+        return accident_file
+
+    def test_loads_shipped_accident_files(self):
+        centers = load_accident_centers('./assets/maps/unreal_maps/1_rooms/gau_locs.mat')
+        self.assertEqual(centers.shape[1], 2)
+        self.assertEqual(len(np.unique(centers, axis=0)), len(centers))
+        self.assertTrue(np.all((centers >= 0) & (centers < scenarios.ACCIDENT_MAP_SIZE)))
+
+    def test_samples_movable_locations(self):
+        env = SARGridWorld(self.options)
+        victum_locations, agent_locations = env.scenario_sampler.sample(1000)
+        self.assertEqual(victum_locations.shape, (1000, env.num_victums))
+        self.assertEqual(agent_locations.shape, (1000, env.num_agents))
+        self.assertTrue(np.all(env.world[victum_locations] == 1))
+        self.assertTrue(np.all(env.world[agent_locations] == 1))
+
+    def test_victums_are_placed_around_accident_centers(self):
+        self.options['accident_file'] = self.accident_file
+        self.options['accident_sigma'] = 10
+        env = SARGridWorld(self.options)
+        victum_locations, _ = env.scenario_sampler.sample(2000)
+        padding = env.scout_visible_range
+        scale = (30 - 2 * padding) / scenarios.ACCIDENT_MAP_SIZE
+        center_x, center_y = (np.array(self.center) * scale + padding).round()
+        distances = np.abs(victum_locations % 30 - center_x) + np.abs(victum_locations // 30 - center_y)
+        # sigma is about one cell on this grid
+        self.assertLess(np.mean(distances), 3)
+        self.assertTrue(np.all(env.world[victum_locations] == 1))
+
+    def test_accident_centers_match_the_rooms_of_the_shipped_maps(self):
+        for map_name in ('1_rooms', '6_rooms'):
+            map_dir = f'./assets/maps/unreal_maps/{map_name}/'
+            grid = ImageGridFactory.load_grid(map_dir + 'clean_inverted_resized.png', 2)
+            grid_size = grid.shape[0]
+            scale = (grid_size - 4) / scenarios.ACCIDENT_MAP_SIZE
+            x, y = (load_accident_centers(map_dir + 'gau_locs.mat') * scale + 2).round().astype(int).T
+            self.assertTrue(np.all(grid[y, x] == 1), map_name)
+
+    def test_accident_centers_in_walls_are_rejected(self):
+        # a narrow accident in the corner of the wall padding
+        self.options['accident_file'] = self.write_accident_file('walls.mat', (-15.0, -15.0))
+        self.options['accident_sigma'] = 1
+        with self.assertRaises(ValueError):
+            SARGridWorld(self.options)
+
+    def test_accident_mass_is_shared_by_worlds_on_the_same_map(self):
+        self.options['accident_file'] = self.accident_file
+        first = SARGridWorld(self.options).scenario_sampler.cdf
+        second = VectorSARGridWorld(self.options, 2).scenario_sampler.cdf
+        self.assertIs(first, second)
+        self.assertEqual(first[-1], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
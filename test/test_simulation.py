@@ -23,6 +23,24 @@ class Test_Simulation(unittest.TestCase):
     def test_simulation_performs_step_with_each_agent(self):
         self.assertTrue(False)
 
+    def test_simulation_returns_episode_statistics(self):
+        stats = self.sim.run_simulation(max_rounds=5)
+        self.assertLessEqual(stats['rounds'], 5)
+        self.assertGreater(stats['coverage'], 0)
+        self.assertGreaterEqual(stats['victums_rescued'], 0)
+
+    def test_seeded_simulations_are_reproducible(self):
+        options = default_options.copy()
+        options['seed'] = 7
+        runs = list()
+        for _ in range(2):
+            env = SARGridWorld(options)
+            stats = Simulation(env=env).run_simulation(max_rounds=50)
+            runs.append((stats, env.agent_locations.copy(), env.location_visits.copy()))
+        self.assertEqual(runs[0][0], runs[1][0])
+        self.assertTrue(np.array_equal(runs[0][1], runs[1][1]))
+        self.assertTrue(np.array_equal(runs[0][2], runs[1][2]))
+
     def simulation_terminates_if_any_step_terminates(self):
         self.assertTrue(False)
 
@@ -0,0 +1,58 @@
+from src import sweep    # The code to test
+from src.sweep import build_sweep_configs, run_episode, run_sweep, aggregate_results
+
+
+import unittest   # The test framework
+import os
+import tempfile
+import numpy as np
+
+class Test_Sweep(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.configs = build_sweep_configs(seeds=[0, 1], agent_counts=[3, 4], base_options={'grid_size': 10})
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        return super().tearDown()
+
+    def test_builds_config_for_each_combination(self):
+        self.assertEqual(len(self.configs), 4)
+        self.assertEqual(sorted((config['num_agents'], config['seed']) for config in self.configs), [(3, 0), (3, 1), (4, 0), (4, 1)])
+
+    def test_episode_returns_statistics(self):
+        result = run_episode(self.configs[0], max_rounds=20)
+        for key in ['rounds', 'terminated', 'victums_rescued', 'coverage', 'communications', 'seconds']:
+            self.assertIn(key, result)
+        self.assertLessEqual(result['rounds'], 20)
+        self.assertGreater(result['coverage'], 0)
+
+    def test_episodes_are_reproducible_by_seed(self):
+        first = run_episode(self.configs[0], max_rounds=20)
+        second = run_episode(self.configs[0], max_rounds=20)
+        self.assertEqual(first['coverage'], second['coverage'])
+
+    def test_episode_loads_grid_size_from_map(self):
+        config = build_sweep_configs(seeds=[0], map_files=['./assets/maps/old_maps/empty_15.npy'])[0]
+        result = run_episode(config, max_rounds=5)
+        self.assertEqual(result['grid_size'], 19)
+
+    def test_episodes_record_frames_to_their_own_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            frames = os.path.join(temp_dir, 'frames')
+            configs = build_sweep_configs(seeds=[0, 1], base_options={'grid_size': 10, 'render_mode': 'rgb_array', 'video_file': frames, 'render_interval': 'round'})
+            results = list(run_sweep(configs, max_workers=2, max_rounds=4))
+            video_files = sorted(result['video_file'] for result in results)
+            self.assertEqual(video_files, [frames + '_grid10_a5_r2_v2_s0', frames + '_grid10_a5_r2_v2_s1'])
+            for video_file in video_files:
+                self.assertGreater(len(os.listdir(video_file)), 0)
+
+    def test_sweep_runs_every_episode_in_worker_processes(self):
+        results = list(run_sweep(self.configs, max_workers=2, max_rounds=10))
+        self.assertEqual(len(results), len(self.configs))
+        table = aggregate_results(results, group_by=('num_agents',))
+        self.assertEqual(sorted(row['num_agents'] for row in table), [3, 4])
+        self.assertTrue(all(row['episodes'] == 2 for row in table))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+from src import trajectory    # The code to test
+from src.trajectory import TrajectoryRecorder, TrajectoryReader, replay_trajectory
+from src.environments import SARGridWorld, default_options
+from src.display import grid_frame
+from src.simulation import Simulation
+
+
+import unittest   # The test framework
+import os
+import tempfile
+import numpy as np
+
+class Test_Trajectory(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'episode')
+        self.options = default_options.copy()
+        self.options['seed'] = 5
+        self.options['num_victums'] = 3
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def record_episode(self, rounds=10, **recorder_options):
+        self.env = SARGridWorld(self.options)
+        recorder = TrajectoryRecorder(self.path, self.env, chunk_size=4, **recorder_options)
+        return Simulation(self.env).run_simulation(rounds, recorder=recorder)
+
+    def test_rounds_are_written_in_chunks(self):
+        stats = self.record_episode()
+        reader = TrajectoryReader(self.path)
+        # the reset state and one row per round
+        self.assertEqual(reader.num_rounds, stats['rounds'] + 1)
+        self.assertEqual(reader.num_chunks, int(np.ceil(reader.num_rounds / 4)))
+        locations = reader.read('agent_locations')
+        self.assertEqual(locations.shape, (reader.num_rounds, self.env.num_agents))
+        self.assertTrue(np.array_equal(locations[-1], self.env.agent_locations))
+        self.assertTrue(np.array_equal(reader.read('victum_locations')[-1], self.env.victum_locations))
+        self.assertTrue(np.all(reader.read('actions')[0] == 0))
+        self.assertTrue(np.all(reader.read('actions')[1:] > 0))
+        self.assertTrue(np.all(reader.read('rewards')[1:] != 0))
+
+    def test_replay_rebuilds_visits_without_simulating(self):
+        self.record_episode()
+        replayed = replay_trajectory(self.path)
+        self.assertTrue(np.array_equal(replayed.location_visits, self.env.location_visits))
+        self.assertTrue(np.array_equal(replayed.agents_carrying_victum, self.env.agents_carrying_victum))
+        self.assertEqual(replayed.step_count.sum(), 0)
+
+    def test_replayed_world_answers_range_queries(self):
+        self.record_episode(rounds=60)
+        replayed = replay_trajectory(self.path)
+        self.assertTrue(np.array_equal(replayed.agent_index.locations, replayed.agent_locations))
+        self.assertTrue(np.array_equal(replayed.victum_index.locations, replayed.victum_locations))
+        for agent in self.env.agents:
+            self.assertEqual(replayed.agents_in_range(agent), self.env.agents_in_range(agent))
+            self.assertEqual(replayed.victums_in_range(agent), self.env.victums_in_range(agent))
+
+    def test_replay_exports_frames(self):
+        self.record_episode()
+        frames = os.path.join(self.temp_dir.name, 'frames')
+        replayed = replay_trajectory(self.path, {'render_mode': 'rgb_array', 'video_file': frames})
+        self.assertEqual(len(os.listdir(frames)), TrajectoryReader(self.path).num_rounds)
+        self.assertTrue(np.array_equal(replayed.get_frame(), grid_frame(self.env)))
+
+    def test_knowledge_is_only_recorded_when_asked(self):
+        self.record_episode(rounds=3)
+        self.assertNotIn('known_victum_locations', next(TrajectoryReader(self.path).rounds()))
+        self.record_episode(rounds=3, record_knowledge=True)
+        reader = TrajectoryReader(self.path)
+        self.assertEqual(reader.read('known_agent_locations').shape, (4, self.env.num_agents, self.env.num_agents))
+        replayed = replay_trajectory(self.path)
+        self.assertTrue(np.array_equal(replayed.known_victum_locations, self.env.known_victum_locations))
+
+
+if __name__ == '__main__':
+    unittest.main()
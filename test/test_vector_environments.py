@@ -0,0 +1,124 @@
+from src import vector_environments    # The code to test
+from src.vector_environments import VectorSARGridWorld
+from src.environments import SARGridWorld, default_options
+
+
+import unittest   # The test framework
+import numpy as np
+
+class Test_VectorEnvironment(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.options = default_options.copy()
+        self.options['grid_size'] = 12
+        self.num_envs = 6
+        self.env = VectorSARGridWorld(self.options, self.num_envs)
+        self.moves = [SARGridWorld.Actions.LEFT, SARGridWorld.Actions.DOWN, SARGridWorld.Actions.UP, SARGridWorld.Actions.RIGHT]
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        return super().tearDown()
+
+    def random_moves(self):
+        return np.random.choice([action.value for action in self.moves], (self.num_envs, self.env.num_agents))
+
+    def test_state_has_batch_axis(self):
+        num_agents, num_victums = self.options['num_agents'], self.options['num_victums']
+        num_cells = self.options['grid_size']**2
+        self.assertEqual(self.env.agent_locations.shape, (self.num_envs, num_agents))
+        self.assertEqual(self.env.victum_locations.shape, (self.num_envs, num_victums))
+        self.assertEqual(self.env.agent_location_visits.shape, (self.num_envs, num_agents, num_cells))
+        self.assertEqual(self.env.known_agent_locations.shape, (self.num_envs, num_agents, num_agents))
+        self.assertEqual(self.env.known_victum_locations.shape, (self.num_envs, num_agents, num_victums))
+
+    def test_worlds_start_in_movable_locations(self):
+        self.assertTrue(np.all(np.isin(self.env.agent_locations, self.env.movable_locations)))
+        self.assertTrue(np.all(np.isin(self.env.victum_locations, self.env.movable_locations)))
+
+    def test_move_actions_move_agents_in_every_world(self):
+        self.env.agent_locations[:] = self.env.convert_loc_from_2d(5, 5)
+        actions = np.full((self.num_envs, self.env.num_agents), SARGridWorld.Actions.RIGHT.value)
+        actions[:, 0] = SARGridWorld.Actions.UP.value
+        _, rewards, dones = self.env.step(actions)
+        self.assertTrue(np.all(self.env.agent_locations[:, 1:] == self.env.convert_loc_from_2d(6, 5)))
+        self.assertTrue(np.all(self.env.agent_locations[:, 0] == self.env.convert_loc_from_2d(5, 4)))
+        self.assertTrue(np.all(rewards == -1))
+        self.assertFalse(np.any(dones))
+
+    def test_agents_stop_at_boundary(self):
+        self.env.agent_locations[:] = self.env.convert_loc_from_2d(0, 0)
+        actions = np.full((self.num_envs, self.env.num_agents), SARGridWorld.Actions.LEFT)
+        self.env.step(actions)
+        self.assertTrue(np.all(self.env.agent_locations == 0))
+
+    def test_seed_reproduces_worlds(self):
+        self.options['seed'] = 5
+        first, second = VectorSARGridWorld(self.options, self.num_envs), VectorSARGridWorld(self.options, self.num_envs)
+        self.assertTrue(np.array_equal(first.agent_locations, second.agent_locations))
+        self.assertTrue(np.array_equal(first.victum_locations, second.victum_locations))
+
+    def test_agents_stop_at_walls(self):
+        corner = self.env.scout_visible_range
+        self.env.agent_locations[:] = self.env.convert_loc_from_2d(corner, corner)
+        actions = np.full((self.num_envs, self.env.num_agents), SARGridWorld.Actions.UP)
+        actions[:, 0] = SARGridWorld.Actions.LEFT
+        self.env.step(actions)
+        self.assertTrue(np.all(self.env.agent_locations == self.env.convert_loc_from_2d(corner, corner)))
+
+    def test_global_visit_map_is_sum_of_agent_visits(self):
+        for _ in range(50):
+            self.env.step(self.random_moves())
+        expected = np.sum(self.env.agent_location_visits, axis=1)
+        self.assertTrue(np.array_equal(self.env.location_visits, expected))
+        self.assertLessEqual(np.max(self.env.agent_location_visits[:, :, self.env.movable_locations]), self.env.max_pheromone)
+
+    def test_agents_perceive_agents_and_victums_in_range(self):
+        scout = self.env.scouts[0]
+        self.env.agent_locations[:] = self.env.convert_loc_from_2d(2, 2)
+        self.env.agent_locations[:, scout] = self.env.convert_loc_from_2d(5, 5)
+        self.env.victum_locations[:] = self.env.convert_loc_from_2d(6, 6)
+        actions = np.full((self.num_envs, self.env.num_agents), SARGridWorld.Actions.REASSESS.value)
+        obs, _, _ = self.env.step(actions)
+        self.assertTrue(np.all(obs['known_victum_locations'][:, scout] == self.env.convert_loc_from_2d(6, 6)))
+        # the other agents are out of range of the victum
+        self.assertTrue(np.all(obs['known_victum_locations'][:, self.env.rescuers] == -1))
+
+    def test_communication_shares_victum_locations(self):
+        scout, rescuer = self.env.scouts[0], self.env.rescuers[0]
+        self.env.agent_locations[:] = self.env.convert_loc_from_2d(2, 2)
+        self.env.agent_locations[:, scout] = self.env.convert_loc_from_2d(5, 5)
+        self.env.agent_locations[:, rescuer] = self.env.convert_loc_from_2d(6, 5)
+        # keep the victums out of range so only communication can reveal them
+        self.env.victum_locations[:] = self.env.convert_loc_from_2d(9, 9)
+        self.env.known_victum_locations[:, scout, 0] = 42
+        actions = np.full((self.num_envs, self.env.num_agents), SARGridWorld.Actions.REASSESS.value)
+        actions[:, rescuer] = SARGridWorld.Actions.COMMUNICATE.value
+        obs, rewards, _ = self.env.step(actions)
+        self.assertTrue(np.all(obs['known_victum_locations'][:, rescuer, 0] == 42))
+        self.assertTrue(np.all(rewards[:, rescuer] == -1))
+        self.assertTrue(np.all(obs['last_agent_communications'][:, scout, rescuer] == 1))
+
+    def test_pickup_carries_victum_and_dropoff_at_goal_resets_world(self):
+        rescuer = self.env.rescuers[0]
+        goal = self.env.goals[0]
+        self.env.agent_locations[0, rescuer] = goal
+        self.env.victum_locations[0, :] = goal
+        actions = np.full((self.num_envs, self.env.num_agents), SARGridWorld.Actions.REASSESS.value)
+        actions[0, rescuer] = SARGridWorld.Actions.PICKUP.value
+        _, rewards, dones = self.env.step(actions)
+        self.assertEqual(rewards[0, rescuer], 10)
+        self.assertEqual(self.env.agents_carrying_victum[0, rescuer], self.env.num_victums - 1)
+        self.assertFalse(np.any(dones))
+        self.env.step_count[0] = 7
+        actions[0, rescuer] = SARGridWorld.Actions.DROPOFF.value
+        _, rewards, dones = self.env.step(actions)
+        self.assertEqual(rewards[0, rescuer], 10)
+        self.assertTrue(dones[0])
+        self.assertFalse(np.any(dones[1:]))
+        # the finished world is reset automatically
+        self.assertTrue(np.all(self.env.step_count[0] == 0))
+        self.assertTrue(np.all(self.env.agents_carrying_victum[0] == -1))
+        self.assertTrue(np.all(self.env.step_count[1:] == 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+import subprocess
+import sys
+
+import cv2
+import numpy as np
+
+from src.environments import SARGridWorld, default_options
+from src.video import FrameWriter
+
+
+class Test_Video(unittest.TestCase):
+
+    def setUp(self):
+        self.options = default_options.copy()
+        self.options['grid_size'] = 20
+        self.options['render_mode'] = 'rgb_array'
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_writer_writes_image_sequence(self):
+        path = os.path.join(self.temp_dir.name, 'frames')
+        frame = np.zeros((4, 6, 3), dtype=np.uint8)
+        frame[0, 0] = (255, 0, 0)
+        with FrameWriter(path) as writer:
+            writer.write(frame)
+            writer.write(frame)
+        files = sorted(os.listdir(path))
+        self.assertEqual(files, ['frame_000000.png', 'frame_000001.png'])
+        # images are stored as rgb frames (read back as bgr by opencv)
+        image = cv2.imread(os.path.join(path, files[0]))
+        self.assertEqual(image.shape, (4, 6, 3))
+        self.assertEqual(tuple(image[0, 0]), (0, 0, 255))
+
+    def test_writer_raises_when_video_cant_be_opened(self):
+        path = os.path.join(self.temp_dir.name, 'missing', 'episode.avi')
+        with self.assertRaises(OSError):
+            FrameWriter(path).write(np.zeros((4, 6, 3), dtype=np.uint8))
+
+    def test_writer_streams_video(self):
+        path = os.path.join(self.temp_dir.name, 'episode.avi')
+        with FrameWriter(path, fps=10) as writer:
+            for _ in range(5):
+                writer.write(np.full((16, 16, 3), 128, dtype=np.uint8))
+        video = cv2.VideoCapture(path)
+        frames = 0
+        while video.read()[0]:
+            frames += 1
+        video.release()
+        self.assertEqual(frames, 5)
+
+    def test_rgb_array_mode_draws_frames(self):
+        env = SARGridWorld(self.options)
+        self.assertIsNone(env.get_frame())
+        env.step_agent(0, SARGridWorld.Actions.REASSESS)
+        frame = env.get_frame()
+        self.assertEqual(frame.shape, (20, 20, 3))
+        self.assertEqual(frame.dtype, np.uint8)
+
+    def test_rgb_array_mode_doesnt_import_pygame(self):
+        code = 'import sys; from src.environments import SARGridWorld, default_options; SARGridWorld({**default_options, "render_mode": "rgb_array"}).render(); print("pygame" in sys.modules)'
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_rgb_array_frames_are_resized(self):
+        self.options['frame_size'] = (10, 10)
+        env = SARGridWorld(self.options)
+        env.step_agent(0, SARGridWorld.Actions.REASSESS)
+        self.assertEqual(env.get_frame().shape, (10, 10, 3))
+
+    def test_rgb_array_mode_writes_every_render_interval(self):
+        path = os.path.join(self.temp_dir.name, 'frames')
+        self.options['video_file'] = path
+        self.options['render_interval'] = 3
+        env = SARGridWorld(self.options)
+        for _ in range(9):
+            env.step_agent(0, SARGridWorld.Actions.REASSESS)
+        env.stop_simulation()
+        self.assertEqual(len(os.listdir(path)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
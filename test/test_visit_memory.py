@@ -0,0 +1,71 @@
+from src import visit_memory    # The code to test
+from src.visit_memory import DenseVisitMemory, SparseVisitMemory
+from src.environments import SARGridWorld, default_options
+
+
+import unittest   # The test framework
+import numpy as np
+
+class Test_VisitMemory(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.options = default_options.copy()
+        self.options['num_agents'] = 10
+        self.options['num_rescuers'] = 3
+        self.options['seed'] = 4
+
+    def run_episode(self, env, rounds=30):
+        # random rounds stepped in turn and as batches, clearing an agent's visits part way
+        rng = np.random.default_rng(0)
+        actions = list(SARGridWorld.Actions)
+        for round_i in range(rounds):
+            round_actions = [actions[i] for i in rng.integers(0, len(actions), env.num_agents)]
+            if round_i % 2:
+                env.step_all(round_actions)
+            else:
+                for agent in env.agents:
+                    env.step_agent(agent, round_actions[agent])
+            if round_i == rounds // 2:
+                env.reset_agent(1)
+
+    def test_sparse_world_matches_dense_world(self):
+        for visit_dtype in ('float64', 'uint8'):
+            worlds = list()
+            for backend in ('dense', 'sparse'):
+                options = {**self.options, 'visit_dtype': visit_dtype, 'visit_memory': backend}
+                env = SARGridWorld(options)
+                self.run_episode(env)
+                worlds.append(env)
+            dense, sparse = worlds
+            self.assertIsInstance(sparse.agent_location_visits, SparseVisitMemory)
+            self.assertTrue(np.array_equal(np.asarray(dense.agent_location_visits), np.asarray(sparse.agent_location_visits)))
+            self.assertTrue(np.array_equal(dense.location_visits, sparse.location_visits))
+            self.assertTrue(np.array_equal(dense.agent_locations, sparse.agent_locations))
+            scout = dense.scouts[0]
+            self.assertTrue(np.array_equal(dense.cell_visits_in_range(scout), sparse.cell_visits_in_range(scout)))
+            self.assertTrue(np.array_equal(dense.agent_location_visits[scout], sparse.agent_location_visits[scout]))
+
+    def test_sparse_memory_only_holds_visited_cells(self):
+        options = {**self.options, 'grid_size': 300, 'visit_memory': 'sparse'}
+        env = SARGridWorld(options)
+        self.run_episode(env)
+        visited = sum(len(row) for row in env.agent_location_visits.rows)
+        self.assertEqual(visited, np.count_nonzero(np.asarray(env.agent_location_visits)[:, env.movable_locations]))
+        self.assertLess(env.agent_location_visits.nbytes, DenseVisitMemory(env.num_agents, env.wall_mask).nbytes / 100)
+
+    def test_clear_returns_the_visited_cells(self):
+        wall_mask = np.array([True, False, False, False, True])
+        for memory in (DenseVisitMemory(2, wall_mask), SparseVisitMemory(2, wall_mask)):
+            memory.add(np.array([0, 0, 0, 1]), np.array([2, 2, 3, 1]))
+            memory.subtract(np.array([0]), np.array([3]))
+            cells, counts = memory.clear(0)
+            self.assertEqual(cells.tolist(), [2])
+            self.assertEqual(counts.tolist(), [2])
+            self.assertEqual(memory[0].tolist(), [np.inf, 0, 0, 0, np.inf])
+            self.assertEqual(memory.count(1, 1), 1)
+
+    def test_unknown_visit_memory_is_rejected(self):
+        options = {**self.options, 'visit_memory': 'compressed'}
+        with self.assertRaises(ValueError):
+            SARGridWorld(options)
+        self.assertEqual(set(visit_memory.visit_memories), {'dense', 'sparse'})